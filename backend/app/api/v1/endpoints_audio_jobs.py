@@ -0,0 +1,87 @@
+import asyncio
+from typing import AsyncIterator
+from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile, status
+from fastapi.responses import StreamingResponse
+from backend.app.schemas.audio_job_schemas import AudioJobAccepted, AudioJobState, JOB_TERMINAL_STATUSES
+from backend.app.core.audio_normalization import AudioNotTranscribable
+from backend.app.services.audio_job_service import AudioJobEmpty, AudioJobTooLarge, audio_job_manager
+from backend.app.core.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+router = APIRouter()
+
+EVENTS_KEEPALIVE_SECONDS = 15.0
+
+@router.post("/jobs", response_model=AudioJobAccepted, status_code=status.HTTP_202_ACCEPTED)
+async def submit_audio_job(
+    request: Request,
+    audio_file: UploadFile = File(..., description="Audio file to analyze (e.g., WAV, FLAC, MP3); may be hours long."),
+    language_code: str = Form("en-US", description="BCP-47 language hint for STT (e.g., 'en-US', 'ha-NG')."),
+):
+    """
+    Queues a long recording for background transcription and analysis and returns its job ID at
+    once. Follow it with GET /jobs/{job_id} or the Server-Sent Events stream at /jobs/{job_id}/events.
+    """
+    try:
+        state = await audio_job_manager.submit(audio_file, language_code)
+    except (AudioJobTooLarge, AudioNotTranscribable) as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    except AudioJobEmpty as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        await audio_file.close()
+    status_url = str(request.url_for("get_audio_job", job_id=state.job_id))
+    return AudioJobAccepted(job_id=state.job_id, status=state.status, status_url=status_url, events_url=status_url + "/events")
+
+@router.get("/jobs/stats")
+async def audio_job_stats():
+    return audio_job_manager.stats()
+
+@router.get("/jobs/{job_id}", response_model=AudioJobState)
+async def get_audio_job(job_id: str):
+    """Job status, progress and the transcript segments finished so far; `result` once the job has completed."""
+    state = audio_job_manager.get(job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Audio job not found.")
+    return state
+
+@router.post("/jobs/{job_id}/cancel", response_model=AudioJobState, status_code=status.HTTP_202_ACCEPTED)
+async def cancel_audio_job(job_id: str):
+    """Cancels a queued or running job. A running job stops within about a second (`cancel_requested` until then)."""
+    state = audio_job_manager.cancel(job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Audio job not found.")
+    return state
+
+@router.get("/jobs/{job_id}/events")
+async def audio_job_events(job_id: str):
+    """
+    Server-Sent Events: a `progress` event with the job state each time it changes, then one event
+    named after the final status (completed, failed or cancelled) and the stream ends.
+    """
+    if audio_job_manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Audio job not found.")
+    return StreamingResponse(
+        _event_stream(job_id), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _event_stream(job_id: str) -> AsyncIterator[str]:
+    # Comment lines keep proxies from closing a stream that is quiet during a long chunk
+    states = audio_job_manager.events(job_id).__aiter__()
+    next_state = asyncio.ensure_future(states.__anext__())
+    try:
+        while True:
+            done, _ = await asyncio.wait({next_state}, timeout=EVENTS_KEEPALIVE_SECONDS)
+            if not done:
+                yield ": keep-alive\n\n"
+                continue
+            try:
+                state = next_state.result()
+            except StopAsyncIteration:
+                return
+            event = state.status if state.status in JOB_TERMINAL_STATUSES else "progress"
+            yield f"event: {event}\nid: {state.updated_at}\ndata: {state.model_dump_json()}\n\n"
+            next_state = asyncio.ensure_future(states.__anext__())
+    finally:
+        next_state.cancel()
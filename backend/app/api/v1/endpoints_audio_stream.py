@@ -1,8 +1,14 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Header, status
 from typing import Optional
 # Import the new response model
 from backend.app.schemas.audio_analysis_schemas import AudioAnalysisResponse 
 from backend.app.services import audio_stream_analyzer
+from backend.app.core.deadline import Deadline, set_current_deadline, reset_current_deadline
+from backend.app.core.admission import AdmissionRejected, admission_controller, PRIORITY_INTERACTIVE
+from backend.app.core.audio_normalization import AudioNotTranscribable
+from backend.app.core.structured_logging import get_logger
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 
@@ -10,7 +16,8 @@ router = APIRouter()
 @router.post("/analyze-audio", response_model=AudioAnalysisResponse) 
 async def analyze_audio_endpoint( # Renamed function for clarity
     audio_file: UploadFile = File(..., description="Audio file to analyze (e.g., WAV, FLAC, MP3)."),
-    language_code: Optional[str] = Form("en-US", description="BCP-47 language hint for STT (e.g., 'en-US', 'ha-NG').")
+    language_code: Optional[str] = Form("en-US", description="BCP-47 language hint for STT (e.g., 'en-US', 'ha-NG')."),
+    x_request_deadline_ms: Optional[int] = Header(None, gt=0, description="Latency budget in milliseconds for STT plus text analysis."),
     # sample_rate_hertz: Optional[int] = Form(None, description="Sample rate (Hz). Important for raw audio, often inferred for WAV/MP3.")
     # We are not explicitly passing sample_rate_hertz to analyze_audio_content for now
 ):
@@ -21,6 +28,11 @@ async def analyze_audio_endpoint( # Renamed function for clarity
     if not audio_file:
         raise HTTPException(status_code=400, detail="No audio file provided.")
 
+    # The budget starts now and is shared by the STT call and the transcript analysis
+    deadline_token = None
+    if x_request_deadline_ms is not None:
+        deadline_token = set_current_deadline(Deadline.from_budget_ms(x_request_deadline_ms))
+
     try:
         audio_bytes = await audio_file.read()
         if not audio_bytes:
@@ -28,28 +40,33 @@ async def analyze_audio_endpoint( # Renamed function for clarity
 
         # Call the updated service function
         # analyze_audio_content will handle both STT and text analysis
-        analysis_result = await audio_stream_analyzer.analyze_audio_content(
-            audio_bytes=audio_bytes,
-            language_code_stt_hint=language_code,
-            # sample_rate_hertz can be passed if extracted or provided by user
-        )
+        async with admission_controller.admit(PRIORITY_INTERACTIVE):
+            analysis_result = await audio_stream_analyzer.analyze_audio_content(
+                audio=audio_bytes,
+                language_code_stt_hint=language_code,
+                # sample_rate_hertz can be passed if extracted or provided by user
+            )
         
         if analysis_result.overall_process_error:
             # Log the full error for debugging on the server
-            print(f"Audio analysis processing error for file {audio_file.filename}: {analysis_result.overall_process_error}")
+            logger.error("Audio analysis processing error.", extra={"audio_filename": audio_file.filename, "error": analysis_result.overall_process_error})
             raise HTTPException(status_code=500, detail=f"Audio processing failed: {analysis_result.overall_process_error}")
         
         if analysis_result.stt_error and not analysis_result.original_transcript: # If STT failed critically
-            print(f"Critical STT error for file {audio_file.filename}: {analysis_result.stt_error}")
+            logger.error("Critical STT error.", extra={"audio_filename": audio_file.filename, "error": analysis_result.stt_error})
             raise HTTPException(status_code=500, detail=f"STT failed: {analysis_result.stt_error}")
 
         return analysis_result
     
-    except HTTPException as e:
-        raise e
+    except (HTTPException, AdmissionRejected) as e:
+        raise e # AdmissionRejected becomes a 429 in the app's exception handler
+    except AudioNotTranscribable as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
     except Exception as e:
-        print(f"Unexpected error processing audio file {audio_file.filename}: {e}") # Log full error
+        logger.exception("Unexpected error processing audio file.", extra={"audio_filename": audio_file.filename}) # Logs the traceback
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred during audio processing: {str(e)}")
     finally:
+        if deadline_token is not None:
+            reset_current_deadline(deadline_token)
         if audio_file: # Ensure file is closed if it was opened
             await audio_file.close()
\ No newline at end of file
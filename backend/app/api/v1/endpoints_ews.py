@@ -3,6 +3,11 @@ from typing import List
 from backend.app.schemas.ews_schemas import EWSInput, EWSCheckResponse, EWSAlert
 from backend.app.schemas.text_analysis_schemas import TextAnalysisResponse # To potentially receive this as input
 from backend.app.services import early_warning_service
+from backend.app.core import metrics
+from backend.app.core.lexicon_store import lexicon_store
+from backend.app.core.structured_logging import get_logger
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 
@@ -21,8 +26,12 @@ async def check_content_for_ews_alerts(
         raise HTTPException(status_code=400, detail="PeaceGuard risk assessment data is required in input.")
 
     try:
-        print(f"Received EWS check request for text: {ews_input_data.original_text[:100]}...")
-        triggered_alerts = early_warning_service.evaluate_content_for_ews(ews_input_data)
+        logger.info("EWS check requested.", extra={"text_chars": len(ews_input_data.original_text), "sampled": True})
+        # One lexicon snapshot for the whole check, so the reported version is the one evaluated
+        lexicon = lexicon_store.current()
+        with metrics.time_stage(metrics.STAGE_EWS_EVALUATION):
+            keyword_scan = lexicon.matcher.scan(ews_input_data.original_text.lower())
+            triggered_alerts = early_warning_service.evaluate_content_for_ews(ews_input_data, keyword_scan=keyword_scan)
         
         status_msg = "EWS evaluation complete."
         if triggered_alerts:
@@ -38,10 +47,11 @@ async def check_content_for_ews_alerts(
         return EWSCheckResponse(
             input_text_snippet=ews_input_data.original_text[:200] + "...",
             triggered_alerts=triggered_alerts,
-            status_message=status_msg
+            status_message=status_msg,
+            lexicon_version=lexicon.version
         )
     except Exception as e:
-        print(f"Error in EWS endpoint: {e}") # Log the error
+        logger.exception("Error in EWS endpoint.")
         raise HTTPException(status_code=500, detail=f"An error occurred during EWS evaluation: {str(e)}")
 
 # Example endpoint to test SMS sending (mocked)
@@ -2,9 +2,13 @@ from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 from typing import Optional
 from backend.app.schemas.audio_analysis_schemas import AudioAnalysisResponse # Reusing this response schema
 from backend.app.services import live_conversation_service 
+from backend.app.core.admission import AdmissionRejected, admission_controller, PRIORITY_LIVE
+from backend.app.core.structured_logging import get_logger
 # import soundfile as sf # soundfile was removed in a previous simplification for this endpoint
 # import io # io was used with soundfile
 
+logger = get_logger(__name__)
+
 router = APIRouter()
 
 @router.post("/analyze-segment", response_model=AudioAnalysisResponse)
@@ -27,33 +31,39 @@ async def analyze_audio_segment_endpoint(
         if not audio_bytes:
             raise HTTPException(status_code=400, detail="Audio segment is empty.")
 
-        print(f"Backend: Received audio segment. Size: {len(audio_bytes)}, Client Sample Rate: {sample_rate}, Lang: {language_code}")
+        logger.info(
+            "Received live audio segment.",
+            extra={"audio_bytes": len(audio_bytes), "sample_rate_hertz": sample_rate, "language_hint": language_code, "sampled": True}
+        )
 
         # We trust the sample_rate from the client (Gradio microphone) for these chunks.
         # Assume mono audio (1 channel) from microphone for simplicity in this STT call.
-        analysis_result = await live_conversation_service.analyze_audio_segment(
-            audio_bytes=audio_bytes,
-            language_code_stt_hint=language_code,
-            sample_rate_hertz=sample_rate
-            # audio_channel_count is defaulted to 1 in live_conversation_service STT config
-        )
+        # Live lane: served before interactive/bulk work and may use the reserved slots
+        async with admission_controller.admit(PRIORITY_LIVE):
+            analysis_result = await live_conversation_service.analyze_audio_segment(
+                audio_bytes=audio_bytes,
+                language_code_stt_hint=language_code,
+                sample_rate_hertz=sample_rate
+                # audio_channel_count is defaulted to 1 in live_conversation_service STT config
+            )
         
         # Check for critical errors from the service layer
         # If an error occurred in the service, it will be in analysis_result.overall_process_error or analysis_result.stt_error
         if analysis_result.overall_process_error or (analysis_result.stt_error and not analysis_result.original_transcript):
             error_detail = analysis_result.overall_process_error or analysis_result.stt_error
-            print(f"Backend: Service layer error for segment: {error_detail}")
+            logger.error("Service layer error for live segment.", extra={"error": error_detail})
             # Return the AudioAnalysisResponse object containing the error details.
             # The Gradio client will interpret this.
             return analysis_result
 
         return analysis_result
     
-    except HTTPException as e:
-        # Re-raise HTTPExceptions directly if they are intentionally thrown (e.g., 400 errors)
+    except (HTTPException, AdmissionRejected) as e:
+        # Re-raise HTTPExceptions directly if they are intentionally thrown (e.g., 400 errors);
+        # AdmissionRejected becomes a 429 with Retry-After in the app's exception handler
         raise e
     except Exception as e:
-        print(f"Backend: Unexpected error processing audio segment in endpoint: {e}")
+        logger.exception("Unexpected error processing live audio segment.")
         # For truly unexpected server errors, return a consistent error structure if possible,
         # or let FastAPI's default 500 handler take over.
         # Returning our defined response model with an error message is often cleaner for the client.
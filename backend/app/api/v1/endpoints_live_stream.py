@@ -0,0 +1,89 @@
+import asyncio
+import json
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+from backend.app.config import settings
+from backend.app.core import metrics
+from backend.app.services import live_stream_service
+from backend.app.services.live_stream_service import LiveStreamEnded, LiveStreamSession
+from backend.app.core.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+router = APIRouter()
+
+@router.websocket("/stream")
+async def live_audio_stream(
+    websocket: WebSocket,
+    language_code: str = Query("en-US", description="BCP-47 language code for STT (e.g., 'en-US', 'ha-NG')."),
+    sample_rate_hertz: int = Query(16000, description="Sample rate of the PCM frames (8000-48000).")
+):
+    """
+    Live audio analysis. The client sends binary frames of raw 16-bit little-endian mono PCM, and a
+    text frame `{"type": "stop"}` (or just closes) when done. The server sends JSON messages with
+    interim/final transcripts and risk updates; see services/live_stream_service.py.
+    """
+    if not live_stream_service.MIN_SAMPLE_RATE_HERTZ <= sample_rate_hertz <= live_stream_service.MAX_SAMPLE_RATE_HERTZ:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="sample_rate_hertz must be between 8000 and 48000.")
+        return
+    if not live_stream_service.has_session_capacity():
+        metrics.LIVE_STREAM_SESSIONS.labels("rejected").inc()
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Too many live sessions on this server; retry shortly.")
+        return
+
+    await websocket.accept()
+    session = LiveStreamSession(language_code, sample_rate_hertz)
+    session.start()
+    sender = asyncio.create_task(_send_messages(websocket, session))
+    try:
+        await websocket.send_json({"type": "ready", "session_id": session.session_id})
+        try:
+            await _receive_audio(websocket, session)
+        except LiveStreamEnded:
+            pass # Recognition failed; the error message is already queued
+        await session.finish()
+        await sender
+        await websocket.close()
+    except WebSocketDisconnect:
+        session.abort()
+    except Exception:
+        logger.exception("Unexpected error in live audio stream.", extra={"session_id": session.session_id})
+        session.abort()
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+    finally:
+        sender.cancel()
+
+
+async def _receive_audio(websocket: WebSocket, session: LiveStreamSession) -> None:
+    # Returns on a stop message; while the session's audio queue is full, push_audio waits and
+    # nothing more is read from the socket (backpressure)
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE))
+        frame = message.get("bytes")
+        if frame is not None:
+            if len(frame) > settings.LIVE_STREAM_MAX_FRAME_BYTES:
+                await websocket.close(code=status.WS_1009_MESSAGE_TOO_BIG, reason=f"Audio frames are limited to {settings.LIVE_STREAM_MAX_FRAME_BYTES} bytes.")
+                raise WebSocketDisconnect(status.WS_1009_MESSAGE_TOO_BIG)
+            if frame:
+                await session.push_audio(frame)
+            continue
+        try:
+            control = json.loads(message.get("text") or "{}")
+        except ValueError:
+            control = {}
+        if isinstance(control, dict) and control.get("type") == "stop":
+            return
+
+
+async def _send_messages(websocket: WebSocket, session: LiveStreamSession) -> None:
+    while True:
+        message = await session.next_message()
+        if message is None:
+            return
+        await websocket.send_json(message)
+
+
+@router.get("/stream/stats", summary="Live Audio Stream Session Statistics")
+async def live_stream_stats():
+    return live_stream_service.live_stream_stats()
@@ -1,23 +1,98 @@
-from fastapi import APIRouter, HTTPException
-from backend.app.schemas.text_analysis_schemas import TextAnalysisRequest, TextAnalysisResponse
+import weakref
+from fastapi import APIRouter, HTTPException, Header
+from typing import Optional
+from fastapi.responses import StreamingResponse
+from backend.app.schemas.text_analysis_schemas import TextAnalysisRequest, TextAnalysisResponse, BatchTextAnalysisRequest
 from backend.app.services import text_misinfo_analyzer
+from backend.app.config import settings
+from backend.app.core import nlp_cache, nlp_utils
+from backend.app.core.gcp_call_policy import gcp_call_policy
+from backend.app.core.lexicon_store import lexicon_store
+from backend.app.core.admission import admission_controller, CLIENT_PRIORITY_CLASSES, PRIORITY_BULK, PRIORITY_INTERACTIVE
+from backend.app.core.structured_logging import get_logger
+
+logger = get_logger(__name__)
 
 router = APIRouter()
 
 @router.post("/analyze-text", response_model=TextAnalysisResponse)
-async def analyze_text_endpoint(request: TextAnalysisRequest):
+async def analyze_text_endpoint(
+    request: TextAnalysisRequest,
+    x_request_deadline_ms: Optional[int] = Header(None, gt=0, description="Latency budget in milliseconds; the smaller of this and 'deadline_ms' applies."),
+    x_request_priority: str = Header(PRIORITY_INTERACTIVE, description="Admission priority class: interactive or bulk.")
+):
     """
     Receives text input and returns a misinformation analysis.
     - **text**: The text content to analyze.
     - **language** (optional): A hint for the language of the text.
+    - **deadline_ms** (optional): Latency budget; GCP stages still running when it runs out are dropped
+      and `peaceguard_risk.partial` / `missing_inputs` say which inputs are missing.
     """
     if not request.text or not request.text.strip():
         raise HTTPException(status_code=400, detail="Text content cannot be empty.")
+    if x_request_deadline_ms is not None:
+        request.deadline_ms = min(x_request_deadline_ms, request.deadline_ms or x_request_deadline_ms)
+    if x_request_priority not in CLIENT_PRIORITY_CLASSES:
+        raise HTTPException(status_code=400, detail=f"X-Request-Priority must be one of {', '.join(CLIENT_PRIORITY_CLASSES)}.")
     
-    try:
-        analysis_result = text_misinfo_analyzer.analyze_text_content(request)
-        return analysis_result
-    except Exception as e:
-        # TODO: Proper logging
-        print(f"Error during analysis: {e}") # Temporary
-        raise HTTPException(status_code=500, detail="An error occurred during analysis.")
\ No newline at end of file
+    async with admission_controller.admit(x_request_priority): # 429 + Retry-After when the lane is full
+        try:
+            analysis_result = await text_misinfo_analyzer.analyze_text_content_async(request)
+            return analysis_result
+        except Exception:
+            logger.exception("Error during text analysis.")
+            raise HTTPException(status_code=500, detail="An error occurred during analysis.")
+
+@router.post("/analyze-text/batch", response_class=StreamingResponse)
+async def analyze_text_batch_endpoint(request: BatchTextAnalysisRequest):
+    """
+    Analyzes up to TEXT_ANALYSIS_BATCH_MAX_ITEMS texts and streams NDJSON: one
+    BatchTextAnalysisItemResult per line, in completion order. Per-item failures are
+    reported inline in the item's `error` field instead of failing the batch.
+    Items run in the bulk admission lane, using capacity that live and interactive traffic leave free.
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one item.")
+    if len(request.items) > settings.TEXT_ANALYSIS_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch contains {len(request.items)} items; the maximum is {settings.TEXT_ANALYSIS_BATCH_MAX_ITEMS}."
+        )
+    # One bulk queue entry per item, reserved up front: 429 unless the whole batch fits
+    reservation = admission_controller.reserve(PRIORITY_BULK, len(request.items))
+
+    async def ndjson_lines():
+        try:
+            async for item_result in text_misinfo_analyzer.analyze_text_batch_async(request.items, item_slot=reservation.admit):
+                yield item_result.model_dump_json(by_alias=True) + "\n"
+        finally:
+            reservation.release() # Entries of empty or cancelled items
+
+    lines = ndjson_lines()
+    weakref.finalize(lines, reservation.release) # The stream may be dropped before it ever starts
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@router.get("/nlp-cache/stats", summary="GCP NLP Response Cache Statistics")
+async def nlp_cache_stats():
+    return nlp_cache.nlp_response_cache.stats()
+
+
+@router.get("/coalescing/stats", summary="Coalesced (Single-Flight) Analysis Statistics")
+async def coalescing_stats():
+    return text_misinfo_analyzer.text_analysis_single_flight.stats()
+
+
+@router.get("/language-detection/batching/stats", summary="Language Detection Micro-Batching Statistics")
+async def language_detection_batching_stats():
+    return nlp_utils.language_detection_batcher.stats()
+
+
+@router.get("/gcp-call-policy/stats", summary="GCP Retry and Hedging Statistics")
+async def gcp_call_policy_stats():
+    return gcp_call_policy.stats()
+
+
+@router.get("/lexicon/stats", summary="Keyword Lexicon Version and Reload Statistics")
+async def lexicon_stats():
+    return lexicon_store.stats()
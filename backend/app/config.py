@@ -1,9 +1,172 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import List, Optional
 
 class Settings(BaseSettings):
     APP_NAME: str = "PeaceGuard AI"
     API_V1_STR: str = "/api/v1"
+
+    # Bounded thread pool used to run the blocking Google Cloud client calls off the event loop
+    GCP_EXECUTOR_MAX_WORKERS: int = 32
+    # Separate pool for Speech-to-Text so long recognitions cannot starve text analysis of threads
+    STT_EXECUTOR_MAX_WORKERS: int = 8
+
+    # Maximum number of texts accepted by /misinformation/analyze-text/batch
+    TEXT_ANALYSIS_BATCH_MAX_ITEMS: int = 500
+
+    # In-process cache for successful GCP NLP responses (keyed on normalized text + language)
+    NLP_CACHE_ENABLED: bool = True
+    NLP_CACHE_MAX_ENTRIES: int = 20000
+    NLP_CACHE_TTL_SECONDS: float = 3600.0
+
+    # Micro-batching of Translate language detection across concurrent requests
+    LANGUAGE_DETECTION_BATCHING_ENABLED: bool = True
+    LANGUAGE_DETECTION_BATCH_WINDOW_MS: float = 5.0
+    LANGUAGE_DETECTION_BATCH_MAX_SIZE: int = 100
+
+    # "separate": analyze_sentiment + classify_text + Translate detection (default).
+    # "annotate": one annotate_text call for sentiment and classification; without a language hint the
+    # language comes from the NL response and the Translate round-trip is skipped.
+    NLP_ANALYSIS_MODE: str = "separate"
+
+    # NLP engine behind language detection, sentiment and classification:
+    # "gcp" (Google Translate + Cloud Natural Language) or "local" (offline, in-process engine)
+    NLP_BACKEND: str = "gcp"
+
+    # Tiered cascade: score keywords/framing locally first and skip GCP sentiment/classification when
+    # their worst-case contribution cannot change the risk label or the EWS auto-trigger. The stages
+    # still needed run concurrently.
+    # With the default cap, what it saves is limited: sentiment is skipped for texts that stay
+    # Low whatever it says, and both stages for texts already Critical from keywords alone. A
+    # keyword-free text still gets classification, since the categories can lift it to High.
+    ANALYSIS_CASCADE_ENABLED: bool = False
+    # Cap on what the GCP categories add to the risk score, in every mode; the cascade relies on it
+    # to skip classification exactly. None = one weighted category at full confidence (0.7 with the
+    # shipped weights). A smaller cap skips classification far more often, but also lowers the
+    # score of texts that match several categories.
+    CATEGORY_RISK_MAX_CONTRIBUTION: Optional[float] = None
+
+    # Per-backend circuit breakers (Language, Translate, Speech). While a breaker is open, text analysis
+    # runs in degraded mode (keywords and framing only) instead of waiting on a failing backend.
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS: float = 30.0
+    CIRCUIT_BREAKER_HALF_OPEN_PROBES: int = 2
+
+    # Retries for retryable gRPC/HTTP status codes (UNAVAILABLE, RESOURCE_EXHAUSTED, ABORTED,
+    # DEADLINE_EXCEEDED), with exponential backoff and full jitter, bounded by the request deadline
+    GCP_RETRY_MAX_ATTEMPTS: int = 3
+    GCP_RETRY_INITIAL_BACKOFF_MS: float = 50.0
+    GCP_RETRY_MAX_BACKOFF_MS: float = 1000.0
+
+    # Hedged requests: after the operation's observed p95 latency (clamped to the min/max delay) send a
+    # duplicate and take the first answer. Hedges are capped at GCP_HEDGE_MAX_RATE of all calls.
+    GCP_HEDGING_ENABLED: bool = True
+    GCP_HEDGED_OPERATIONS: List[str] = ["analyze_sentiment", "classify_text", "annotate_text"]
+    GCP_HEDGE_MAX_RATE: float = 0.05
+    GCP_HEDGE_MIN_SAMPLES: int = 50
+    GCP_HEDGE_LATENCY_WINDOW: int = 512
+    GCP_HEDGE_MIN_DELAY_MS: float = 20.0
+    GCP_HEDGE_MAX_DELAY_MS: float = 2000.0
+    # Threads for hedge-eligible attempts. A call that may be hedged runs its first attempt there while
+    # the calling gcp-call thread waits, so it costs two threads until it answers. None = twice
+    # GCP_EXECUTOR_MAX_WORKERS, which leaves room for one first attempt and one hedge per caller.
+    GCP_HEDGE_MAX_WORKERS: Optional[int] = None
+
+    # gRPC channel pools (one client per channel, round-robin) and keepalive for Language and Speech;
+    # connection pool size of the Translate REST session
+    GCP_LANGUAGE_CHANNEL_POOL_SIZE: int = 2
+    GCP_SPEECH_CHANNEL_POOL_SIZE: int = 1
+    GCP_TRANSLATE_HTTP_POOL_MAXSIZE: int = 16
+    GCP_GRPC_KEEPALIVE_TIME_MS: int = 30000
+    GCP_GRPC_KEEPALIVE_TIMEOUT_MS: int = 10000
+    GCP_GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS: bool = True
+
+    # Bulkheads: maximum RPCs in flight per backend in each worker process
+    GCP_LANGUAGE_MAX_CONCURRENT_RPCS: int = 24
+    GCP_TRANSLATE_MAX_CONCURRENT_RPCS: int = 8
+    GCP_SPEECH_MAX_CONCURRENT_RPCS: int = 6
+
+    # Admission control (per worker): concurrent analyses, slots only live traffic may use, bounded
+    # queues per priority class and how long live/interactive requests may queue before a 429.
+    # Batch items queue individually in the bulk lane.
+    ADMISSION_MAX_CONCURRENT: int = 32
+    ADMISSION_LIVE_RESERVED_SLOTS: int = 8
+    ADMISSION_LIVE_QUEUE_LIMIT: int = 32
+    ADMISSION_INTERACTIVE_QUEUE_LIMIT: int = 128
+    ADMISSION_BULK_QUEUE_LIMIT: int = 2000
+    ADMISSION_LIVE_MAX_QUEUE_WAIT_SECONDS: float = 1.0
+    ADMISSION_INTERACTIVE_MAX_QUEUE_WAIT_SECONDS: float = 10.0
+
+    # Per-request diagnostics: Server-Timing header on the analysis routes, and opt-in profiling of
+    # requests sent with `X-Debug-Profile: cpu|memory` (off by default; enable only where trusted)
+    SERVER_TIMING_ENABLED: bool = True
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 1.0 # Fraction of requests carrying the header that are profiled
+    PROFILING_STORAGE_DIR: str = "/tmp/peaceguard_profiles"
+    PROFILING_MAX_STORED: int = 50
+
+    # Structured logging: JSON lines (or "text") written by a background thread from a bounded queue.
+    # High-volume per-request INFO events are sampled at LOG_INFO_SAMPLE_RATE.
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_QUEUE_MAXSIZE: int = 10000
+    LOG_INFO_SAMPLE_RATE: float = 0.1
+
+    # Startup warm-up (clients, gRPC channels, keyword matchers) runs in the background after the
+    # worker starts; /ready answers 503 until it has finished
+    WARM_UP_ENABLED: bool = True
+    WARM_UP_CHANNEL_TIMEOUT_SECONDS: float = 5.0
+
+    # Keyword lexicon file (versioned JSON, see core/lexicon_store.py); empty = the bundled
+    # backend/app/data/lexicons.json. Checked for changes every LEXICON_RELOAD_INTERVAL_SECONDS (0 = never).
+    LEXICON_PATH: str = ""
+    LEXICON_RELOAD_INTERVAL_SECONDS: float = 10.0
+
+    # Live audio over WebSocket (/live/stream): concurrent sessions per worker (each holds one
+    # streaming recognition and one thread), PCM frames buffered before the server stops reading from
+    # the socket, largest accepted frame, audio per streaming recognition before it is rotated (the API
+    # caps a stream at about five minutes) and how much recent transcript each risk update analyzes
+    LIVE_STREAM_MAX_SESSIONS: int = 16
+    LIVE_STREAM_AUDIO_QUEUE_FRAMES: int = 50
+    LIVE_STREAM_MAX_FRAME_BYTES: int = 262144
+    LIVE_STREAM_MAX_RECOGNITION_SECONDS: float = 280.0
+    LIVE_STREAM_RISK_WINDOW_CHARS: int = 2000
+
+    # Normalize uploaded audio before STT (core/audio_normalization.py): 16 kHz mono FLAC
+    AUDIO_NORMALIZATION_ENABLED: bool = True
+
+    # Long uploads are cut at utterance boundaries into chunks of at most STT_CHUNK_MAX_SECONDS of
+    # speech (synchronous recognize accepts about one minute) and up to AUDIO_CHUNK_MAX_CONCURRENCY
+    # chunks of one upload are transcribed at a time. Risk is also scored per AUDIO_RISK_WINDOW_SECONDS
+    # of the original audio, giving a risk timeline for the clip
+    STT_CHUNK_MAX_SECONDS: float = 55.0
+    AUDIO_CHUNK_MAX_CONCURRENCY: int = 4
+    AUDIO_RISK_WINDOW_SECONDS: float = 60.0
+
+    # Background audio jobs (/audio/jobs, services/audio_job_service.py): where uploads and job state
+    # are kept (empty = <system temp dir>/peaceguard-audio-jobs; share it between the worker
+    # processes of one host), jobs run at once per process, largest upload, how long finished jobs
+    # stay queryable, how often unfinished jobs are looked for (resume) and how often event streams
+    # check a job for changes. A job decodes its upload from the file in blocks, so its memory is the
+    # decoded mono signal (4 bytes per sample at the file's rate, about 690 MB for an hour at 48 kHz)
+    # rather than the upload size; AUDIO_JOB_WORKERS bounds how many are held at once
+    AUDIO_JOBS_DIR: str = ""
+    AUDIO_JOB_WORKERS: int = 2
+    AUDIO_JOB_MAX_UPLOAD_BYTES: int = 1024 * 1024 * 1024
+    AUDIO_JOB_RETENTION_SECONDS: float = 86400.0
+    AUDIO_JOB_RESCAN_SECONDS: float = 30.0
+    AUDIO_JOB_EVENTS_POLL_SECONDS: float = 0.5
+
+    # Voice activity detection before STT (core/vad.py): silence and background noise are dropped,
+    # only utterances are sent. Frame length, how far above the noise floor speech is, the level
+    # below which a frame is always silence, speech needed to open an utterance, silence needed to
+    # close one (hangover) and audio kept from before each onset
+    VAD_ENABLED: bool = True
+    VAD_FRAME_MS: int = 30
+    VAD_ENERGY_MARGIN_DB: float = 10.0
+    VAD_MIN_ENERGY_DBFS: float = -55.0
+    VAD_MIN_SPEECH_MS: int = 90
+    VAD_HANGOVER_MS: int = 400
+    VAD_PRE_ROLL_MS: int = 150
     
     # GOOGLE_APPLICATION_CREDENTIALS environment variable will be used by Google Cloud client libraries.
     # No need to define it here explicitly if it's set in your environment.
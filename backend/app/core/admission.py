@@ -0,0 +1,234 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncContextManager, AsyncIterator, Deque, Dict, Optional
+
+from backend.app.config import settings
+from backend.app.core import metrics
+
+# --- Admission control with priority lanes ---
+# Every analysis request takes one of ADMISSION_MAX_CONCURRENT slots (per worker process) while it
+# runs. Requests that cannot start wait in a bounded queue for their priority class; a full queue
+# (or a live/interactive request waiting past its class's max queue wait) is rejected with 429 and a
+# Retry-After estimate.
+# Scheduling is strict priority: a freed slot goes to the oldest live waiter, then interactive, then
+# bulk. Interactive and bulk may only use ADMISSION_MAX_CONCURRENT - ADMISSION_LIVE_RESERVED_SLOTS
+# slots, so live segments always find headroom even when bulk batches keep the worker saturated.
+# Work admitted as a whole before its parts queue individually (a batch, a background job) reserves
+# its queue entries up front with reserve(); reserved entries count against the queue limit until
+# the parts take them or the reservation is released.
+
+PRIORITY_LIVE = "live"
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+PRIORITY_CLASSES = (PRIORITY_LIVE, PRIORITY_INTERACTIVE, PRIORITY_BULK) # Highest first
+# Classes a client may ask for (X-Request-Priority); live is assigned only by the live audio routes
+CLIENT_PRIORITY_CLASSES = (PRIORITY_INTERACTIVE, PRIORITY_BULK)
+
+SERVICE_TIME_EWMA_ALPHA = 0.1
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, priority: str, retry_after_seconds: int, reason: str):
+        super().__init__(f"Admission rejected for '{priority}' traffic: {reason}")
+        self.priority = priority
+        self.retry_after_seconds = retry_after_seconds
+        self.reason = reason
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrent: int,
+        live_reserved_slots: int,
+        queue_limits: Dict[str, int],
+        max_queue_wait_seconds: Dict[str, Optional[float]]
+    ):
+        self.max_concurrent = max(1, max_concurrent)
+        self.live_reserved_slots = min(max(0, live_reserved_slots), self.max_concurrent - 1)
+        self.queue_limits = queue_limits
+        self.max_queue_wait_seconds = max_queue_wait_seconds
+        # Waiters leave lazily: timed-out/cancelled futures stay in the deque until dispatch skips them,
+        # so the live count is kept separately
+        self._waiters: Dict[str, Deque["asyncio.Future[None]"]] = {priority: deque() for priority in PRIORITY_CLASSES}
+        self._queued_count: Dict[str, int] = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._reserved_count: Dict[str, int] = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._in_flight = 0
+        self._in_flight_by_class: Dict[str, int] = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._service_seconds_ewma = 0.1
+        self.admitted: Dict[str, int] = {priority: 0 for priority in PRIORITY_CLASSES}
+        self.rejected: Dict[str, int] = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._queue_wait_total: Dict[str, float] = {priority: 0.0 for priority in PRIORITY_CLASSES}
+
+    def _slot_limit(self, priority: str) -> int:
+        if priority == PRIORITY_LIVE:
+            return self.max_concurrent
+        return self.max_concurrent - self.live_reserved_slots
+
+    def _can_start(self, priority: str) -> bool:
+        return self._in_flight < self._slot_limit(priority)
+
+    def _queued(self, priority: str) -> int:
+        return self._queued_count[priority]
+
+    def _queued_ahead(self, priority: str) -> int:
+        # Waiters that would be served before a new arrival of this class
+        return sum(self._queued(p) for p in PRIORITY_CLASSES[:PRIORITY_CLASSES.index(priority) + 1])
+
+    def retry_after_seconds(self, priority: str) -> int:
+        capacity = self._slot_limit(priority)
+        drain_seconds = (self._queued_ahead(priority) + 1) * self._service_seconds_ewma / capacity
+        return max(1, math.ceil(drain_seconds))
+
+    def _reject(self, priority: str, reason: str) -> AdmissionRejected:
+        self.rejected[priority] += 1
+        metrics.ADMISSION_DECISIONS.labels(priority, "rejected").inc()
+        return AdmissionRejected(priority, self.retry_after_seconds(priority), reason)
+
+    def _queue_room(self, priority: str) -> int:
+        return self.queue_limits[priority] - self._queued(priority) - self._reserved_count[priority]
+
+    def reserve(self, priority: str, count: int) -> "QueueReservation":
+        """
+        Reserves `count` queue entries for the parts of one piece of work, or rejects it when they do
+        not all fit. Each part then runs inside `reservation.admit()`; release() hands back the rest.
+        """
+        if priority not in self._waiters:
+            raise ValueError(f"Unknown priority class '{priority}'. Expected one of {PRIORITY_CLASSES}.")
+        if count > self._queue_room(priority):
+            raise self._reject(priority, "queue is full")
+        self._reserved_count[priority] += count
+        return QueueReservation(self, priority, count)
+
+    def _start(self, priority: str) -> None:
+        self._in_flight += 1
+        self._in_flight_by_class[priority] += 1
+        self.admitted[priority] += 1
+        metrics.ADMISSION_DECISIONS.labels(priority, "admitted").inc()
+
+    async def acquire(self, priority: str, enforce_queue_limit: bool = True) -> None:
+        """
+        Waits for a slot. `enforce_queue_limit=False` is for work whose queue entry is already
+        reserved (see reserve()): it queues but is never rejected.
+        """
+        if priority not in self._waiters:
+            raise ValueError(f"Unknown priority class '{priority}'. Expected one of {PRIORITY_CLASSES}.")
+        if self._queued_ahead(priority) == 0 and self._can_start(priority):
+            self._start(priority)
+            return
+        if enforce_queue_limit and self._queue_room(priority) <= 0:
+            raise self._reject(priority, "queue is full")
+
+        waiter: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(waiter)
+        self._queued_count[priority] += 1
+        enqueued_at = time.monotonic()
+        max_wait = self.max_queue_wait_seconds.get(priority) if enforce_queue_limit else None
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=max_wait)
+        except asyncio.TimeoutError:
+            self._abandon(priority, waiter) # Granted just as the wait expired -> slot handed back
+            raise self._reject(priority, f"queued longer than {max_wait:g}s")
+        except asyncio.CancelledError:
+            self._abandon(priority, waiter) # Client went away while queued
+            raise
+        finally:
+            self._queue_wait_total[priority] += time.monotonic() - enqueued_at
+
+    def _abandon(self, priority: str, waiter: "asyncio.Future[None]") -> None:
+        if waiter.done():
+            self._release_slot(priority)
+        else:
+            waiter.cancel()
+            self._queued_count[priority] -= 1
+
+    def release(self, priority: str, service_seconds: Optional[float] = None) -> None:
+        if service_seconds is not None:
+            self._service_seconds_ewma += SERVICE_TIME_EWMA_ALPHA * (service_seconds - self._service_seconds_ewma)
+        self._release_slot(priority)
+
+    def _release_slot(self, priority: str) -> None:
+        self._in_flight -= 1
+        self._in_flight_by_class[priority] -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        for priority in PRIORITY_CLASSES:
+            waiters = self._waiters[priority]
+            while waiters and self._can_start(priority):
+                waiter = waiters.popleft()
+                if waiter.done():
+                    continue # Timed out or cancelled while queued; already uncounted
+                self._queued_count[priority] -= 1
+                self._start(priority)
+                waiter.set_result(None)
+            if self._queued_count[priority]:
+                return # Lower classes never overtake a waiting higher class
+
+    @asynccontextmanager
+    async def admit(self, priority: str, enforce_queue_limit: bool = True) -> AsyncIterator[None]:
+        await self.acquire(priority, enforce_queue_limit=enforce_queue_limit)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(priority, time.monotonic() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "live_reserved_slots": self.live_reserved_slots,
+            "in_flight": self._in_flight,
+            "avg_service_ms": round(self._service_seconds_ewma * 1000, 3),
+            "classes": {
+                priority: {
+                    "in_flight": self._in_flight_by_class[priority],
+                    "queued": self._queued(priority),
+                    "reserved": self._reserved_count[priority],
+                    "queue_limit": self.queue_limits[priority],
+                    "max_queue_wait_seconds": self.max_queue_wait_seconds.get(priority),
+                    "admitted": self.admitted[priority],
+                    "rejected": self.rejected[priority],
+                    "avg_queue_wait_ms": round(self._queue_wait_total[priority] / self.admitted[priority] * 1000, 3) if self.admitted[priority] else 0.0,
+                }
+                for priority in PRIORITY_CLASSES
+            },
+        }
+
+
+class QueueReservation:
+    def __init__(self, controller: AdmissionController, priority: str, count: int):
+        self._controller = controller
+        self.priority = priority
+        self.remaining = count
+
+    def admit(self) -> AsyncContextManager[None]:
+        # Turns one reserved entry into a queued (or started) request; nothing awaits in between
+        if self.remaining <= 0:
+            raise RuntimeError("Queue reservation is used up.")
+        self.remaining -= 1
+        self._controller._reserved_count[self.priority] -= 1
+        return self._controller.admit(self.priority, enforce_queue_limit=False)
+
+    def release(self) -> None:
+        # Idempotent: hands back the entries no part has taken
+        self._controller._reserved_count[self.priority] -= self.remaining
+        self.remaining = 0
+
+
+admission_controller = AdmissionController(
+    max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+    live_reserved_slots=settings.ADMISSION_LIVE_RESERVED_SLOTS,
+    queue_limits={
+        PRIORITY_LIVE: settings.ADMISSION_LIVE_QUEUE_LIMIT,
+        PRIORITY_INTERACTIVE: settings.ADMISSION_INTERACTIVE_QUEUE_LIMIT,
+        PRIORITY_BULK: settings.ADMISSION_BULK_QUEUE_LIMIT,
+    },
+    max_queue_wait_seconds={
+        PRIORITY_LIVE: settings.ADMISSION_LIVE_MAX_QUEUE_WAIT_SECONDS,
+        PRIORITY_INTERACTIVE: settings.ADMISSION_INTERACTIVE_MAX_QUEUE_WAIT_SECONDS,
+        PRIORITY_BULK: None, # Bulk absorbs spare capacity; it waits as long as it has to
+    }
+)
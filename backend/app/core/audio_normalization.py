@@ -0,0 +1,304 @@
+import io
+import math
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import soundfile as sf
+
+from backend.app.config import settings
+from backend.app.core import metrics, vad
+from backend.app.core.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+# --- Audio normalization before STT ---
+# Uploaded audio arrives in any container, rate and channel layout (often 44.1/48 kHz stereo WAV).
+# Before STT it is:
+#   1. sniffed: container, sample rate and channel count are read from the header (soundfile);
+#   2. decoded, downmixed to mono and resampled to STT_SAMPLE_RATE_HERTZ (16 kHz, what the speech
+#      models are trained on; higher rates add bytes, not accuracy);
+#   3. passed through voice activity detection (core/vad.py), which keeps only the utterances;
+#   4. cut into chunks of at most STT_CHUNK_MAX_SECONDS of speech, at utterance boundaries, and
+#      each chunk re-encoded losslessly as 16-bit FLAC.
+# STT then gets an explicit sample rate and a format it always accepts, in a fraction of the bytes,
+# and no chunk exceeds what synchronous recognize accepts (about one minute), so a long clip is
+# transcribed as several recognize calls run side by side. Each chunk keeps its position in the
+# original audio, so transcripts can be stitched back in order with time offsets.
+# A chunk never spans two AUDIO_RISK_WINDOW_SECONDS windows (by utterance start), so each belongs
+# to one window of the risk timeline.
+# Containers libsndfile cannot decode (e.g. WebM/Opus, MP4/AAC) are sent unchanged, as one chunk,
+# and STT infers their format, as before. Their length is unknown here, so uploads transcribe such a
+# chunk with long-running recognize (see audio_stream_analyzer). Speech-to-Text takes at most
+# STT_INLINE_AUDIO_MAX_BYTES of inline audio, so a larger one is rejected (AudioNotTranscribable).
+# The input is either the encoded bytes or the path of a file holding them. From a path, soundfile
+# decodes in blocks, so the encoded file is never held in memory; only the mono signal is (see
+# DECODE_BLOCK_SECONDS). A file that cannot be decoded is read whole, since STT needs its bytes.
+
+STT_SAMPLE_RATE_HERTZ = 16000
+DECODE_BLOCK_SECONDS = 30 # Decode and downmix in blocks: only the mono signal is held in memory
+RESAMPLE_BLOCK_SECONDS = 30
+# An utterance longer than a chunk (e.g. music or unbroken speech) is cut at its quietest frame in
+# the last LONG_UTTERANCE_SPLIT_SEARCH_SECONDS before the limit
+LONG_UTTERANCE_SPLIT_SEARCH_SECONDS = 10.0
+STT_SYNC_MAX_SECONDS = 60.0 # Longest audio synchronous recognize accepts
+STT_INLINE_AUDIO_MAX_BYTES = 10 * 1024 * 1024 # Largest inline audio any recognize call accepts
+
+AudioSource = Union[bytes, str] # Encoded audio, or the path of a file holding it
+
+# Magic bytes, to name the container of audio soundfile cannot open
+_CONTAINER_SIGNATURES = (
+    (b"RIFF", "WAV"), (b"fLaC", "FLAC"), (b"OggS", "OGG"), (b"ID3", "MP3"), (b"\xff\xfb", "MP3"),
+    (b"\xff\xf3", "MP3"), (b"FORM", "AIFF"), (b"\x1a\x45\xdf\xa3", "WEBM"),
+)
+
+
+class AudioNotTranscribable(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class AudioHeader:
+    container: str
+    sample_rate_hertz: Optional[int] = None
+    channels: Optional[int] = None
+    subtype: Optional[str] = None
+    duration_seconds: Optional[float] = None
+    decodable: bool = False
+
+
+@dataclass(frozen=True)
+class AudioChunk:
+    audio_bytes: bytes # Speech-only FLAC, or the whole input unchanged when it could not be decoded
+    start_seconds: float # Position of the chunk in the original audio
+    end_seconds: Optional[float]
+    speech_seconds: Optional[float] = None # Audio actually in audio_bytes
+    window_index: int = 0 # Risk-timeline window the chunk belongs to
+    passthrough: bool = False # The input as received, not normalized; end_seconds is None if its length is unknown
+
+
+@dataclass
+class PreparedAudio:
+    chunks: List[AudioChunk] # In time order; empty when normalization found no speech
+    header: AudioHeader
+    sample_rate_hertz: Optional[int] # Sample rate of the chunks, when known
+    seconds_received: Optional[float] = None
+    seconds_sent: Optional[float] = None
+    utterances: int = 0
+    normalized: bool = False
+
+    @property
+    def bytes_sent(self) -> int:
+        return sum(len(chunk.audio_bytes) for chunk in self.chunks)
+
+    @property
+    def sent_ratio(self) -> Optional[float]:
+        if self.seconds_received is None or self.seconds_sent is None:
+            return None
+        return round(self.seconds_sent / self.seconds_received, 4) if self.seconds_received else 1.0
+
+
+def _soundfile_input(audio: AudioSource):
+    return io.BytesIO(audio) if isinstance(audio, bytes) else audio
+
+
+def _read_bytes(audio: AudioSource, limit: int = -1) -> bytes:
+    if isinstance(audio, bytes):
+        return audio if limit < 0 else audio[:limit]
+    with open(audio, "rb") as f:
+        return f.read(limit)
+
+
+def _input_size(audio: AudioSource) -> int:
+    return len(audio) if isinstance(audio, bytes) else os.path.getsize(audio)
+
+
+def _sniff_container(audio: AudioSource) -> str:
+    leading_bytes = _read_bytes(audio, 16)
+    for signature, container in _CONTAINER_SIGNATURES:
+        if leading_bytes.startswith(signature):
+            return container
+    if leading_bytes[4:8] == b"ftyp":
+        return "MP4"
+    return "unknown"
+
+
+def sniff_audio_header(audio: AudioSource) -> AudioHeader:
+    try:
+        info = sf.info(_soundfile_input(audio))
+    except (RuntimeError, ValueError): # soundfile.LibsndfileError is a RuntimeError
+        return AudioHeader(container=_sniff_container(audio))
+    return AudioHeader(
+        container=info.format,
+        sample_rate_hertz=info.samplerate,
+        channels=info.channels,
+        subtype=info.subtype,
+        duration_seconds=round(info.duration, 3),
+        decodable=True,
+    )
+
+
+def ensure_transcribable(audio: AudioSource, header: Optional[AudioHeader] = None) -> None:
+    """Raises AudioNotTranscribable for input that would be sent unchanged and is too large for STT."""
+    header = header or sniff_audio_header(audio)
+    if header.decodable and settings.AUDIO_NORMALIZATION_ENABLED:
+        return # Normalized into chunks well under the limit
+    input_bytes = _input_size(audio)
+    if input_bytes > STT_INLINE_AUDIO_MAX_BYTES:
+        raise AudioNotTranscribable(
+            f"{header.container} audio of {input_bytes} bytes cannot be decoded here and exceeds the "
+            f"{STT_INLINE_AUDIO_MAX_BYTES} bytes Speech-to-Text accepts; convert it to WAV or FLAC."
+        )
+
+
+def _decode_mono(audio: AudioSource, sample_rate_hertz: int) -> np.ndarray:
+    blocks = []
+    with sf.SoundFile(_soundfile_input(audio)) as sound_file:
+        for block in sound_file.blocks(blocksize=DECODE_BLOCK_SECONDS * sample_rate_hertz, dtype="float32", always_2d=True):
+            blocks.append(block.mean(axis=1) if block.shape[1] > 1 else block[:, 0])
+    return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+
+
+def resample(samples: np.ndarray, source_rate_hertz: int, target_rate_hertz: int) -> np.ndarray:
+    """
+    Polyphase resampling (scipy.signal.resample_poly), in blocks with enough overlap on each side
+    for the anti-aliasing filter, so long recordings never need a float64 copy of the whole signal.
+    """
+    if source_rate_hertz == target_rate_hertz or not len(samples):
+        return samples
+    from scipy.signal import resample_poly # About 1.5 s to import; only needed once audio must be resampled
+    divisor = math.gcd(source_rate_hertz, target_rate_hertz)
+    up, down = target_rate_hertz // divisor, source_rate_hertz // divisor
+    # resample_poly's filter spans 10 * max(up, down) upsampled taps per side; in input samples,
+    # rounded up to a whole number of `down` so block edges map to whole output samples
+    context = down * math.ceil((10 * max(up, down) / up + 1) / down)
+    block = down * math.ceil(RESAMPLE_BLOCK_SECONDS * source_rate_hertz / down)
+    if len(samples) <= block + 2 * context:
+        return resample_poly(samples, up, down).astype(np.float32)
+
+    output = []
+    for start in range(0, len(samples), block):
+        end = min(start + block, len(samples))
+        padded_start, padded_end = max(0, start - context), min(len(samples), end + context)
+        resampled = resample_poly(samples[padded_start:padded_end], up, down)
+        skip = (start - padded_start) * up // down
+        keep = math.ceil((end - start) * up / down)
+        output.append(resampled[skip:skip + keep].astype(np.float32))
+    return np.concatenate(output)
+
+
+def to_int16(samples: np.ndarray) -> np.ndarray:
+    return np.clip(np.round(samples * vad.INT16_FULL_SCALE), -32768, 32767).astype(np.int16)
+
+
+def encode_flac(samples: np.ndarray, sample_rate_hertz: int) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, sample_rate_hertz, format="FLAC", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def _split_long_span(samples: np.ndarray, start: int, end: int, max_samples: int, sample_rate_hertz: int) -> List[Tuple[int, int]]:
+    frame_length = max(1, sample_rate_hertz * settings.VAD_FRAME_MS // 1000)
+    search_samples = int(LONG_UTTERANCE_SPLIT_SEARCH_SECONDS * sample_rate_hertz)
+    spans = []
+    while end - start > max_samples:
+        search_start = max(start + frame_length, start + max_samples - search_samples)
+        frame_count = (start + max_samples - search_start) // frame_length
+        cut = start + max_samples
+        if frame_count > 0:
+            frames = samples[search_start:search_start + frame_count * frame_length].reshape(frame_count, frame_length)
+            energy_dbfs, _ = vad.frame_features(frames)
+            cut = search_start + int(np.argmin(energy_dbfs)) * frame_length
+        spans.append((start, cut))
+        start = cut
+    spans.append((start, end))
+    return spans
+
+
+def plan_chunks(samples: np.ndarray, spans: List[Tuple[int, int]], sample_rate_hertz: int) -> List[List[Tuple[int, int]]]:
+    """
+    Groups utterance spans (sample positions) into chunks of at most STT_CHUNK_MAX_SECONDS of speech.
+    Consecutive spans share a chunk while they fit and start in the same risk window.
+    """
+    max_samples = max(1, int(settings.STT_CHUNK_MAX_SECONDS * sample_rate_hertz))
+    window_samples = max(1, int(settings.AUDIO_RISK_WINDOW_SECONDS * sample_rate_hertz))
+    chunks: List[List[Tuple[int, int]]] = []
+    current: List[Tuple[int, int]] = []
+    current_samples = 0
+    for span_start, span_end in spans:
+        for start, end in _split_long_span(samples, span_start, span_end, max_samples, sample_rate_hertz):
+            if current and (current_samples + end - start > max_samples or start // window_samples != current[0][0] // window_samples):
+                chunks.append(current)
+                current, current_samples = [], 0
+            current.append((start, end))
+            current_samples += end - start
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _encode_chunk(samples: np.ndarray, spans: List[Tuple[int, int]], sample_rate_hertz: int) -> AudioChunk:
+    speech = np.concatenate([samples[start:end] for start, end in spans])
+    window_samples = max(1, int(settings.AUDIO_RISK_WINDOW_SECONDS * sample_rate_hertz))
+    return AudioChunk(
+        audio_bytes=encode_flac(speech, sample_rate_hertz),
+        start_seconds=round(spans[0][0] / sample_rate_hertz, 3),
+        end_seconds=round(spans[-1][1] / sample_rate_hertz, 3),
+        speech_seconds=round(len(speech) / sample_rate_hertz, 3),
+        window_index=spans[0][0] // window_samples,
+    )
+
+
+def prepare_audio_for_stt(audio: AudioSource, path: str) -> PreparedAudio:
+    """
+    Normalizes uploaded audio (bytes, or the path of a file) for STT (see above). Blocking and
+    CPU-bound: run it on an executor. `path` labels the metrics (upload, segment, ...).
+    """
+    header = sniff_audio_header(audio)
+    input_bytes = _input_size(audio)
+    ensure_transcribable(audio, header)
+    if not header.decodable or not settings.AUDIO_NORMALIZATION_ENABLED:
+        logger.info("Audio sent to STT without normalization.", extra={"container": header.container, "audio_bytes": input_bytes, "sampled": True})
+        metrics.STT_AUDIO_BYTES.labels(path, "received").inc(input_bytes)
+        metrics.STT_AUDIO_BYTES.labels(path, "sent").inc(input_bytes)
+        chunk = AudioChunk(audio_bytes=_read_bytes(audio), start_seconds=0.0, end_seconds=header.duration_seconds, passthrough=True)
+        return PreparedAudio(chunks=[chunk], header=header, sample_rate_hertz=header.sample_rate_hertz)
+
+    try:
+        samples = _decode_mono(audio, header.sample_rate_hertz)
+    except (RuntimeError, ValueError) as e: # Header readable, body corrupt: let STT try the original
+        logger.warning("Audio decode failed; sending it to STT unchanged.", extra={"container": header.container, "error": str(e)})
+        if input_bytes > STT_INLINE_AUDIO_MAX_BYTES:
+            raise AudioNotTranscribable(f"{header.container} audio could not be decoded and exceeds the {STT_INLINE_AUDIO_MAX_BYTES} bytes Speech-to-Text accepts.") from e
+        chunk = AudioChunk(audio_bytes=_read_bytes(audio), start_seconds=0.0, end_seconds=header.duration_seconds, passthrough=True)
+        return PreparedAudio(chunks=[chunk], header=header, sample_rate_hertz=None)
+    samples = to_int16(resample(samples, header.sample_rate_hertz, STT_SAMPLE_RATE_HERTZ))
+    seconds_received = len(samples) / STT_SAMPLE_RATE_HERTZ
+    if settings.VAD_ENABLED:
+        utterances = vad.detect_utterance_spans(samples, STT_SAMPLE_RATE_HERTZ)
+    else:
+        utterances = [(0, len(samples))] if len(samples) else []
+    chunks = [_encode_chunk(samples, spans, STT_SAMPLE_RATE_HERTZ) for spans in plan_chunks(samples, utterances, STT_SAMPLE_RATE_HERTZ)]
+    seconds_sent = sum(end - start for start, end in utterances) / STT_SAMPLE_RATE_HERTZ
+    prepared = PreparedAudio(
+        chunks=chunks,
+        header=header,
+        sample_rate_hertz=STT_SAMPLE_RATE_HERTZ,
+        seconds_received=round(seconds_received, 3),
+        seconds_sent=round(seconds_sent, 3),
+        utterances=len(utterances),
+        normalized=True,
+    )
+
+    vad.record_stt_audio(path, seconds_received, seconds_sent)
+    metrics.STT_AUDIO_BYTES.labels(path, "received").inc(input_bytes)
+    metrics.STT_AUDIO_BYTES.labels(path, "sent").inc(prepared.bytes_sent)
+    logger.info(
+        "Audio normalized for STT.",
+        extra={
+            "container": header.container, "input_sample_rate_hertz": header.sample_rate_hertz, "input_channels": header.channels,
+            "input_bytes": input_bytes, "output_bytes": prepared.bytes_sent, "chunks": len(chunks), "sampled": True,
+        }
+    )
+    return prepared
@@ -0,0 +1,184 @@
+import threading
+import time
+from typing import Any, Dict, List
+
+import requests
+from google.api_core import exceptions as gcp_exceptions
+
+from backend.app.config import settings
+from backend.app.core import metrics
+from backend.app.core.deadline import deadline_exhausted
+from backend.app.core.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+# --- Per-backend circuit breakers ---
+# After CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive failures a backend's breaker opens and calls to
+# it fail fast with CircuitOpenError instead of each request waiting out the outage. After
+# CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS the breaker goes half-open and lets a few probe calls through;
+# enough successful probes close it again, a failed probe re-opens it.
+# Breakers are checked from the GCP executor threads, so state changes are guarded by a lock.
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, backend_name: str):
+        super().__init__(f"Circuit breaker for '{backend_name}' is open; backend temporarily unavailable.")
+        self.backend_name = backend_name
+
+
+# Errors that say the backend is unhealthy. Client errors such as InvalidArgument (unsupported
+# language, empty document) mean the backend answered, so they do not count against it.
+_BACKEND_FAILURE_TYPES = (
+    gcp_exceptions.ServerError, # 5xx, incl. ServiceUnavailable and DeadlineExceeded
+    gcp_exceptions.TooManyRequests, # ResourceExhausted / quota
+    gcp_exceptions.RetryError,
+    TimeoutError,
+    ConnectionError,
+    requests.exceptions.Timeout, # Translate (REST)
+)
+
+_TIMEOUT_TYPES = (gcp_exceptions.DeadlineExceeded, TimeoutError, requests.exceptions.Timeout)
+
+
+def is_caller_timeout(e: BaseException) -> bool:
+    # RPC timeouts come from the request's remaining budget (rpc_timeout()). When that budget is
+    # what ran out, the timeout says nothing about the backend: a client sending a tiny deadline_ms
+    # must not open the breaker for everyone.
+    return isinstance(e, _TIMEOUT_TYPES) and deadline_exhausted()
+
+
+def is_backend_failure(e: BaseException) -> bool:
+    return isinstance(e, _BACKEND_FAILURE_TYPES) and not is_caller_timeout(e)
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout_seconds: float,
+        half_open_max_probes: int
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout_seconds = max(0.0, reset_timeout_seconds)
+        self.half_open_max_probes = max(1, half_open_max_probes)
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self.times_opened = 0
+        self.rejected_calls = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        if self._state == STATE_OPEN and time.monotonic() - self._opened_at >= self.reset_timeout_seconds:
+            self._state = STATE_HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+            logger.info("Circuit breaker half-open, probing backend.", extra={"backend": self.name})
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == STATE_CLOSED:
+                return True
+            if self._state == STATE_HALF_OPEN and self._probes_in_flight < self.half_open_max_probes:
+                self._probes_in_flight += 1
+                return True
+            self.rejected_calls += 1
+            return False # Counted in metrics by the caller (check(), or STT's fail-fast path)
+
+    def check(self) -> None:
+        """Raises CircuitOpenError when the call should fail fast."""
+        if not self.allow_request():
+            metrics.CIRCUIT_BREAKER_REJECTIONS.labels(self.name).inc()
+            raise CircuitOpenError(self.name)
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_max_probes:
+                    self._state = STATE_CLOSED
+                    logger.info("Circuit breaker closed, backend recovered.", extra={"backend": self.name})
+            self._consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                self._open()
+                return
+            self._consecutive_failures += 1
+            if self._state == STATE_CLOSED and self._consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def record_result(self, e: BaseException = None) -> None:
+        # Convenience for `except Exception as e` blocks: only backend failures trip the breaker.
+        # A GCP client error means the backend answered; anything else (e.g. waiting for local
+        # capacity, or a timeout set by the caller's own deadline) says nothing about backend health.
+        if e is not None and is_backend_failure(e):
+            self.record_failure()
+        elif e is None or (isinstance(e, gcp_exceptions.GoogleAPICallError) and not is_caller_timeout(e)):
+            self.record_success()
+        else:
+            self.release_probe()
+
+    def release_probe(self) -> None:
+        with self._lock:
+            if self._state == STATE_HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def _open(self) -> None:
+        self._state = STATE_OPEN
+        self._opened_at = time.monotonic()
+        self._consecutive_failures = 0
+        self.times_opened += 1
+        logger.warning("Circuit breaker opened; failing fast.", extra={"backend": self.name, "reset_timeout_seconds": self.reset_timeout_seconds})
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected_calls,
+            }
+
+
+def _make_breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name=name,
+        failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout_seconds=settings.CIRCUIT_BREAKER_RESET_TIMEOUT_SECONDS,
+        half_open_max_probes=settings.CIRCUIT_BREAKER_HALF_OPEN_PROBES
+    )
+
+
+BACKEND_LANGUAGE = "gcp_language"
+BACKEND_TRANSLATE = "gcp_translate"
+BACKEND_SPEECH = "gcp_speech"
+
+language_breaker = _make_breaker(BACKEND_LANGUAGE)
+translate_breaker = _make_breaker(BACKEND_TRANSLATE)
+speech_breaker = _make_breaker(BACKEND_SPEECH)
+
+ALL_BREAKERS: List[CircuitBreaker] = [language_breaker, translate_breaker, speech_breaker]
+
+
+def breaker_states() -> Dict[str, str]:
+    return {breaker.name: breaker.state for breaker in ALL_BREAKERS}
@@ -0,0 +1,68 @@
+import contextvars
+import time
+from typing import Optional, Union
+
+from google.api_core import gapic_v1
+
+# --- Per-request latency budget ---
+# A Deadline is set once per request (from the X-Request-Deadline-Ms header or the request's
+# `deadline_ms` field) and carried in a context variable, so every GCP call made on behalf of the
+# request - including those run on the GCP executor threads - can use the remaining budget as its
+# RPC timeout.
+
+MIN_RPC_TIMEOUT_SECONDS = 0.01 # gRPC rejects a zero/negative timeout
+
+
+class Deadline:
+    def __init__(self, budget_seconds: float):
+        self.budget_seconds = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+
+    @classmethod
+    def from_budget_ms(cls, budget_ms: float) -> "Deadline":
+        return cls(max(0.0, budget_ms) / 1000.0)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+def get_current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def set_current_deadline(deadline: Optional[Deadline]) -> contextvars.Token:
+    return _current_deadline.set(deadline)
+
+
+def reset_current_deadline(token: contextvars.Token) -> None:
+    _current_deadline.reset(token)
+
+
+# A request whose deadline has less than this left is treated as out of budget
+DEADLINE_EXHAUSTED_SLACK_SECONDS = 0.05
+
+
+def deadline_exhausted() -> bool:
+    """
+    True when the current request's deadline has (all but) run out. A timeout at that point came
+    from the caller's budget (rpc_timeout()), not from a slow backend.
+    """
+    deadline = get_current_deadline()
+    return deadline is not None and deadline.remaining() <= DEADLINE_EXHAUSTED_SLACK_SECONDS
+
+
+def rpc_timeout(default: Union[float, object] = gapic_v1.method.DEFAULT) -> Union[float, object]:
+    """Remaining budget of the current request as an RPC timeout, or `default` when there is no deadline."""
+    deadline = get_current_deadline()
+    if deadline is None:
+        return default
+    remaining = deadline.remaining()
+    if default is not gapic_v1.method.DEFAULT and isinstance(default, (int, float)):
+        remaining = min(remaining, default)
+    return max(MIN_RPC_TIMEOUT_SECONDS, remaining)
@@ -0,0 +1,239 @@
+import contextvars
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional, TypeVar
+
+from google.api_core import exceptions as gcp_exceptions
+
+from backend.app.config import settings
+from backend.app.core.deadline import get_current_deadline
+from backend.app.core.gcp_channels import Bulkhead
+from backend.app.core import metrics
+from backend.app.core.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+# --- Retry and hedging policy for GCP RPCs ---
+# call_with_policy(op, call) runs one GCP RPC with:
+#  - bounded exponential-backoff retries (full jitter) for retryable status codes, never sleeping past
+#    the request deadline;
+#  - hedging for read-only NL operations: if the first attempt has not answered after the observed
+#    p95 latency of that operation, a duplicate is sent and the first answer wins. Hedges are capped
+#    at GCP_HEDGE_MAX_RATE of calls, so they add at most that fraction to GCP spend.
+# Every attempt, hedges included, holds a slot of the backend's bulkhead while it is in flight.
+# A blocking RPC cannot be abandoned, so a call that may be hedged runs its first attempt on the hedge
+# pool and the calling thread only waits; calls that cannot be hedged (no p95 yet, operation not
+# hedged, hedge budget already spent) run on the calling thread. The pool therefore holds up to one
+# first attempt plus one hedge per calling thread and is sized from GCP_EXECUTOR_MAX_WORKERS.
+# `call` must compute its own RPC timeout (rpc_timeout()) so each attempt gets the remaining budget,
+# and should pass retry=None to GAPIC methods so the client library does not retry underneath.
+
+T = TypeVar("T")
+
+RETRYABLE_EXCEPTION_TYPES = (
+    gcp_exceptions.ServiceUnavailable, # UNAVAILABLE
+    gcp_exceptions.TooManyRequests, # RESOURCE_EXHAUSTED
+    gcp_exceptions.Aborted, # ABORTED
+    gcp_exceptions.DeadlineExceeded, # Per-attempt timeout; retried only while budget remains
+    ConnectionError,
+)
+
+
+def is_retryable(e: BaseException) -> bool:
+    return isinstance(e, RETRYABLE_EXCEPTION_TYPES)
+
+
+class LatencyWindow:
+    """Recent successful attempt latencies of one operation, with a cached p95."""
+
+    def __init__(self, size: int, recompute_every: int = 32):
+        self._samples: Deque[float] = deque(maxlen=max(1, size))
+        self._recompute_every = max(1, recompute_every)
+        self._since_recompute = 0
+        self._p95: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self._since_recompute += 1
+            if self._p95 is None or self._since_recompute >= self._recompute_every:
+                ordered = sorted(self._samples)
+                self._p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+                self._since_recompute = 0
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self._p95
+
+
+class GCPCallPolicy:
+    def __init__(self):
+        self._latencies: Dict[str, LatencyWindow] = {}
+        self._lock = threading.Lock()
+        self._attempt_executor: Optional[ThreadPoolExecutor] = None
+        self.calls = 0
+        self.retries = 0
+        self.hedges_sent = 0
+        self.hedge_wins = 0
+        self.hedges_suppressed = 0 # Hedge delay passed but the rate cap said no
+
+    def _window(self, operation: str) -> LatencyWindow:
+        window = self._latencies.get(operation)
+        if window is None:
+            with self._lock:
+                window = self._latencies.setdefault(operation, LatencyWindow(settings.GCP_HEDGE_LATENCY_WINDOW))
+        return window
+
+    def _executor(self) -> ThreadPoolExecutor:
+        # Hedged attempts run on their own pool; created on first use
+        if self._attempt_executor is None:
+            with self._lock:
+                if self._attempt_executor is None:
+                    self._attempt_executor = ThreadPoolExecutor(
+                        max_workers=hedge_pool_size(), thread_name_prefix="gcp-hedge"
+                    )
+        return self._attempt_executor
+
+    def hedge_delay(self, operation: str) -> Optional[float]:
+        if not settings.GCP_HEDGING_ENABLED or operation not in settings.GCP_HEDGED_OPERATIONS:
+            return None
+        window = self._window(operation)
+        if len(window) < settings.GCP_HEDGE_MIN_SAMPLES or window.p95 is None:
+            return None # Not enough history for a meaningful p95 yet
+        delay = min(max(window.p95, settings.GCP_HEDGE_MIN_DELAY_MS / 1000.0), settings.GCP_HEDGE_MAX_DELAY_MS / 1000.0)
+        deadline = get_current_deadline()
+        if deadline is not None and deadline.remaining() <= delay:
+            return None # The hedge could not answer before the deadline anyway
+        return delay
+
+    def _hedge_budget_left(self) -> bool:
+        with self._lock:
+            return self.hedges_sent + 1 <= settings.GCP_HEDGE_MAX_RATE * self.calls
+
+    def _take_hedge_slot(self) -> bool:
+        with self._lock:
+            if self.hedges_sent + 1 > settings.GCP_HEDGE_MAX_RATE * self.calls:
+                self.hedges_suppressed += 1
+                return False
+            self.hedges_sent += 1
+            return True
+
+    def _timed(self, operation: str, call: Callable[[], T], bulkhead: Optional[Bulkhead]) -> T:
+        if bulkhead is None:
+            return self._timed_call(operation, call)
+        with bulkhead:
+            return self._timed_call(operation, call)
+
+    def _timed_call(self, operation: str, call: Callable[[], T]) -> T:
+        started = time.monotonic()
+        result = call()
+        self._window(operation).add(time.monotonic() - started)
+        return result
+
+    def _submit(self, operation: str, call: Callable[[], T], bulkhead: Optional[Bulkhead]) -> "Future[T]":
+        context = contextvars.copy_context() # Keep the request deadline in the hedge thread
+        return self._executor().submit(context.run, self._timed, operation, call, bulkhead)
+
+    def _attempt(self, operation: str, call: Callable[[], T], bulkhead: Optional[Bulkhead]) -> T:
+        delay = self.hedge_delay(operation)
+        if delay is None or not self._hedge_budget_left():
+            return self._timed(operation, call, bulkhead) # No hedge possible: stay on the calling thread
+
+        primary = self._submit(operation, call, bulkhead)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_hedge_slot():
+            return primary.result()
+
+        hedge = self._submit(operation, call, bulkhead)
+        metrics.GCP_HEDGES.labels(operation).inc()
+        pending = {primary, hedge}
+        first_error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for finished in done:
+                if finished.exception() is None:
+                    if finished is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return finished.result() # The slower attempt finishes in the background
+                first_error = first_error or finished.exception()
+        raise first_error
+
+    def call(self, operation: str, call: Callable[[], T], bulkhead: Optional[Bulkhead] = None) -> T:
+        with self._lock:
+            self.calls += 1
+        started = time.perf_counter()
+        try:
+            result = self._call_with_retries(operation, call, bulkhead)
+        except Exception:
+            metrics.GCP_CALLS.labels(operation, "error").inc()
+            raise
+        finally:
+            metrics.GCP_CALL_DURATION.labels(operation).observe(time.perf_counter() - started)
+        metrics.GCP_CALLS.labels(operation, "success").inc()
+        return result
+
+    def _call_with_retries(self, operation: str, call: Callable[[], T], bulkhead: Optional[Bulkhead]) -> T:
+        max_attempts = max(1, settings.GCP_RETRY_MAX_ATTEMPTS)
+        backoff = settings.GCP_RETRY_INITIAL_BACKOFF_MS / 1000.0
+        for attempt in range(1, max_attempts + 1):
+            try:
+                return self._attempt(operation, call, bulkhead)
+            except Exception as e:
+                if attempt == max_attempts or not is_retryable(e):
+                    raise
+                sleep_for = random.uniform(0.0, backoff) # Full jitter
+                deadline = get_current_deadline()
+                if deadline is not None and deadline.remaining() <= sleep_for:
+                    raise # No budget left for another attempt
+                logger.warning(
+                    "GCP call attempt failed; retrying.",
+                    extra={"operation": operation, "attempt": attempt, "error_type": type(e).__name__, "retry_in_ms": round(sleep_for * 1000)}
+                )
+                with self._lock:
+                    self.retries += 1
+                metrics.GCP_RETRIES.labels(operation).inc()
+                time.sleep(sleep_for)
+                backoff = min(backoff * 2, settings.GCP_RETRY_MAX_BACKOFF_MS / 1000.0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            operations = {
+                operation: {
+                    "samples": len(window),
+                    "p95_ms": round(window.p95 * 1000, 3) if window.p95 is not None else None,
+                }
+                for operation, window in self._latencies.items()
+            }
+            return {
+                "hedging_enabled": settings.GCP_HEDGING_ENABLED,
+                "hedge_max_rate": settings.GCP_HEDGE_MAX_RATE,
+                "calls": self.calls,
+                "retries": self.retries,
+                "hedges_sent": self.hedges_sent,
+                "hedge_wins": self.hedge_wins,
+                "hedges_suppressed": self.hedges_suppressed,
+                "hedge_rate": round(self.hedges_sent / self.calls, 4) if self.calls else 0.0,
+                "operations": operations,
+            }
+
+
+def hedge_pool_size() -> int:
+    if settings.GCP_HEDGE_MAX_WORKERS is not None:
+        return max(1, settings.GCP_HEDGE_MAX_WORKERS)
+    # Each GCP executor thread has at most one offloaded first attempt and one hedge in flight
+    return 2 * settings.GCP_EXECUTOR_MAX_WORKERS
+
+
+gcp_call_policy = GCPCallPolicy()
+
+
+def call_with_policy(operation: str, call: Callable[[], T], bulkhead: Optional[Bulkhead] = None) -> T:
+    return gcp_call_policy.call(operation, call, bulkhead=bulkhead)
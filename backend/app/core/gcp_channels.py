@@ -0,0 +1,181 @@
+import itertools
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import grpc
+from requests.adapters import HTTPAdapter
+
+from backend.app.config import settings
+from backend.app.core.deadline import get_current_deadline, rpc_timeout
+from backend.app.core.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+# --- gRPC channel pools and per-backend bulkheads ---
+# Each gRPC client (Language, Speech) is built as a small pool of clients, each on its own channel
+# with keepalive configured, and calls are spread round-robin. One HTTP/2 connection caps concurrent
+# streams, so a pool keeps a busy worker from queueing behind a single connection.
+# Each backend also has a bulkhead: a semaphore bounding the RPCs in flight from this worker. A flood
+# of audio uploads fills the Speech bulkhead but cannot take Language API capacity from text analysis.
+
+
+# Client pools register themselves here once created, for the stats endpoint
+client_pool_sizes: Dict[str, int] = {}
+
+
+def grpc_channel_options() -> List[tuple]:
+    return [
+        ("grpc.keepalive_time_ms", settings.GCP_GRPC_KEEPALIVE_TIME_MS),
+        ("grpc.keepalive_timeout_ms", settings.GCP_GRPC_KEEPALIVE_TIMEOUT_MS),
+        ("grpc.keepalive_permit_without_calls", 1 if settings.GCP_GRPC_KEEPALIVE_PERMIT_WITHOUT_CALLS else 0),
+        ("grpc.http2.max_pings_without_data", 0),
+        ("grpc.max_send_message_length", -1), # Audio payloads can exceed the 4 MB default
+        ("grpc.max_receive_message_length", -1),
+    ]
+
+
+class ClientPool:
+    """
+    Round-robin pool of GAPIC clients. Attribute access is forwarded to the next client, so
+    `pool.classify_text(...)` works wherever a single client was used before.
+    """
+
+    def __init__(self, name: str, clients: List[Any]):
+        if not clients:
+            raise ValueError(f"Client pool '{name}' needs at least one client.")
+        self.name = name
+        self._clients = clients
+        self._cycle = itertools.cycle(clients)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def next_client(self) -> Any:
+        with self._lock:
+            return next(self._cycle)
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self.next_client(), attribute)
+
+    def prime_channels(self, timeout_seconds: float) -> int:
+        """Connects every channel now (DNS, TLS, HTTP/2) instead of on its first RPC. Returns how many are ready."""
+        ready = 0
+        for client in self._clients:
+            try:
+                grpc.channel_ready_future(client.transport.grpc_channel).result(timeout=timeout_seconds)
+                ready += 1
+            except grpc.FutureTimeoutError:
+                logger.warning("gRPC channel not ready after warm-up timeout.", extra={"pool": self.name, "timeout_seconds": timeout_seconds})
+        return ready
+
+
+def create_grpc_client_pool(name: str, client_cls, transport_cls, credentials, pool_size: int) -> ClientPool:
+    clients = []
+    for _ in range(max(1, pool_size)):
+        channel = transport_cls.create_channel(credentials=credentials, options=grpc_channel_options())
+        clients.append(client_cls(transport=transport_cls(channel=channel)))
+    client_pool_sizes[name] = len(clients)
+    logger.info("gRPC channel pool created.", extra={"pool": name, "channels": len(clients)})
+    return ClientPool(name, clients)
+
+
+def configure_http_connection_pool(name: str, http_session, pool_maxsize: int) -> None:
+    # Translate v2 is a REST client on a requests session; size its connection pool to the bulkhead
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_maxsize))
+    http_session.mount("https://", adapter)
+    client_pool_sizes[name] = max(1, pool_maxsize)
+
+
+def bound_http_timeouts_by_deadline(http_session) -> None:
+    # Translate v2's detect_language takes no timeout: its connection always passes its own (60 s) to
+    # the session. Bound each request on the session by the remaining request deadline instead.
+    send = http_session.request
+
+    def request(method, url, *args, timeout=None, **kwargs):
+        if timeout is None or isinstance(timeout, (int, float)):
+            timeout = rpc_timeout(timeout)
+        return send(method, url, *args, timeout=timeout, **kwargs)
+
+    http_session.request = request
+
+
+class BulkheadTimeout(Exception):
+    def __init__(self, backend_name: str):
+        super().__init__(f"No '{backend_name}' capacity became free before the request deadline.")
+        self.backend_name = backend_name
+
+
+class Bulkhead:
+    def __init__(self, name: str, max_concurrent: int):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrent)
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.waiting = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def __enter__(self) -> "Bulkhead":
+        started = time.monotonic()
+        if not self._semaphore.acquire(blocking=False):
+            with self._lock:
+                self.waiting += 1
+            deadline = get_current_deadline()
+            try:
+                acquired = self._semaphore.acquire(timeout=deadline.remaining() if deadline is not None else None)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+            if not acquired:
+                with self._lock:
+                    self.timeouts += 1
+                raise BulkheadTimeout(self.name)
+        waited = time.monotonic() - started
+        with self._lock:
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            self.acquired += 1
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        with self._lock:
+            self.in_use -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "max_concurrent": self.max_concurrent,
+                "in_use": self.in_use,
+                "utilization": round(self.in_use / self.max_concurrent, 4),
+                "peak_in_use": self.peak_in_use,
+                "waiting": self.waiting,
+                "acquired": self.acquired,
+                "timeouts": self.timeouts,
+                "avg_queue_wait_ms": round(self.total_wait_seconds / self.acquired * 1000, 3) if self.acquired else 0.0,
+                "max_queue_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            }
+
+
+language_bulkhead = Bulkhead("gcp_language", settings.GCP_LANGUAGE_MAX_CONCURRENT_RPCS)
+translate_bulkhead = Bulkhead("gcp_translate", settings.GCP_TRANSLATE_MAX_CONCURRENT_RPCS)
+speech_bulkhead = Bulkhead("gcp_speech", settings.GCP_SPEECH_MAX_CONCURRENT_RPCS)
+
+ALL_BULKHEADS: List[Bulkhead] = [language_bulkhead, translate_bulkhead, speech_bulkhead]
+
+
+def pool_stats() -> Dict[str, Any]:
+    return {
+        "channel_pools": dict(client_pool_sizes),
+        "keepalive_time_ms": settings.GCP_GRPC_KEEPALIVE_TIME_MS,
+        "bulkheads": [bulkhead.stats() for bulkhead in ALL_BULKHEADS],
+    }
@@ -0,0 +1,45 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from backend.app.config import settings
+
+# --- Bounded executor for blocking Google Cloud calls ---
+# The Language, Translate and Speech clients are synchronous. Running them here instead of on the
+# event loop lets independent RPCs overlap, and the pool size caps how many run at once per worker.
+# Speech-to-Text gets its own pool because a single recognition can take several seconds.
+gcp_executor = ThreadPoolExecutor(
+    max_workers=settings.GCP_EXECUTOR_MAX_WORKERS,
+    thread_name_prefix="gcp-call"
+)
+
+stt_executor = ThreadPoolExecutor(
+    max_workers=settings.STT_EXECUTOR_MAX_WORKERS,
+    thread_name_prefix="stt-call"
+)
+
+# Live audio streams: each session holds one thread for its whole streaming recognition, so they get
+# their own pool, sized to the live session cap
+live_stream_executor = ThreadPoolExecutor(
+    max_workers=settings.LIVE_STREAM_MAX_SESSIONS,
+    thread_name_prefix="stt-stream"
+)
+
+# run_in_executor does not carry context variables into the worker thread, so the caller's context
+# (request deadline, etc.) is copied explicitly.
+async def run_in_gcp_executor(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(gcp_executor, functools.partial(context.run, func, *args, **kwargs))
+
+async def run_in_stt_executor(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(stt_executor, functools.partial(context.run, func, *args, **kwargs))
+
+async def run_in_live_stream_executor(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(live_stream_executor, functools.partial(context.run, func, *args, **kwargs))
@@ -0,0 +1,224 @@
+import re
+from array import array
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# --- Compiled multi-pattern keyword matcher (Aho-Corasick) ---
+# All lexicons are compiled once into a single automaton so a text is scanned in one
+# linear pass regardless of how many terms are loaded. Matches are whole-word only:
+# "kill" matches "kill" and "kill!" but not "skill" or "killer".
+#
+# Memory layout: transitions live in ONE dict keyed by (state << 21 | codepoint) instead of a
+# dict per node, and failure/output links are flat int arrays. This keeps the automaton compact
+# when the lexicon grows to tens of thousands of sourced terms.
+#
+# Terms are compiled with single spaces between words, so the scan reads any run of whitespace
+# (double spaces, tabs, newlines) in the text as one space: "us  vs\nthem" matches "us vs them".
+# Hit offsets still point into the text as given.
+
+_CODEPOINT_BITS = 21 # Enough for any Unicode codepoint
+_WHITESPACE_TO_COLLAPSE = re.compile(r"\s{2,}|[^\S ]") # Runs, or a single tab/newline/...
+
+
+class KeywordHit(NamedTuple):
+    term: str
+    categories: Tuple[str, ...]
+    start: int # Offsets are into the lowercased text that was scanned, as passed to scan()
+    end: int
+
+
+class KeywordScan:
+    """
+    Result of a single scan: every whole-word hit plus per-term / per-category lookups.
+    `version` is the version of the lexicon the scanning matcher was compiled from.
+    """
+
+    def __init__(self, hits: List[KeywordHit], version: Optional[str] = None):
+        self.hits = hits
+        self.version = version
+        self._term_counts: Dict[str, int] = {}
+        self._categories_by_term: Dict[str, Tuple[str, ...]] = {}
+        self._terms_by_category: Dict[str, List[str]] = {}
+        for hit in hits:
+            if hit.term not in self._term_counts:
+                self._term_counts[hit.term] = 0
+                self._categories_by_term[hit.term] = hit.categories
+                for category in hit.categories:
+                    self._terms_by_category.setdefault(category, []).append(hit.term)
+            self._term_counts[hit.term] += 1
+
+    def count(self, term: str) -> int:
+        return self._term_counts.get(term, 0)
+
+    def terms(self, category: str) -> List[str]:
+        # Distinct terms of a category, in order of first appearance in the text
+        return list(self._terms_by_category.get(category, []))
+
+    def counts(self, category: str) -> Dict[str, int]:
+        return {term: self._term_counts[term] for term in self._terms_by_category.get(category, [])}
+
+    def has_any(self, category: str) -> bool:
+        return category in self._terms_by_category
+
+    def in_category(self, term: str, category: str) -> bool:
+        # Whether a term found by this scan belongs to `category` in the scanned lexicon
+        return category in self._categories_by_term.get(term, ())
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _collapse_whitespace(text: str) -> Tuple[str, Optional[List[int]]]:
+    """
+    Replaces each whitespace run with one space. Returns the new text and, when it changed, the
+    offset in `text` of each of its characters (plus one entry for its end).
+    """
+    if not _WHITESPACE_TO_COLLAPSE.search(text):
+        return text, None
+    parts: List[str] = []
+    offsets: List[int] = []
+    position = 0
+    for run in _WHITESPACE_TO_COLLAPSE.finditer(text):
+        parts.append(text[position:run.start()])
+        offsets.extend(range(position, run.start()))
+        parts.append(" ")
+        offsets.append(run.start())
+        position = run.end()
+    parts.append(text[position:])
+    offsets.extend(range(position, len(text)))
+    offsets.append(len(text))
+    return "".join(parts), offsets
+
+
+class KeywordMatcher:
+    def __init__(self, lexicons: Dict[str, Iterable[str]], version: Optional[str] = None):
+        """
+        Compiles {category: [terms]} into one automaton. A term may belong to several
+        categories. Terms are lowercased and stripped; empty terms are ignored.
+        """
+        self.version = version
+        self._goto: Dict[int, int] = {}
+        self._depth = array("i", [0])
+        self._fail = array("i", [0])
+        self._output = array("i", [-1]) # Pattern id ending exactly at this state, or -1
+        self._dict_link = array("i", [0]) # Nearest proper suffix state that ends a pattern (0 = none)
+        self._patterns: List[str] = []
+        self._pattern_categories: List[Tuple[str, ...]] = []
+
+        categories_by_term: Dict[str, List[str]] = {}
+        for category, terms in lexicons.items():
+            for term in terms:
+                normalized = " ".join(term.lower().split())
+                if not normalized:
+                    continue
+                term_categories = categories_by_term.setdefault(normalized, [])
+                if category not in term_categories:
+                    term_categories.append(category)
+
+        for term, term_categories in categories_by_term.items():
+            self._add_pattern(term, tuple(term_categories))
+        self._build_links()
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    @property
+    def categories(self) -> List[str]:
+        seen: Dict[str, None] = {}
+        for term_categories in self._pattern_categories:
+            for category in term_categories:
+                seen.setdefault(category, None)
+        return list(seen)
+
+    def _add_pattern(self, term: str, categories: Tuple[str, ...]) -> None:
+        state = 0
+        for ch in term:
+            key = (state << _CODEPOINT_BITS) | ord(ch)
+            next_state = self._goto.get(key)
+            if next_state is None:
+                next_state = len(self._fail)
+                self._goto[key] = next_state
+                self._depth.append(self._depth[state] + 1)
+                self._fail.append(0)
+                self._output.append(-1)
+                self._dict_link.append(0)
+            state = next_state
+        self._output[state] = len(self._patterns)
+        self._patterns.append(term)
+        self._pattern_categories.append(categories)
+
+    def _build_links(self) -> None:
+        # Children per state are only needed while building, then discarded
+        children: Dict[int, List[Tuple[int, int]]] = {}
+        mask = (1 << _CODEPOINT_BITS) - 1
+        for key, child in self._goto.items():
+            children.setdefault(key >> _CODEPOINT_BITS, []).append((key & mask, child))
+
+        queue = deque()
+        for _, child in children.get(0, []):
+            queue.append(child) # Depth-1 states fail to the root
+        while queue:
+            state = queue.popleft()
+            for codepoint, child in children.get(state, []):
+                fallback = self._fail[state]
+                while True:
+                    target = self._goto.get((fallback << _CODEPOINT_BITS) | codepoint)
+                    if target is not None:
+                        self._fail[child] = target
+                        break
+                    if fallback == 0:
+                        self._fail[child] = 0
+                        break
+                    fallback = self._fail[fallback]
+                child_fail = self._fail[child]
+                self._dict_link[child] = child_fail if self._output[child_fail] >= 0 else self._dict_link[child_fail]
+                queue.append(child)
+
+    def scan(self, text_lower: str) -> KeywordScan:
+        """Finds every whole-word occurrence of every term in one pass over `text_lower`."""
+        hits: List[KeywordHit] = []
+        if not text_lower or not self._patterns:
+            return KeywordScan(hits, self.version)
+        text_lower, offsets = _collapse_whitespace(text_lower)
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        dict_link = self._dict_link
+        depth = self._depth
+        text_length = len(text_lower)
+        state = 0
+        for index, ch in enumerate(text_lower):
+            codepoint = ord(ch)
+            while True:
+                next_state = goto.get((state << _CODEPOINT_BITS) | codepoint)
+                if next_state is not None:
+                    state = next_state
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+            if state == 0:
+                continue
+
+            end = index + 1
+            if end < text_length and _is_word_char(text_lower[end]):
+                continue # Every candidate ending here is glued to the next word
+            candidate = state if output[state] >= 0 else dict_link[state]
+            while candidate:
+                start = end - depth[candidate]
+                if start == 0 or not _is_word_char(text_lower[start - 1]):
+                    pattern_id = output[candidate]
+                    if offsets is None:
+                        hits.append(KeywordHit(self._patterns[pattern_id], self._pattern_categories[pattern_id], start, end))
+                    else:
+                        hits.append(KeywordHit(self._patterns[pattern_id], self._pattern_categories[pattern_id], offsets[start], offsets[end - 1] + 1))
+                candidate = dict_link[candidate]
+        return KeywordScan(hits, self.version)
+
+    def find_terms(self, text_lower: str, category: Optional[str] = None) -> List[str]:
+        scan = self.scan(text_lower)
+        if category is not None:
+            return scan.terms(category)
+        return list(dict.fromkeys(hit.term for hit in scan.hits))
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from backend.app.config import settings
+from backend.app.core.keyword_matcher import KeywordMatcher
+from backend.app.core.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+# --- Hot-reloadable, versioned keyword lexicon ---
+# The lexicons compiled into the shared keyword matcher come from a versioned JSON file
+# (settings.LEXICON_PATH, by default backend/app/data/lexicons.json):
+#
+#     {"version": "2025.06.04-1", "lexicons": {"dangerous": ["kill", ...], "sensitive": [...], ...}}
+#
+# A background thread checks the file every LEXICON_RELOAD_INTERVAL_SECONDS. A changed file is
+# parsed and compiled off the request path, then published as a new immutable LexiconSnapshot by a
+# single reference swap. A request takes one snapshot and scans with it, so it never sees a
+# half-built matcher or a mix of two versions. A file that fails to load leaves the current snapshot
+# in place.
+# Services register their built-in lexicons (the constants in their modules); these fill any
+# category the file does not define, and are used alone when there is no usable file.
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "lexicons.json")
+BUILTIN_LEXICON_VERSION = "builtin"
+
+
+class LexiconFileError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class LexiconSnapshot:
+    version: str
+    source: str # File path, or "builtin"
+    content_sha256: Optional[str]
+    loaded_at: float
+    lexicons: Mapping[str, Tuple[str, ...]]
+    matcher: KeywordMatcher
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "content_sha256": self.content_sha256,
+            "loaded_at": self.loaded_at,
+            "terms": len(self.matcher),
+            "lexicons": {category: len(terms) for category, terms in self.lexicons.items()},
+        }
+
+
+def _parse_lexicon_file(raw: bytes) -> Tuple[Optional[str], Dict[str, List[str]]]:
+    try:
+        document = json.loads(raw)
+    except ValueError as e:
+        raise LexiconFileError(f"Not valid JSON: {e}") from e
+    if not isinstance(document, dict) or not isinstance(document.get("lexicons"), dict):
+        raise LexiconFileError("Expected an object with a 'lexicons' object.")
+    version = document.get("version")
+    if version is not None and not isinstance(version, str):
+        raise LexiconFileError("'version' must be a string.")
+    lexicons: Dict[str, List[str]] = {}
+    for category, terms in document["lexicons"].items():
+        if not isinstance(terms, list) or not all(isinstance(term, str) for term in terms):
+            raise LexiconFileError(f"Lexicon '{category}' must be a list of strings.")
+        lexicons[category] = terms
+    return version, lexicons
+
+
+class LexiconStore:
+    def __init__(self, path: str, reload_interval_seconds: float):
+        self.path = path
+        self.reload_interval_seconds = reload_interval_seconds
+        self._builtin_lexicons: Dict[str, Tuple[str, ...]] = {}
+        self._snapshot: Optional[LexiconSnapshot] = None
+        self._file_signature: Optional[Tuple[int, int]] = None # (mtime_ns, size) of the last file read
+        self._reload_lock = threading.Lock()
+        self._stop_watching = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.reloads = 0
+        self.failed_reloads = 0
+
+    def register_builtin_lexicons(self, lexicons: Dict[str, Iterable[str]]) -> None:
+        with self._reload_lock:
+            for category, terms in lexicons.items():
+                self._builtin_lexicons[category] = tuple(terms)
+            self._snapshot = None # Rebuilt with the new built-ins on next use
+            self._file_signature = None
+
+    def current(self) -> LexiconSnapshot:
+        snapshot = self._snapshot # One read: the caller keeps this snapshot even if a reload swaps it
+        if snapshot is None:
+            self.reload_if_changed()
+            snapshot = self._snapshot
+        return snapshot
+
+    def _file_signature_now(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload_if_changed(self) -> bool:
+        """Reloads the file when it changed since the last read (or builds the first snapshot). Returns True on a swap."""
+        with self._reload_lock:
+            signature = self._file_signature_now()
+            if self._snapshot is not None and signature == self._file_signature:
+                return False
+            self._file_signature = signature
+            snapshot = self._build_snapshot(signature)
+            if snapshot is None:
+                return False
+            previous_version = self._snapshot.version if self._snapshot is not None else None
+            self._snapshot = snapshot # Atomic publish
+            if previous_version is not None:
+                self.reloads += 1
+        if previous_version is not None:
+            logger.info("Lexicon reloaded.", extra={"previous_version": previous_version, "lexicon_version": snapshot.version, "terms": len(snapshot.matcher)})
+        return True
+
+    def _build_snapshot(self, signature: Optional[Tuple[int, int]]) -> Optional[LexiconSnapshot]:
+        if signature is None:
+            if self._snapshot is not None:
+                return None # File removed: keep serving the current lexicon
+            logger.warning("Lexicon file not found; using built-in lexicons.", extra={"path": self.path})
+            return self._compile(BUILTIN_LEXICON_VERSION, BUILTIN_LEXICON_VERSION, None, {})
+        try:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+            content_sha256 = hashlib.sha256(raw).hexdigest()
+            if self._snapshot is not None and self._snapshot.content_sha256 == content_sha256:
+                return None # Touched but unchanged
+            version, file_lexicons = _parse_lexicon_file(raw)
+            return self._compile(version or f"sha256:{content_sha256[:12]}", self.path, content_sha256, file_lexicons)
+        except (OSError, LexiconFileError) as e:
+            self.failed_reloads += 1
+            logger.error("Failed to load lexicon file; keeping the current lexicon.", extra={"path": self.path, "error": str(e)})
+            if self._snapshot is None:
+                return self._compile(BUILTIN_LEXICON_VERSION, BUILTIN_LEXICON_VERSION, None, {})
+            return None
+
+    def _compile(
+        self, version: str, source: str, content_sha256: Optional[str], file_lexicons: Dict[str, List[str]]
+    ) -> LexiconSnapshot:
+        lexicons = {**self._builtin_lexicons, **{category: tuple(terms) for category, terms in file_lexicons.items()}}
+        return LexiconSnapshot(
+            version=version,
+            source=source,
+            content_sha256=content_sha256,
+            loaded_at=time.time(),
+            lexicons=MappingProxyType(lexicons),
+            matcher=KeywordMatcher(lexicons, version=version),
+        )
+
+    def _watch(self) -> None:
+        while not self._stop_watching.wait(self.reload_interval_seconds):
+            try:
+                self.reload_if_changed()
+            except Exception as e: # Never let the watcher die
+                logger.error("Lexicon watcher error.", extra={"error": str(e)})
+
+    def start_watching(self) -> None:
+        if self.reload_interval_seconds <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=self._watch, name="lexicon-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop_watching.set()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            **self.current().stats(),
+            "path": self.path,
+            "reload_interval_seconds": self.reload_interval_seconds,
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+        }
+
+
+lexicon_store = LexiconStore(settings.LEXICON_PATH or DEFAULT_LEXICON_PATH, settings.LEXICON_RELOAD_INTERVAL_SECONDS)
@@ -0,0 +1,320 @@
+import math
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.app.core.keyword_matcher import KeywordMatcher
+from backend.app.core.structured_logging import get_logger
+
+logger = get_logger(__name__)
+from backend.app.core.nlp_backend import (
+    CategoryScore,
+    NLPBackend,
+    classification_result_from_categories,
+    sentiment_result,
+)
+
+# --- Offline NLP engine (settings.NLP_BACKEND = "local") ---
+# Fast, dependency-light stand-ins for the GCP calls, for load tests and for running when GCP is
+# slow or over quota. Quality is below the cloud models; the output shapes are identical.
+#   - Sentiment: lexicon valences with negation/intensifier handling, scored with NumPy per batch.
+#   - Language ID: character trigram profiles compared by cosine similarity.
+#   - Categories: whole-word rules compiled into one KeywordMatcher.
+
+TOKEN_PATTERN = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?", re.UNICODE)
+
+# --- Sentiment lexicon (valence -4..+4, AFINN-style) ---
+SENTIMENT_LEXICON: Dict[str, float] = {
+    # Negative
+    "abuse": -3, "afraid": -2, "anger": -3, "angry": -3, "annihilate": -4, "attack": -3, "attacked": -3,
+    "awful": -3, "bad": -3, "betray": -3, "betrayed": -3, "bitter": -2, "blame": -2, "bloody": -3,
+    "bomb": -3, "brutal": -3, "burn": -2, "catastrophe": -3, "chaos": -2, "cheat": -3, "collapse": -2,
+    "condemn": -2, "corrupt": -3, "corruption": -3, "crisis": -3, "cruel": -3, "crush": -2, "danger": -2,
+    "dangerous": -2, "dead": -3, "death": -2, "deaths": -2, "deceive": -3, "destroy": -3, "destroyed": -3,
+    "destruction": -3, "die": -3, "disaster": -2, "disgrace": -2, "disgusting": -3, "enemy": -2,
+    "enemies": -2, "evil": -3, "exploit": -2, "exploitation": -2, "fail": -2, "failed": -2, "failure": -2,
+    "fake": -3, "fear": -2, "fight": -1, "fraud": -4, "furious": -3, "genocide": -4, "guilty": -3,
+    "hate": -3, "hatred": -3, "horrible": -3, "hostile": -2, "hurt": -2, "idiot": -3, "illegal": -3,
+    "injured": -2, "injustice": -2, "kill": -3, "killed": -3, "killing": -3, "killings": -3, "liar": -3,
+    "lie": -2, "lies": -2, "lying": -2, "massacre": -4, "murder": -4, "murdered": -4, "oppression": -2,
+    "outrage": -3, "pain": -2, "panic": -3, "poor": -2, "protest": -2, "rage": -2, "rape": -4,
+    "revenge": -2, "rigged": -3, "riot": -2, "ruin": -2, "sad": -2, "scam": -2, "scandal": -3,
+    "shame": -2, "slaughter": -4, "steal": -2, "stolen": -2, "suffer": -2, "suffering": -2,
+    "terrible": -3, "terror": -3, "terrorist": -3, "terrorists": -3, "thief": -2, "thieves": -2,
+    "threat": -2, "threaten": -2, "traitor": -3, "traitors": -3, "tragedy": -2, "ugly": -3,
+    "unfair": -2, "unrest": -2, "vicious": -2, "victim": -3, "victims": -3, "violence": -3,
+    "violent": -3, "war": -2, "weak": -2, "wicked": -2, "worst": -3, "worthless": -2, "wrong": -2,
+    # Positive
+    "agree": 1, "amazing": 4, "appreciate": 2, "best": 3, "better": 2, "blessed": 3, "brave": 2,
+    "calm": 2, "celebrate": 3, "ceasefire": 2, "cooperate": 2, "cooperation": 2, "courage": 2,
+    "dialogue": 1, "encourage": 2, "excellent": 3, "fair": 2, "free": 1, "freedom": 2, "friend": 1,
+    "friendly": 2, "glad": 3, "good": 3, "great": 3, "happy": 3, "harmony": 2, "help": 2, "helpful": 2,
+    "honest": 2, "hope": 2, "improve": 2, "justice": 2, "kind": 2, "love": 3, "peace": 2,
+    "peaceful": 2, "progress": 2, "protect": 1, "proud": 2, "reconcile": 2, "reconciliation": 2,
+    "relief": 1, "respect": 2, "safe": 1, "safety": 1, "secure": 2, "success": 2, "successful": 3,
+    "support": 2, "thank": 2, "thanks": 2, "together": 1, "trust": 1, "unity": 2, "welcome": 2,
+    "win": 4, "wonderful": 4,
+}
+NEGATION_TOKENS = {"not", "no", "never", "nobody", "nothing", "neither", "nor", "without", "hardly",
+                   "don't", "doesn't", "didn't", "isn't", "aren't", "wasn't", "weren't", "won't",
+                   "can't", "cannot", "couldn't", "shouldn't", "wouldn't"}
+INTENSIFIER_TOKENS = {"very": 1.5, "extremely": 1.8, "really": 1.3, "so": 1.3, "totally": 1.5,
+                      "completely": 1.5, "absolutely": 1.6, "deeply": 1.4, "utterly": 1.7}
+NEGATION_SCALAR = -0.74 # As in VADER: negation flips and dampens
+SENTIMENT_NORMALIZATION_ALPHA = 15.0 # score = total / sqrt(total^2 + alpha), in (-1, 1)
+MAGNITUDE_DIVISOR = 4.0 # Roughly aligns summed |valence| with the NL API magnitude scale
+
+
+class LexiconSentimentScorer:
+    def __init__(self, lexicon: Dict[str, float]):
+        # Token id 0 is "not in any table"; ids index the NumPy lookup tables below
+        vocabulary = set(lexicon) | NEGATION_TOKENS | set(INTENSIFIER_TOKENS)
+        self._token_ids: Dict[str, int] = {token: idx + 1 for idx, token in enumerate(sorted(vocabulary))}
+        size = len(self._token_ids) + 1
+        self._valence = np.zeros(size, dtype=np.float64)
+        self._is_negation = np.zeros(size, dtype=bool)
+        self._intensity = np.ones(size, dtype=np.float64)
+        for token, idx in self._token_ids.items():
+            self._valence[idx] = lexicon.get(token, 0.0)
+            self._is_negation[idx] = token in NEGATION_TOKENS
+            self._intensity[idx] = INTENSIFIER_TOKENS.get(token, 1.0)
+
+    def score_batch(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (scores in (-1, 1), magnitudes >= 0) for every text, in one vectorized pass."""
+        token_ids: List[int] = []
+        lengths = np.zeros(len(texts), dtype=np.int64)
+        lookup = self._token_ids.get
+        for position, text in enumerate(texts):
+            ids = [lookup(token, 0) for token in TOKEN_PATTERN.findall(text.lower().replace("’", "'"))]
+            lengths[position] = len(ids)
+            token_ids.extend(ids)
+        if not token_ids:
+            return np.zeros(len(texts)), np.zeros(len(texts))
+
+        ids = np.asarray(token_ids, dtype=np.int64)
+        valences = self._valence[ids]
+        # Each token's modifiers come from the one or two tokens before it, never across texts
+        first_token = np.zeros(len(ids), dtype=bool)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        first_token[starts[lengths > 0]] = True
+        second_token = np.zeros(len(ids), dtype=bool)
+        second_starts = starts[lengths > 1] + 1
+        second_token[second_starts] = True
+
+        previous_negation = np.zeros(len(ids), dtype=bool)
+        previous_negation[1:] = self._is_negation[ids[:-1]]
+        previous_negation &= ~first_token
+        two_back_negation = np.zeros(len(ids), dtype=bool)
+        two_back_negation[2:] = self._is_negation[ids[:-2]]
+        two_back_negation &= ~(first_token | second_token)
+        negated = previous_negation | two_back_negation
+
+        intensity = np.ones(len(ids))
+        intensity[1:] = self._intensity[ids[:-1]]
+        intensity[first_token] = 1.0
+
+        valences = valences * intensity * np.where(negated, NEGATION_SCALAR, 1.0)
+
+        totals = np.zeros(len(texts))
+        absolute_totals = np.zeros(len(texts))
+        non_empty = lengths > 0
+        totals[non_empty] = np.add.reduceat(valences, starts[non_empty])
+        absolute_totals[non_empty] = np.add.reduceat(np.abs(valences), starts[non_empty])
+        scores = totals / np.sqrt(totals * totals + SENTIMENT_NORMALIZATION_ALPHA)
+        return scores, absolute_totals / MAGNITUDE_DIVISOR
+
+
+# --- Language identification seed corpora ---
+# Short samples are enough for trigram profiles of the languages we see most; extend as needed.
+LANGUAGE_SEED_TEXTS: Dict[str, str] = {
+    "en": (
+        "The government said on Monday that the security situation in the north has improved, but residents "
+        "are still afraid to return to their homes. There is a lot of information being shared on social media "
+        "and people should check the facts before they share it with their friends and family. The president "
+        "will address the nation about the election and the economy this evening. We want peace and unity in "
+        "our communities, and everyone must work together to stop the spread of rumours and hate speech."
+    ),
+    "fr": (
+        "Le gouvernement a déclaré lundi que la situation sécuritaire dans le nord s'est améliorée, mais les "
+        "habitants ont encore peur de rentrer chez eux. Beaucoup d'informations sont partagées sur les réseaux "
+        "sociaux et les gens doivent vérifier les faits avant de les partager avec leurs amis et leur famille. "
+        "Le président s'adressera à la nation ce soir au sujet des élections et de l'économie. Nous voulons la "
+        "paix et l'unité dans nos communautés."
+    ),
+    "pt": (
+        "O governo disse na segunda-feira que a situação de segurança no norte melhorou, mas os moradores ainda "
+        "têm medo de voltar para suas casas. Muita informação está sendo compartilhada nas redes sociais e as "
+        "pessoas devem verificar os fatos antes de compartilhar com os amigos e a família. O presidente vai "
+        "falar à nação esta noite sobre as eleições e a economia. Queremos paz e união nas nossas comunidades."
+    ),
+    "es": (
+        "El gobierno dijo el lunes que la situación de seguridad en el norte ha mejorado, pero los residentes "
+        "todavía tienen miedo de volver a sus casas. Se comparte mucha información en las redes sociales y la "
+        "gente debe comprobar los hechos antes de compartirla con sus amigos y su familia. El presidente hablará "
+        "a la nación esta noche sobre las elecciones y la economía. Queremos paz y unidad en nuestras comunidades."
+    ),
+    "ha": (
+        "Gwamnati ta ce ranar Litinin cewa yanayin tsaro a arewa ya inganta, amma mazauna har yanzu suna jin "
+        "tsoron komawa gidajensu. Ana yada labarai da yawa a kafafen sada zumunta, kuma ya kamata mutane su "
+        "tabbatar da gaskiya kafin su raba wa abokansu da iyalansu. Shugaban kasa zai yi jawabi ga al'umma yau "
+        "da dare game da zabe da tattalin arziki. Muna son zaman lafiya da hadin kai a cikin al'ummominmu. "
+        "Allah ya kiyaye mu daga rikici da tashin hankali."
+    ),
+    "yo": (
+        "Ijoba so ni ojo Aje pe ipo aabo ni ariwa ti dara si, sugbon awon olugbe si n beru lati pada si ile won. "
+        "Opolopo iroyin ni won n pin lori ero ayelujara, o si ye ki awon eniyan se ayewo otito ki won to pin "
+        "fun awon ore ati ebi won. Aare orile ede yoo ba awon ara ilu soro ni ale oni nipa idibo ati oro aje. "
+        "A fe alaafia ati isokan ni agbegbe wa. Olorun yoo daabo bo wa lowo wahala ati rogbodiyan."
+    ),
+    "ig": (
+        "Gọọmentị kwuru na Mọnde na ọnọdụ nchekwa na mgbago ugwu akawanyela mma, mana ndị bi ebe ahụ ka na-atụ "
+        "egwu ịlaghachi n'ụlọ ha. A na-ekesa ọtụtụ ozi na soshal midia, ndị mmadụ kwesịrị inyocha eziokwu tupu "
+        "ha ekesaa ya ndị enyi na ezinụlọ ha. Onye isi ala ga-agwa mba ahụ okwu n'abalị a gbasara ntuli aka na "
+        "akụ na ụba. Anyị chọrọ udo na ịdị n'otu n'obodo anyị. Chukwu ga-echebe anyị pụọ na ọgbaaghara."
+    ),
+    "sw": (
+        "Serikali ilisema Jumatatu kwamba hali ya usalama kaskazini imeimarika, lakini wakazi bado wanaogopa "
+        "kurudi majumbani mwao. Habari nyingi zinasambazwa kwenye mitandao ya kijamii na watu wanapaswa "
+        "kuthibitisha ukweli kabla ya kuzishiriki na marafiki na familia zao. Rais atahutubia taifa jioni hii "
+        "kuhusu uchaguzi na uchumi. Tunataka amani na umoja katika jamii zetu. Mungu atulinde na vurugu."
+    ),
+    "ar": (
+        "قالت الحكومة يوم الاثنين إن الوضع الأمني في الشمال قد تحسن لكن السكان ما زالوا يخشون العودة إلى منازلهم. "
+        "يتم تداول الكثير من المعلومات على وسائل التواصل الاجتماعي ويجب على الناس التحقق من الحقائق قبل مشاركتها. "
+        "سيلقي الرئيس خطابا إلى الأمة هذا المساء حول الانتخابات والاقتصاد. نريد السلام والوحدة في مجتمعاتنا."
+    ),
+}
+LANGUAGE_ID_HASH_BUCKETS = 1 << 14
+LANGUAGE_ID_MIN_SIMILARITY = 0.12 # Below this the text is "undetermined" (None)
+LANGUAGE_ID_MIN_MARGIN = 0.02 # Best profile must beat the runner-up by at least this much
+
+
+def _trigram_buckets(text: str) -> List[int]:
+    # Padded word trigrams, hashed into a fixed number of buckets (hash() is stable within a process,
+    # and profiles and queries are always built in the same process)
+    mask = LANGUAGE_ID_HASH_BUCKETS - 1
+    buckets: List[int] = []
+    for word in TOKEN_PATTERN.findall(text.lower()):
+        padded = f" {word} "
+        buckets.extend(hash(padded[i:i + 3]) & mask for i in range(len(padded) - 2))
+    return buckets
+
+
+class TrigramLanguageIdentifier:
+    def __init__(self, seed_texts: Dict[str, str]):
+        self.languages = list(seed_texts)
+        profiles = np.zeros((len(self.languages), LANGUAGE_ID_HASH_BUCKETS), dtype=np.float64)
+        for row, language in enumerate(self.languages):
+            profiles[row] = np.bincount(_trigram_buckets(seed_texts[language]), minlength=LANGUAGE_ID_HASH_BUCKETS)
+        norms = np.linalg.norm(profiles, axis=1, keepdims=True)
+        self._profiles = profiles / np.where(norms == 0, 1.0, norms)
+
+    def identify_batch(self, texts: Sequence[str]) -> List[Optional[str]]:
+        if not texts:
+            return []
+        # Sparse per text: only the profile columns of the text's own trigram buckets are touched
+        similarities = np.zeros((len(texts), len(self.languages)), dtype=np.float64)
+        for row, text in enumerate(texts):
+            buckets = _trigram_buckets(text or "")
+            if buckets:
+                unique_buckets, counts = np.unique(np.asarray(buckets, dtype=np.int64), return_counts=True)
+                similarities[row] = (self._profiles[:, unique_buckets] @ counts) / np.linalg.norm(counts)
+
+        detected: List[Optional[str]] = []
+        for row in similarities:
+            if len(row) > 1:
+                runner_up, best = np.partition(row, -2)[-2:]
+            else:
+                runner_up, best = 0.0, row[0]
+            if best < LANGUAGE_ID_MIN_SIMILARITY or best - runner_up < LANGUAGE_ID_MIN_MARGIN:
+                detected.append(None)
+            else:
+                detected.append(self.languages[int(np.argmax(row))])
+        return detected
+
+
+# --- Rule-based content categories ---
+# Category paths follow the NL API taxonomy names used in text_misinfo_analyzer.CATEGORY_RISK_WEIGHTS.
+CATEGORY_RULES: Dict[str, List[str]] = {
+    "/Sensitive Subjects/War & Conflict": [
+        "war", "warfare", "armed conflict", "militia", "militias", "troops", "soldiers", "insurgents",
+        "insurgency", "rebels", "ceasefire", "bandits", "banditry", "airstrike", "airstrikes", "invasion",
+        "clashes", "frontline", "military offensive", "civil war",
+    ],
+    "/Sensitive Subjects/Terrorism": [
+        "terrorist", "terrorists", "terrorism", "boko haram", "iswap", "suicide bomber", "suicide bombing",
+        "bombing", "jihadist", "jihadists", "extremist", "extremists", "hostages", "beheaded", "ied",
+    ],
+    "/Sensitive Subjects/Firearms & Weapons": [
+        "gun", "guns", "gunmen", "rifle", "rifles", "ak-47", "weapons", "ammunition", "firearms", "machete",
+        "machetes", "explosives",
+    ],
+    "/Sensitive Subjects/Hate Speech": [
+        "vermin", "cockroaches", "subhuman", "exterminate", "inferior race", "parasites", "wipe them out",
+        "not human", "infidels", "savages",
+    ],
+    "/Sensitive Subjects/Violent Crime": [
+        "murder", "murdered", "killed", "killing", "kidnapped", "kidnapping", "abducted", "robbery",
+        "armed robbers", "assault", "lynched", "lynching", "massacre", "stabbed",
+    ],
+    "/Finance/Scams & Frauds": [
+        "scam", "scammers", "ponzi", "fraudsters", "419", "wire the money", "investment scheme", "double your money",
+    ],
+}
+CATEGORY_CONFIDENCE_PER_HIT = 0.6 # confidence = 1 - exp(-0.6 * hits): 1 hit ~0.45, 2 ~0.70, 3 ~0.83
+
+
+class RuleBasedCategoryClassifier:
+    def __init__(self, rules: Dict[str, List[str]]):
+        self._matcher = KeywordMatcher(rules)
+        self._categories = list(rules)
+
+    def classify(self, text: str) -> List[CategoryScore]:
+        scan = self._matcher.scan(text.lower())
+        scores = []
+        for category in self._categories:
+            hits = sum(scan.counts(category).values())
+            if hits:
+                confidence = 1.0 - math.exp(-CATEGORY_CONFIDENCE_PER_HIT * hits)
+                scores.append(CategoryScore(name=category, confidence=confidence))
+        return sorted(scores, key=lambda category: category.confidence, reverse=True)
+
+
+class LocalNLPBackend(NLPBackend):
+    name = "local"
+
+    def __init__(self):
+        self.sentiment_scorer = LexiconSentimentScorer(SENTIMENT_LEXICON)
+        self.language_identifier = TrigramLanguageIdentifier(LANGUAGE_SEED_TEXTS)
+        self.category_classifier = RuleBasedCategoryClassifier(CATEGORY_RULES)
+        logger.info(
+            "Local NLP engine initialized.",
+            extra={"lexicon_terms": len(SENTIMENT_LEXICON), "language_profiles": len(LANGUAGE_SEED_TEXTS), "category_rules": len(CATEGORY_RULES)}
+        )
+
+    def detect_language(self, text: str) -> Optional[str]:
+        if not text:
+            return None
+        return self.language_identifier.identify_batch([text])[0]
+
+    def detect_languages(self, texts: List[str]) -> List[Optional[str]]:
+        return self.language_identifier.identify_batch(texts)
+
+    def get_sentiment(self, text: str, language_code: Optional[str] = None) -> dict:
+        if not text:
+            return {"sentiment_label": "neutral", "sentiment_score": 0.0, "magnitude": 0.0, "error": "Input text is empty."}
+        return self.get_sentiments([text], language_code=language_code)[0]
+
+    def get_sentiments(self, texts: List[str], language_code: Optional[str] = None) -> List[dict]:
+        scores, magnitudes = self.sentiment_scorer.score_batch(texts)
+        languages = [language_code] * len(texts) if language_code else self.detect_languages(texts)
+        return [
+            sentiment_result(float(score), float(magnitude), language)
+            for score, magnitude, language in zip(scores, magnitudes, languages)
+        ]
+
+    def classify(self, text: str, language_code: Optional[str] = None) -> dict:
+        if not text:
+            return {"risk_categories": [], "explanation": "Input text is empty."}
+        return classification_result_from_categories(self.category_classifier.classify(text))
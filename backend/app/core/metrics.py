@@ -0,0 +1,95 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest
+from prometheus_client import multiprocess
+
+from backend.app.core import server_timing
+
+# --- Prometheus instrumentation ---
+# Counters and histograms only, so every metric aggregates correctly across gunicorn workers in
+# prometheus_client's multiprocess mode: set PROMETHEUS_MULTIPROC_DIR (see backend/gunicorn.conf.py)
+# and /metrics merges the per-worker files. Without it, /metrics reports this process only.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Local stage names; the GCP stages use the analyzer's ANALYSIS_STAGE_* names
+STAGE_KEYWORD_SCAN = "keyword_scan"
+STAGE_RISK_SCORING = "risk_scoring"
+STAGE_EWS_EVALUATION = "ews_evaluation"
+STAGE_AUDIO_PREPROCESSING = "audio_preprocessing"
+STAGE_STT = "stt"
+STAGE_TEXT_ANALYSIS = "text_analysis"
+
+STAGE_DURATION = Histogram(
+    "peaceguard_stage_duration_seconds", "Latency of one analysis stage.", ["stage"], buckets=LATENCY_BUCKETS
+)
+STAGE_DROPPED = Counter(
+    "peaceguard_stage_dropped_total", "Analysis stages dropped before finishing.", ["stage", "reason"]
+)
+GCP_CALLS = Counter(
+    "peaceguard_gcp_calls_total", "GCP RPCs by operation and outcome (success, error).", ["operation", "outcome"]
+)
+GCP_CALL_DURATION = Histogram(
+    "peaceguard_gcp_call_duration_seconds", "Latency of one GCP call including retries and hedges.", ["operation"],
+    buckets=LATENCY_BUCKETS
+)
+GCP_RETRIES = Counter("peaceguard_gcp_retries_total", "GCP call attempts retried.", ["operation"])
+GCP_HEDGES = Counter("peaceguard_gcp_hedges_total", "Hedged duplicate GCP requests sent.", ["operation"])
+CIRCUIT_BREAKER_REJECTIONS = Counter(
+    "peaceguard_circuit_breaker_rejections_total", "Calls failed fast by an open circuit breaker.", ["backend"]
+)
+NLP_CACHE_LOOKUPS = Counter(
+    "peaceguard_nlp_cache_lookups_total", "NLP response cache lookups by operation and result (hit, miss).", ["operation", "result"]
+)
+EWS_PATTERN_TRIGGERS = Counter(
+    "peaceguard_ews_pattern_triggers_total", "EWS alerts raised, by pattern.", ["pattern_id", "severity"]
+)
+ADMISSION_DECISIONS = Counter(
+    "peaceguard_admission_decisions_total", "Admission decisions by priority lane (admitted, rejected).", ["priority", "decision"]
+)
+LIVE_STREAM_SESSIONS = Counter(
+    "peaceguard_live_stream_sessions_total", "Live audio WebSocket sessions by outcome (completed, aborted, rejected, error).", ["outcome"]
+)
+LIVE_STREAM_BACKPRESSURE = Counter(
+    "peaceguard_live_stream_backpressure_total", "Times a live session's audio queue filled and the server paused reading the socket."
+)
+LIVE_STREAM_RISK_UPDATES_SKIPPED = Counter(
+    "peaceguard_live_stream_risk_updates_skipped_total", "Live risk updates superseded by newer transcript before they ran."
+)
+AUDIO_JOBS = Counter(
+    "peaceguard_audio_jobs_total", "Background audio jobs by event (submitted, resumed, completed, failed, cancelled).", ["event"]
+)
+STT_AUDIO_SECONDS = Counter(
+    "peaceguard_stt_audio_seconds_total", "Audio seconds received from clients and sent to STT after VAD, by path.", ["path", "direction"]
+)
+STT_AUDIO_BYTES = Counter(
+    "peaceguard_stt_audio_bytes_total", "Audio bytes received from clients and uploaded to STT after normalization, by path.", ["path", "direction"]
+)
+LOG_RECORDS_DROPPED = Counter(
+    "peaceguard_log_records_dropped_total", "Log records dropped because the log queue was full.", ["level"]
+)
+
+
+@contextmanager
+def time_stage(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    STAGE_DURATION.labels(stage).observe(seconds)
+    server_timing.record(stage, seconds) # No-op outside a Server-Timing route
+
+
+def render_latest() -> Tuple[bytes, str]:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
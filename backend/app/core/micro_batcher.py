@@ -0,0 +1,104 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from backend.app.core.deadline import Deadline, get_current_deadline, set_current_deadline
+
+# --- Async micro-batcher ---
+# Collects single-item requests that arrive within a short window (or until max_batch_size is
+# reached) and sends them to `batch_fn` as one call. Each caller gets back its own result.
+# `batch_fn` must return results in the same order as the items it received.
+# Batch tasks are kept in a set until they finish: the event loop only holds tasks weakly, and a
+# collected batch would leave its callers waiting forever.
+# A batch is flushed from whichever caller's context filled it or armed its timer, so `batch_fn` is run
+# under the longest deadline among its items (none if any item has none), never the flushing caller's.
+# Each caller waits for its own result only within its own deadline.
+
+
+class AsyncMicroBatcher:
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int,
+        max_wait_seconds: float
+    ):
+        self.name = name
+        self._batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_seconds)
+        self._pending: List[Tuple[Any, "asyncio.Future[Any]", Optional[Deadline]]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._batch_tasks: Set["asyncio.Task[None]"] = set()
+        self.items_submitted = 0
+        self.batches_sent = 0
+        self.largest_batch = 0
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Pending state belongs to one event loop (one per worker in production)
+            self._pending = []
+            self._flush_handle = None
+            self._loop = loop
+
+        future: "asyncio.Future[Any]" = loop.create_future()
+        deadline = get_current_deadline()
+        self._pending.append((item, future, deadline))
+        self.items_submitted += 1
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_seconds, self._flush)
+        if deadline is None:
+            return await future
+        # Leaving early cancels only this caller's future; the batch still answers the others
+        return await asyncio.wait_for(future, timeout=deadline.remaining())
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self.batches_sent += 1
+            self.largest_batch = max(self.largest_batch, len(batch))
+            task = asyncio.ensure_future(self._run_batch(batch, _longest_deadline(batch)))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Any, "asyncio.Future[Any]", Optional[Deadline]]], deadline: Optional[Deadline]) -> None:
+        set_current_deadline(deadline) # The task runs in its own copy of the context
+        try:
+            results = await self._batch_fn([item for item, _, _ in batch])
+        except BaseException as e: # Including cancellation: no caller may be left waiting
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e if isinstance(e, Exception) else RuntimeError(f"{self.name} batch was cancelled."))
+            if not isinstance(e, Exception):
+                raise
+            return
+        for (_, future, _), result in zip(batch, results):
+            if not future.done(): # Caller may have been cancelled
+                future.set_result(result)
+        for _, future, _ in batch[len(results):]:
+            if not future.done():
+                future.set_exception(RuntimeError(f"{self.name} batch returned {len(results)} results for {len(batch)} items."))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            "items_submitted": self.items_submitted,
+            "batches_sent": self.batches_sent,
+            "average_batch_size": round(self.items_submitted / self.batches_sent, 2) if self.batches_sent else 0.0,
+            "largest_batch": self.largest_batch,
+        }
+
+
+def _longest_deadline(batch: List[Tuple[Any, "asyncio.Future[Any]", Optional[Deadline]]]) -> Optional[Deadline]:
+    deadlines = [deadline for _, _, deadline in batch]
+    if any(deadline is None for deadline in deadlines):
+        return None
+    return max(deadlines, key=lambda deadline: deadline.expires_at)
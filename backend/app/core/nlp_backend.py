@@ -0,0 +1,100 @@
+from typing import Iterable, List, NamedTuple, Optional
+
+# --- NLP backend interface ---
+# Text analysis needs three things from an NLP engine: language detection, document sentiment and
+# content categories. Each backend returns the same dict shapes as the original GCP functions in
+# nlp_utils, so the analyzer and the Pydantic outputs do not care which engine produced them.
+# The backend is chosen per deployment with settings.NLP_BACKEND (see nlp_utils.get_nlp_backend).
+
+POSITIVE_SENTIMENT_LABEL_THRESHOLD = 0.25
+NEGATIVE_SENTIMENT_LABEL_THRESHOLD = -0.25
+RISKY_CATEGORY_PATH_KEYWORDS = ["/Sensitive Subjects", "/Adult", "/Violence", "/Hate Speech", "/Profanity", "/Derogatory", "/War & Conflict", "/Terrorism"]
+RISKY_CATEGORY_MIN_CONFIDENCE = 0.3
+
+
+class CategoryScore(NamedTuple):
+    # Same attribute names as the GCP ClassificationCategory proto
+    name: str
+    confidence: float
+
+
+def sentiment_label_for_score(score: float) -> str:
+    if score > POSITIVE_SENTIMENT_LABEL_THRESHOLD: return "positive"
+    if score < NEGATIVE_SENTIMENT_LABEL_THRESHOLD: return "negative"
+    return "neutral"
+
+
+def sentiment_result(score: float, magnitude: float, detected_language: Optional[str]) -> dict:
+    return {
+        "sentiment_label": sentiment_label_for_score(score),
+        "sentiment_score": round(score, 4),
+        "magnitude": round(magnitude, 4),
+        "detected_language_by_nlp_api": detected_language
+    }
+
+
+def classification_result_from_categories(categories: Iterable) -> dict:
+    """Keeps only risky categories above the confidence floor; `categories` items need .name and .confidence."""
+    found_risk_categories = []
+    explanation_parts = []
+    categories = list(categories)
+    if not categories:
+        explanation_parts.append("No content categories returned by the API.")
+    for category_proto in categories:
+        category_name = category_proto.name
+        confidence = round(category_proto.confidence, 4)
+        is_risky = any(keyword.lower() in category_name.lower() for keyword in RISKY_CATEGORY_PATH_KEYWORDS) # case-insensitive check
+        if is_risky and confidence > RISKY_CATEGORY_MIN_CONFIDENCE:
+            found_risk_categories.append({"category": category_name, "confidence": confidence})
+            explanation_parts.append(f"Identified '{category_name}' (conf: {confidence*100:.1f}%)")
+    if not found_risk_categories and not explanation_parts:
+         explanation_parts.append("No predefined high-risk categories detected with sufficient confidence.")
+    return {
+        "risk_categories": found_risk_categories,
+        "explanation": ". ".join(explanation_parts) if explanation_parts else "Content classification performed."
+    }
+
+
+class NLPBackend:
+    """
+    Base class for NLP engines. Subclasses implement the sync methods; the async methods default to
+    calling them inline, which is right for in-process engines. Remote backends override the async
+    methods to run off the event loop.
+    """
+    name = "base"
+
+    def detect_language(self, text: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def detect_languages(self, texts: List[str]) -> List[Optional[str]]:
+        return [self.detect_language(text) for text in texts]
+
+    def get_sentiment(self, text: str, language_code: Optional[str] = None) -> dict:
+        raise NotImplementedError
+
+    def classify(self, text: str, language_code: Optional[str] = None) -> dict:
+        raise NotImplementedError
+
+    def annotate(self, text: str, language_code: Optional[str] = None) -> dict:
+        # {"language_code", "sentiment", "classification"} - same shape as nlp_utils.annotate_text_gcp_sync
+        sentiment = self.get_sentiment(text, language_code=language_code)
+        return {
+            "language_code": language_code or sentiment.get("detected_language_by_nlp_api"),
+            "sentiment": sentiment,
+            "classification": self.classify(text, language_code=language_code)
+        }
+
+    async def detect_language_async(self, text: str) -> Optional[str]:
+        return self.detect_language(text)
+
+    async def detect_languages_async(self, texts: List[str]) -> List[Optional[str]]:
+        return self.detect_languages(texts)
+
+    async def get_sentiment_async(self, text: str, language_code: Optional[str] = None) -> dict:
+        return self.get_sentiment(text, language_code=language_code)
+
+    async def classify_async(self, text: str, language_code: Optional[str] = None) -> dict:
+        return self.classify(text, language_code=language_code)
+
+    async def annotate_async(self, text: str, language_code: Optional[str] = None) -> dict:
+        return self.annotate(text, language_code=language_code)
@@ -0,0 +1,109 @@
+import copy
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from backend.app.config import settings
+from backend.app.core import metrics
+
+# --- In-process cache for Google Cloud NLP responses ---
+# Viral messages are re-submitted many times; caching the successful GCP results by a hash of the
+# normalized text (plus the effective language code) saves the Translate/Language round-trips.
+# Callers must only `put` successful results - error results are never cached.
+
+_MISSING = object()
+
+
+def normalize_text_for_cache(text: str) -> str:
+    # Unicode NFC + collapsed whitespace: trivially different copies of a message share an entry
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def make_cache_key(operation: str, text: str, language_code: Optional[str]) -> str:
+    payload = f"{operation}\x00{language_code or ''}\x00{normalize_text_for_cache(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry TTL and hit/miss/eviction counters."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+nlp_response_cache = TTLCache(
+    max_entries=settings.NLP_CACHE_MAX_ENTRIES if settings.NLP_CACHE_ENABLED else 0,
+    ttl_seconds=settings.NLP_CACHE_TTL_SECONDS
+)
+
+
+def get_cached(operation: str, text: str, language_code: Optional[str]) -> Any:
+    """Returns the cached value, or the module's _MISSING sentinel (compare with `is_missing`)."""
+    if not settings.NLP_CACHE_ENABLED:
+        return _MISSING
+    value = nlp_response_cache.get(make_cache_key(operation, text, language_code), _MISSING)
+    metrics.NLP_CACHE_LOOKUPS.labels(operation, "miss" if value is _MISSING else "hit").inc()
+    return value
+
+
+def is_missing(value: Any) -> bool:
+    return value is _MISSING
+
+
+def put_cached(operation: str, text: str, language_code: Optional[str], value: Any) -> None:
+    if settings.NLP_CACHE_ENABLED:
+        nlp_response_cache.put(make_cache_key(operation, text, language_code), value)
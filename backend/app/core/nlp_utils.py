@@ -1,110 +1,396 @@
 from google.cloud import language_v2
+from google.cloud.language_v2.services.language_service.transports import LanguageServiceGrpcTransport
 from google.cloud import translate_v2 as translate
 import json
 import os
+import threading
+from typing import List
 from google.oauth2 import service_account # Added for loading creds from env var
+from backend.app.core.gcp_executor import run_in_gcp_executor
+from backend.app.core import nlp_cache
+from backend.app.core.deadline import rpc_timeout
+from backend.app.core.circuit_breaker import language_breaker, translate_breaker
+from backend.app.core.gcp_call_policy import call_with_policy
+from backend.app.core.gcp_channels import (
+    bound_http_timeouts_by_deadline, configure_http_connection_pool, create_grpc_client_pool, language_bulkhead,
+    translate_bulkhead
+)
+from backend.app.core.micro_batcher import AsyncMicroBatcher
+from backend.app.config import settings
+from backend.app.core.structured_logging import get_logger
+from backend.app.core.nlp_backend import NLPBackend, classification_result_from_categories, sentiment_result
 
-# --- Modified Google Cloud Client Initialization ---
-gcp_sa_key_content = os.getenv("GCP_SA_KEY_JSON_CONTENT")
-gcp_credentials = None
+logger = get_logger(__name__)
 
-if gcp_sa_key_content:
-    try:
-        credentials_info = json.loads(gcp_sa_key_content)
-        gcp_credentials = service_account.Credentials.from_service_account_info(credentials_info)
-        print("INFO:     NLP Utils: Loaded GCP credentials from GCP_SA_KEY_JSON_CONTENT env var.")
-    except Exception as e:
-        print(f"ERROR:    NLP Utils: Failed to load GCP credentials from ENV content: {e}. Falling back to default.")
-# If gcp_credentials is None, the libraries will try Application Default Credentials (ADC)
-# which includes GOOGLE_APPLICATION_CREDENTIALS file path for local dev.
-
-try:
-    language_client = language_v2.LanguageServiceClient(credentials=gcp_credentials) if gcp_credentials else language_v2.LanguageServiceClient()
-    translate_client = translate.Client(credentials=gcp_credentials) if gcp_credentials else translate.Client()
-    if not gcp_credentials and not os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
-        print("WARNING:  NLP Utils: Neither GCP_SA_KEY_JSON_CONTENT nor GOOGLE_APPLICATION_CREDENTIALS seem to be set for default client init.")
-    print("INFO:     NLP Utils: Google Cloud Language and Translate clients initialized.")
-except Exception as e:
-    print(f"ERROR:    NLP Utils: Failed to initialize Google Cloud clients: {e}.")
-    language_client = None
-    translate_client = None
-# --- End of Modified Initialization ---
+# --- Lazy Google Cloud Client Initialization ---
+# Clients are built on first use, or by the warm-up step at startup (see core/startup.py), instead of
+# at import: resolving credentials and creating channels made every worker's cold start slow.
+_gcp_clients_lock = threading.Lock()
+_gcp_clients_initialized = False
+_language_client = None
+_translate_client = None
+
+def _load_gcp_credentials():
+    gcp_sa_key_content = os.getenv("GCP_SA_KEY_JSON_CONTENT")
+    if gcp_sa_key_content:
+        try:
+            credentials_info = json.loads(gcp_sa_key_content)
+            credentials = service_account.Credentials.from_service_account_info(credentials_info)
+            logger.info("Loaded GCP credentials from GCP_SA_KEY_JSON_CONTENT env var.")
+            return credentials
+        except Exception as e:
+            logger.error("Failed to load GCP credentials from ENV content; falling back to default.", extra={"error": str(e)})
+    # None makes the libraries use Application Default Credentials (ADC), which includes the
+    # GOOGLE_APPLICATION_CREDENTIALS file path for local dev.
+    return None
+
+def init_gcp_clients() -> None:
+    global _gcp_clients_initialized, _language_client, _translate_client
+    if _gcp_clients_initialized:
+        return
+    with _gcp_clients_lock:
+        if _gcp_clients_initialized:
+            return
+        gcp_credentials = _load_gcp_credentials()
+        try:
+            # Pool of Language clients on keepalive-configured channels (see gcp_channels); used like one client
+            _language_client = create_grpc_client_pool(
+                "gcp_language", language_v2.LanguageServiceClient, LanguageServiceGrpcTransport,
+                gcp_credentials, settings.GCP_LANGUAGE_CHANNEL_POOL_SIZE
+            )
+            _translate_client = translate.Client(credentials=gcp_credentials) if gcp_credentials else translate.Client()
+            configure_http_connection_pool("gcp_translate_http", _translate_client._http, settings.GCP_TRANSLATE_HTTP_POOL_MAXSIZE)
+            bound_http_timeouts_by_deadline(_translate_client._http)
+            if not gcp_credentials and not os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
+                logger.warning("Neither GCP_SA_KEY_JSON_CONTENT nor GOOGLE_APPLICATION_CREDENTIALS seem to be set for default client init.")
+            logger.info("Google Cloud Language and Translate clients initialized.")
+        except Exception as e:
+            logger.error("Failed to initialize Google Cloud clients.", extra={"error": str(e)})
+            _language_client = None
+            _translate_client = None
+        _gcp_clients_initialized = True
+
+def get_language_client():
+    init_gcp_clients()
+    return _language_client
+
+def get_translate_client():
+    init_gcp_clients()
+    return _translate_client
+# --- End of Lazy Initialization ---
 
 def detect_language_gcp_sync(text: str) -> str | None:
+    translate_client = get_translate_client()
     if not translate_client:
-        print("ERROR:    NLP Utils: Google Translate client not initialized.")
+        logger.error("Google Translate client not initialized.")
         return "error_client_init"
     if not text:
         return None
+    cached = nlp_cache.get_cached("detect_language", text, None)
+    if not nlp_cache.is_missing(cached):
+        return cached
+    translate_breaker.check()
     try:
-        result = translate_client.detect_language(text)
-        return result['language'] if result and 'language' in result else None
+        # No timeout argument on the v2 client: the session bounds it by the request deadline (init_gcp_clients)
+        result = call_with_policy("detect_language", lambda: translate_client.detect_language(text), bulkhead=translate_bulkhead)
+        translate_breaker.record_success()
+        detected = result['language'] if result and 'language' in result else None
+        nlp_cache.put_cached("detect_language", text, None, detected)
+        return detected
     except Exception as e:
-        print(f"ERROR:    NLP Utils: Google Cloud language detection error: {e}")
+        translate_breaker.record_result(e)
+        logger.error("GCP call failed.", extra={"operation": "detect_language", "error": str(e)})
         return "error_detection"
 
+# Translate's detect_language accepts a list of values; keep each RPC to a modest size
+TRANSLATE_DETECT_MAX_BATCH_SIZE = 100
+
+def detect_languages_gcp_sync(texts: List[str]) -> List[str | None]:
+    """
+    Detects the language of many texts with one Translate RPC per TRANSLATE_DETECT_MAX_BATCH_SIZE texts.
+    Raises CircuitOpenError when a batch is due and the Translate breaker is open; batches already
+    detected by then are cached.
+    """
+    translate_client = get_translate_client()
+    if not translate_client:
+        logger.error("Google Translate client not initialized.")
+        return ["error_client_init"] * len(texts)
+    detected: List[str | None] = [None] * len(texts)
+    indexed_texts = []
+    for idx, text in enumerate(texts):
+        if not text:
+            continue
+        cached = nlp_cache.get_cached("detect_language", text, None)
+        if nlp_cache.is_missing(cached):
+            indexed_texts.append((idx, text))
+        else:
+            detected[idx] = cached
+    for batch_start in range(0, len(indexed_texts), TRANSLATE_DETECT_MAX_BATCH_SIZE):
+        batch = indexed_texts[batch_start:batch_start + TRANSLATE_DETECT_MAX_BATCH_SIZE]
+        translate_breaker.check() # One admission per RPC, matching the one outcome recorded for it
+        try:
+            results = call_with_policy(
+                "detect_language", lambda: translate_client.detect_language([text for _, text in batch]), bulkhead=translate_bulkhead
+            )
+            translate_breaker.record_success()
+            for (idx, text), result in zip(batch, results):
+                detected[idx] = result['language'] if result and 'language' in result else None
+                nlp_cache.put_cached("detect_language", text, None, detected[idx])
+        except Exception as e:
+            translate_breaker.record_result(e)
+            logger.error("GCP call failed.", extra={"operation": "detect_language_batch", "error": str(e)})
+            for idx, _ in batch:
+                detected[idx] = "error_detection"
+    return detected
+
 def get_sentiment_gcp_sync(text: str, language_code: str = None) -> dict:
+    language_client = get_language_client()
     if not language_client:
-        print("ERROR:    NLP Utils: Google Natural Language client not initialized.")
+        logger.error("Google Natural Language client not initialized.")
         return {"sentiment_label": "unavailable", "sentiment_score": 0.0, "magnitude": 0.0, "error": "Language client not initialized."}
     if not text:
         return {"sentiment_label": "neutral", "sentiment_score": 0.0, "magnitude": 0.0, "error": "Input text is empty."}
 
     doc_type = language_v2.types.Document.Type.PLAIN_TEXT
     effective_language_code = language_code if language_code and "error" not in language_code else None
+    cached = nlp_cache.get_cached("analyze_sentiment", text, effective_language_code)
+    if not nlp_cache.is_missing(cached):
+        return cached
     document = language_v2.types.Document(
         content=text, type_=doc_type, language_code=effective_language_code
     )
+    language_breaker.check()
     try:
-        response = language_client.analyze_sentiment(document=document)
-        sentiment = response.document_sentiment
-        sentiment_label = "neutral"
-        if sentiment.score > 0.25: sentiment_label = "positive"
-        elif sentiment.score < -0.25: sentiment_label = "negative"
-        detected_lang_from_sentiment = response.language_code if response.language_code else None
-        return {
-            "sentiment_label": sentiment_label,
-            "sentiment_score": round(sentiment.score, 4),
-            "magnitude": round(sentiment.magnitude, 4),
-            "detected_language_by_nlp_api": detected_lang_from_sentiment
-        }
+        response = call_with_policy(
+            "analyze_sentiment", lambda: language_client.analyze_sentiment(document=document, timeout=rpc_timeout(), retry=None),
+            bulkhead=language_bulkhead
+        )
+        language_breaker.record_success()
+        sentiment_result = _sentiment_result_from_response(response)
+        nlp_cache.put_cached("analyze_sentiment", text, effective_language_code, sentiment_result)
+        return sentiment_result
     except Exception as e:
-        print(f"ERROR:    NLP Utils: Google Cloud sentiment analysis error: {e}")
+        language_breaker.record_result(e)
+        logger.error("GCP call failed.", extra={"operation": "analyze_sentiment", "error": str(e)})
         return {"sentiment_label": "error", "sentiment_score": 0.0, "magnitude": 0.0, "details": str(e)}
 
 def get_content_categories_gcp_sync(text: str, language_code: str = None) -> dict:
+    language_client = get_language_client()
     if not language_client:
-        print("ERROR:    NLP Utils: Google Natural Language client not initialized.")
+        logger.error("Google Natural Language client not initialized.")
         return {"risk_categories": [], "explanation": "Language client not initialized."}
     if not text:
          return {"risk_categories": [], "explanation": "Input text is empty."}
 
     effective_language_code = language_code if language_code and "error" not in language_code else None
+    cached = nlp_cache.get_cached("classify_text", text, effective_language_code)
+    if not nlp_cache.is_missing(cached):
+        return cached
     document = language_v2.types.Document(
         content=text, type_=language_v2.types.Document.Type.PLAIN_TEXT, language_code=effective_language_code
     )
-    found_risk_categories = []
-    explanation_parts = []
+    language_breaker.check()
     try:
-        response = language_client.classify_text(document=document)
-        if not response.categories:
-            explanation_parts.append("No content categories returned by the API.")
-        for category_proto in response.categories:
-            category_name = category_proto.name
-            confidence = round(category_proto.confidence, 4)
-            risky_keywords_in_category_path = ["/Sensitive Subjects", "/Adult", "/Violence", "/Hate Speech", "/Profanity", "/Derogatory", "/War & Conflict", "/Terrorism"]
-            is_risky = any(keyword.lower() in category_name.lower() for keyword in risky_keywords_in_category_path) # case-insensitive check
-            if is_risky and confidence > 0.3:
-                found_risk_categories.append({"category": category_name, "confidence": confidence})
-                explanation_parts.append(f"Identified '{category_name}' (conf: {confidence*100:.1f}%)")
-        if not found_risk_categories and not explanation_parts:
-             explanation_parts.append("No predefined high-risk categories detected with sufficient confidence.")
+        response = call_with_policy(
+            "classify_text", lambda: language_client.classify_text(document=document, timeout=rpc_timeout(), retry=None),
+            bulkhead=language_bulkhead
+        )
+        language_breaker.record_success()
+        classification_result = classification_result_from_categories(response.categories)
+        nlp_cache.put_cached("classify_text", text, effective_language_code, classification_result)
+        return classification_result
+    except Exception as e:
+        language_breaker.record_result(e)
+        logger.error("GCP call failed.", extra={"operation": "classify_text", "error": str(e)})
+        return _classification_error_result(e)
+
+# --- Response shaping shared by the separate and combined (annotate_text) calls ---
+def _sentiment_result_from_response(response) -> dict:
+    sentiment = response.document_sentiment
+    detected_lang_from_sentiment = response.language_code if response.language_code else None
+    return sentiment_result(sentiment.score, sentiment.magnitude, detected_lang_from_sentiment)
+
+def _is_unsupported_language_error(e: Exception) -> bool:
+    return "Unsupported language" in str(e) or "Invalid language code" in str(e)
+
+def _classification_error_result(e: Exception) -> dict:
+    if _is_unsupported_language_error(e):
+         return {"risk_categories": [{"category": "error_unsupported_language", "confidence": 0.0}], "explanation": f"Content classification not supported: {str(e)}"}
+    return {"risk_categories": [{"category": "error_classification", "confidence": 0.0}], "explanation": str(e)}
+
+# --- Combined analysis (settings.NLP_ANALYSIS_MODE == "annotate") ---
+NLP_ANALYSIS_MODE_SEPARATE = "separate" # analyze_sentiment + classify_text (+ Translate detection)
+NLP_ANALYSIS_MODE_ANNOTATE = "annotate" # One annotate_text call; language taken from the NL response
+
+def use_annotate_mode() -> bool:
+    return settings.NLP_ANALYSIS_MODE == NLP_ANALYSIS_MODE_ANNOTATE
+
+def annotate_text_gcp_sync(text: str, language_code: str = None) -> dict:
+    """
+    Sentiment and classification in one annotate_text RPC. Returns
+    {"language_code": ..., "sentiment": <get_sentiment_gcp_sync shape>, "classification": <get_content_categories_gcp_sync shape>}.
+    Without a language_code the NL API detects the language itself, so no Translate call is needed.
+    """
+    effective_language_code = language_code if language_code and "error" not in language_code else None
+    language_client = get_language_client()
+    if not language_client or not text:
+        sentiment_result = get_sentiment_gcp_sync(text, language_code=effective_language_code)
         return {
-            "risk_categories": found_risk_categories, 
-            "explanation": ". ".join(explanation_parts) if explanation_parts else "Content classification performed."
+            "language_code": effective_language_code,
+            "sentiment": sentiment_result,
+            "classification": get_content_categories_gcp_sync(text, language_code=effective_language_code)
         }
+
+    cached_sentiment = nlp_cache.get_cached("analyze_sentiment", text, effective_language_code)
+    cached_classification = nlp_cache.get_cached("classify_text", text, effective_language_code)
+    if not nlp_cache.is_missing(cached_sentiment) and not nlp_cache.is_missing(cached_classification):
+        return {
+            "language_code": cached_sentiment.get("detected_language_by_nlp_api") or effective_language_code,
+            "sentiment": cached_sentiment,
+            "classification": cached_classification
+        }
+
+    document = language_v2.types.Document(
+        content=text, type_=language_v2.types.Document.Type.PLAIN_TEXT, language_code=effective_language_code
+    )
+    features = language_v2.types.AnnotateTextRequest.Features(
+        extract_document_sentiment=True, classify_text=True
+    )
+    language_breaker.check()
+    try:
+        response = call_with_policy(
+            "annotate_text", lambda: language_client.annotate_text(document=document, features=features, timeout=rpc_timeout(), retry=None),
+            bulkhead=language_bulkhead
+        )
+        language_breaker.record_success()
     except Exception as e:
-        print(f"ERROR:    NLP Utils: Google Cloud content categorization error: {e}")
-        if "Unsupported language" in str(e) or "Invalid language code" in str(e):
-             return {"risk_categories": [{"category": "error_unsupported_language", "confidence": 0.0}], "explanation": f"Content classification not supported: {str(e)}"}
-        return {"risk_categories": [{"category": "error_classification", "confidence": 0.0}], "explanation": str(e)}
\ No newline at end of file
+        language_breaker.record_result(e)
+        logger.error("GCP call failed.", extra={"operation": "annotate_text", "error": str(e)})
+        if _is_unsupported_language_error(e):
+            # Classification supports fewer languages than sentiment; keep the sentiment result
+            sentiment_result = get_sentiment_gcp_sync(text, language_code=effective_language_code)
+            return {
+                "language_code": sentiment_result.get("detected_language_by_nlp_api") or effective_language_code,
+                "sentiment": sentiment_result,
+                "classification": _classification_error_result(e)
+            }
+        return {
+            "language_code": effective_language_code,
+            "sentiment": {"sentiment_label": "error", "sentiment_score": 0.0, "magnitude": 0.0, "details": str(e)},
+            "classification": _classification_error_result(e)
+        }
+
+    sentiment_result = _sentiment_result_from_response(response)
+    classification_result = classification_result_from_categories(response.categories)
+    nlp_cache.put_cached("analyze_sentiment", text, effective_language_code, sentiment_result)
+    nlp_cache.put_cached("classify_text", text, effective_language_code, classification_result)
+    return {
+        "language_code": response.language_code or effective_language_code,
+        "sentiment": sentiment_result,
+        "classification": classification_result
+    }
+
+# Every GCP function above checks its backend's circuit breaker after the cache lookup (cached
+# results are still served during an outage) and raises CircuitOpenError while the breaker is open.
+# The RPCs themselves go through call_with_policy (retries, and hedging for the NL reads).
+
+# --- Async variants ---
+# The Google clients are blocking, so these run the sync functions on the bounded GCP executor.
+# Awaiting several of them with asyncio.gather issues the RPCs concurrently.
+async def detect_languages_gcp(texts: List[str]) -> List[str | None]:
+    return await run_in_gcp_executor(detect_languages_gcp_sync, texts)
+
+# Detection requests arriving within LANGUAGE_DETECTION_BATCH_WINDOW_MS share one Translate RPC
+language_detection_batcher = AsyncMicroBatcher(
+    name="translate_detect_language",
+    batch_fn=detect_languages_gcp,
+    max_batch_size=min(settings.LANGUAGE_DETECTION_BATCH_MAX_SIZE, TRANSLATE_DETECT_MAX_BATCH_SIZE),
+    max_wait_seconds=settings.LANGUAGE_DETECTION_BATCH_WINDOW_MS / 1000.0
+)
+
+async def detect_language_gcp(text: str) -> str | None:
+    if not settings.LANGUAGE_DETECTION_BATCHING_ENABLED or not text:
+        return await run_in_gcp_executor(detect_language_gcp_sync, text)
+    cached = nlp_cache.get_cached("detect_language", text, None)
+    if not nlp_cache.is_missing(cached):
+        return cached # Do not wait out the batching window for a cache hit
+    return await language_detection_batcher.submit(text)
+
+async def get_sentiment_gcp(text: str, language_code: str = None) -> dict:
+    return await run_in_gcp_executor(get_sentiment_gcp_sync, text, language_code=language_code)
+
+async def get_content_categories_gcp(text: str, language_code: str = None) -> dict:
+    return await run_in_gcp_executor(get_content_categories_gcp_sync, text, language_code=language_code)
+
+
+async def annotate_text_gcp(text: str, language_code: str = None) -> dict:
+    return await run_in_gcp_executor(annotate_text_gcp_sync, text, language_code=language_code)
+
+
+# --- Backend selection (settings.NLP_BACKEND) ---
+NLP_BACKEND_GCP = "gcp"
+NLP_BACKEND_LOCAL = "local"
+
+class GCPNLPBackend(NLPBackend):
+    """Google Translate + Cloud Natural Language, with caching, micro-batching and the GCP executor."""
+    name = NLP_BACKEND_GCP
+
+    def detect_language(self, text: str) -> str | None:
+        return detect_language_gcp_sync(text)
+
+    def detect_languages(self, texts: List[str]) -> List[str | None]:
+        return detect_languages_gcp_sync(texts)
+
+    def get_sentiment(self, text: str, language_code: str = None) -> dict:
+        return get_sentiment_gcp_sync(text, language_code=language_code)
+
+    def classify(self, text: str, language_code: str = None) -> dict:
+        return get_content_categories_gcp_sync(text, language_code=language_code)
+
+    def annotate(self, text: str, language_code: str = None) -> dict:
+        return annotate_text_gcp_sync(text, language_code=language_code)
+
+    async def detect_language_async(self, text: str) -> str | None:
+        return await detect_language_gcp(text)
+
+    async def detect_languages_async(self, texts: List[str]) -> List[str | None]:
+        return await detect_languages_gcp(texts)
+
+    async def get_sentiment_async(self, text: str, language_code: str = None) -> dict:
+        return await get_sentiment_gcp(text, language_code=language_code)
+
+    async def classify_async(self, text: str, language_code: str = None) -> dict:
+        return await get_content_categories_gcp(text, language_code=language_code)
+
+    async def annotate_async(self, text: str, language_code: str = None) -> dict:
+        return await annotate_text_gcp(text, language_code=language_code)
+
+_nlp_backends = {}
+
+def get_nlp_backend(name: str = None) -> NLPBackend:
+    backend_name = (name or settings.NLP_BACKEND).lower()
+    if backend_name not in _nlp_backends:
+        if backend_name == NLP_BACKEND_GCP:
+            _nlp_backends[backend_name] = GCPNLPBackend()
+        elif backend_name == NLP_BACKEND_LOCAL:
+            from backend.app.core.local_nlp_engine import LocalNLPBackend # Only loaded when selected
+            _nlp_backends[backend_name] = LocalNLPBackend()
+        else:
+            raise ValueError(f"Unknown NLP_BACKEND '{backend_name}'. Expected '{NLP_BACKEND_GCP}' or '{NLP_BACKEND_LOCAL}'.")
+    return _nlp_backends[backend_name]
+
+# Backend-neutral entry points used by the text analysis service
+async def detect_language(text: str) -> str | None:
+    return await get_nlp_backend().detect_language_async(text)
+
+async def detect_languages(texts: List[str]) -> List[str | None]:
+    return await get_nlp_backend().detect_languages_async(texts)
+
+async def get_sentiment(text: str, language_code: str = None) -> dict:
+    return await get_nlp_backend().get_sentiment_async(text, language_code=language_code)
+
+async def classify(text: str, language_code: str = None) -> dict:
+    return await get_nlp_backend().classify_async(text, language_code=language_code)
+
+async def annotate(text: str, language_code: str = None) -> dict:
+    return await get_nlp_backend().annotate_async(text, language_code=language_code)
@@ -1,14 +1,27 @@
 from typing import List
+from backend.app.core.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Recipients are personal data: logs carry only the last 4 characters of an ID or phone number,
+# and message bodies only at DEBUG
+def _mask_recipient(recipient: str) -> str:
+    recipient = recipient or ""
+    return "*" * max(0, len(recipient) - 4) + recipient[-4:]
+
+def _log_sent(text: str, channel: str, recipient: str, message: str) -> None:
+    logger.info(text, extra={"channel": channel, "recipient": _mask_recipient(recipient), "message_chars": len(message or "")})
+    logger.debug("Mock message body.", extra={"channel": channel, "sms_message": message})
 
 class NotificationClient:
     def __init__(self):
         # In a real scenario, initialize SMS gateway clients (Twilio, Africa's Talking, etc.)
         # For now, we'll just mock.
-        print("NotificationClient initialized (Mock Mode).")
+        logger.debug("NotificationClient initialized (Mock Mode).") # Runs at import; DEBUG keeps imports quiet
 
     def send_sms_alert(self, phone_number: str, message: str) -> dict:
         # TODO: Integrate with a real SMS gateway
-        print(f"MOCK SMS to {phone_number}: {message}")
+        _log_sent("MOCK SMS sent.", "sms", phone_number, message)
         # Simulate success or failure
         if phone_number and message: # Basic check
             return {"status": "success", "message_id": "mock_sms_id_12345", "details": f"Mock SMS sent to {phone_number}."}
@@ -25,12 +38,12 @@ class NotificationClient:
 
     def send_whatsapp_alert(self, recipient_id: str, message: str) -> dict:
         # TODO: Integrate with WhatsApp Business API
-        print(f"MOCK WhatsApp to {recipient_id}: {message}")
+        _log_sent("MOCK WhatsApp sent.", "whatsapp", recipient_id, message)
         return {"status": "success", "message_id": "mock_whatsapp_id_67890", "details": "Mock WhatsApp sent."}
 
     def post_to_twitter_dm(self, user_id: str, message: str) -> dict:
         # TODO: Integrate with Twitter API
-        print(f"MOCK Twitter DM to {user_id}: {message}")
+        _log_sent("MOCK Twitter DM sent.", "twitter_dm", user_id, message)
         return {"status": "success", "message_id": "mock_twitter_id_13579", "details": "Mock Twitter DM sent."}
 
 # Instantiate a client for use in services
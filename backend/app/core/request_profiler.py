@@ -0,0 +1,143 @@
+import cProfile
+import io
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from typing import Any, Dict, List, Optional
+
+from backend.app.config import settings
+from backend.app.core.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+# --- Opt-in per-request profiling ---
+# A request carrying `X-Debug-Profile: cpu` or `X-Debug-Profile: memory` on a timed route is profiled
+# when PROFILING_ENABLED is set and the request is sampled (PROFILING_SAMPLE_RATE). The result is
+# stored under PROFILING_STORAGE_DIR and downloadable from /debug/profiles/{profile_id}; the id is
+# returned in the X-Debug-Profile-Id response header. Requests without the header never touch this
+# module.
+# Both profilers are process-wide (cProfile hooks the event-loop thread, tracemalloc every
+# allocation), so only one request is profiled at a time; overlapping requests are skipped. The
+# cProfile output covers work on the event-loop thread, including other requests interleaved with
+# this one; time spent in GCP executor threads appears as awaiting.
+
+PROFILE_MODE_CPU = "cpu"
+PROFILE_MODE_MEMORY = "memory"
+PROFILE_MODES = (PROFILE_MODE_CPU, PROFILE_MODE_MEMORY)
+PROFILE_FILE_EXTENSIONS = {PROFILE_MODE_CPU: ".prof", PROFILE_MODE_MEMORY: ".txt"}
+TRACEMALLOC_FRAMES = 10
+TRACEMALLOC_TOP_STATS = 50
+
+_profiling_lock = threading.Lock()
+
+
+class RequestProfile:
+    def __init__(self, mode: str, label: str):
+        self.mode = mode
+        self.label = label
+        self.profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{mode}-{uuid.uuid4().hex[:8]}"
+        self._profiler: Optional[cProfile.Profile] = None
+        self._snapshot_before: Optional[tracemalloc.Snapshot] = None
+        self._started_tracemalloc = False
+
+    def start(self) -> None:
+        if self.mode == PROFILE_MODE_CPU:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                self._started_tracemalloc = True
+            self._snapshot_before = tracemalloc.take_snapshot()
+
+    def stop_and_store(self) -> str:
+        os.makedirs(settings.PROFILING_STORAGE_DIR, exist_ok=True)
+        path = os.path.join(settings.PROFILING_STORAGE_DIR, self.profile_id + PROFILE_FILE_EXTENSIONS[self.mode])
+        if self.mode == PROFILE_MODE_CPU:
+            self._profiler.disable()
+            self._profiler.dump_stats(path) # Open with pstats / snakeviz
+        else:
+            snapshot_after = tracemalloc.take_snapshot()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            top_stats = snapshot_after.compare_to(self._snapshot_before, "lineno")
+            report = io.StringIO()
+            report.write(f"tracemalloc allocation diff for {self.label}\n")
+            for stat in top_stats[:TRACEMALLOC_TOP_STATS]:
+                report.write(f"{stat}\n")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(report.getvalue())
+        _prune_stored_profiles()
+        return self.profile_id
+
+
+def maybe_start_profile(mode: Optional[str], label: str) -> Optional[RequestProfile]:
+    """Starts a profile for this request, or returns None (disabled, not sampled, unknown mode, busy)."""
+    if not mode or not settings.PROFILING_ENABLED:
+        return None
+    mode = mode.strip().lower()
+    if mode not in PROFILE_MODES or random.random() >= settings.PROFILING_SAMPLE_RATE:
+        return None
+    if not _profiling_lock.acquire(blocking=False):
+        return None # Another request is being profiled
+    profile = RequestProfile(mode, label)
+    try:
+        profile.start()
+    except Exception:
+        _profiling_lock.release()
+        raise
+    return profile
+
+
+def finish_profile(profile: RequestProfile) -> Optional[str]:
+    try:
+        return profile.stop_and_store()
+    except Exception as e:
+        logger.error("Failed to store request profile.", extra={"profile_id": profile.profile_id, "error": str(e)})
+        return None
+    finally:
+        _profiling_lock.release()
+
+
+def _stored_profile_paths() -> List[str]:
+    if not os.path.isdir(settings.PROFILING_STORAGE_DIR):
+        return []
+    paths = [os.path.join(settings.PROFILING_STORAGE_DIR, name) for name in os.listdir(settings.PROFILING_STORAGE_DIR)]
+    return sorted((p for p in paths if p.endswith(tuple(PROFILE_FILE_EXTENSIONS.values()))), key=os.path.getmtime)
+
+
+def _prune_stored_profiles() -> None:
+    paths = _stored_profile_paths()
+    for path in paths[:max(0, len(paths) - settings.PROFILING_MAX_STORED)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    return [
+        {"profile_id": os.path.splitext(os.path.basename(path))[0], "size_bytes": os.path.getsize(path), "created": os.path.getmtime(path)}
+        for path in reversed(_stored_profile_paths())
+    ]
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    if os.path.basename(profile_id) != profile_id:
+        return None # No path traversal
+    for extension in PROFILE_FILE_EXTENSIONS.values():
+        path = os.path.join(settings.PROFILING_STORAGE_DIR, profile_id + extension)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def pstats_summary(path: str, limit: int = 40) -> str:
+    # Human-readable view of a stored cProfile file
+    output = io.StringIO()
+    pstats.Stats(path, stream=output).sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
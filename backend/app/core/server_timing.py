@@ -0,0 +1,91 @@
+import contextvars
+import time
+from typing import Dict, List, Optional, Tuple
+
+# --- Per-request stage timings (Server-Timing header) ---
+# While a request to one of the timed routes is running, every stage measured through
+# metrics.time_stage / metrics.observe_stage is also added to the request's RequestTimings, and
+# ServerTimingMiddleware writes them out as `Server-Timing: stage;dur=<ms>, ..., total;dur=<ms>`.
+# The collector travels in a context variable, so stages running in asyncio tasks or on the GCP
+# executor threads (which copy the context) are attributed to the request that started them.
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: List[Tuple[str, float]] = [] # list.append is atomic, safe from executor threads
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages.append((stage, seconds))
+
+    def header_value(self) -> str:
+        # Repeated stages (e.g. several GCP calls of one kind) are summed, in order of first appearance
+        totals: Dict[str, float] = {}
+        for stage, seconds in self.stages:
+            totals[stage] = totals.get(stage, 0.0) + seconds
+        total_seconds = time.perf_counter() - self.started
+        entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items()]
+        entries.append(f"total;dur={total_seconds * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current_timings: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("request_timings", default=None)
+
+
+def record(stage: str, seconds: float) -> None:
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+def start_request_timings() -> Tuple[RequestTimings, contextvars.Token]:
+    timings = RequestTimings()
+    return timings, _current_timings.set(timings)
+
+
+def reset_request_timings(token: contextvars.Token) -> None:
+    _current_timings.reset(token)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware adding `Server-Timing` to responses of the given paths, and running the opt-in
+    request profiler for requests that ask for it. Other paths pass straight through.
+    """
+
+    def __init__(self, app, paths, enabled: bool = True):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        from backend.app.core import request_profiler # Only needed on the timed routes
+
+        profile_mode = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-debug-profile":
+                profile_mode = value.decode("latin-1")
+                break
+        profile = request_profiler.maybe_start_profile(profile_mode, scope["path"]) if profile_mode else None
+        timings, token = start_request_timings()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                if self.enabled:
+                    headers.append((b"server-timing", timings.header_value().encode("latin-1")))
+                if profile is not None:
+                    headers.append((b"x-debug-profile-id", profile.profile_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            reset_request_timings(token)
+            if profile is not None:
+                request_profiler.finish_profile(profile)
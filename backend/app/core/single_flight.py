@@ -0,0 +1,42 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+# --- Single-flight request coalescing ---
+# Concurrent calls with the same key share one in-flight computation: the first caller starts it,
+# later callers await the same task and receive the same result (or exception). The shared task is
+# shielded, so a disconnecting caller does not cancel the work for everyone else.
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[str, "asyncio.Task[Any]"] = {}
+        self.executions = 0 # Calls that started a computation
+        self.coalesced = 0 # Calls that joined an in-flight computation
+
+    async def do(self, key: str, work: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(work())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda finished, key=key: self._forget(key, finished))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, finished: "asyncio.Task[Any]") -> None:
+        if self._in_flight.get(key) is finished:
+            del self._in_flight[key]
+        if not finished.cancelled():
+            finished.exception() # Mark retrieved so an unawaited failure is not logged as "never retrieved"
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.executions + self.coalesced
+        return {
+            "name": self.name,
+            "in_flight": len(self._in_flight),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / calls, 4) if calls else 0.0,
+        }
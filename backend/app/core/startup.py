@@ -0,0 +1,153 @@
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+from backend.app.config import settings
+from backend.app.core.gcp_executor import run_in_gcp_executor
+from backend.app.core.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+# --- Startup: warm-up, readiness and cold-start timing ---
+# Importing the app no longer builds GCP clients. The FastAPI lifespan starts warm_up() in the
+# background instead: it builds the NLP backend and Speech clients, connects their gRPC channels and
+# compiles the keyword matchers, so the first real request pays none of that. /ready reports 503
+# until warm-up has finished, letting the load balancer hold traffic back from a cold worker.
+# Warm-up failures (e.g. GCP unreachable) are logged but still end in "ready": the circuit breakers
+# and degraded mode handle an unavailable backend at request time.
+
+
+def _process_age_seconds() -> float:
+    # Seconds since this process started (a gunicorn worker: since its fork), from /proc on Linux
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime_seconds = float(f.read().split()[0])
+        return max(0.0, uptime_seconds - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return 0.0 # Not available: timings are measured from when this module was imported
+
+
+class StartupState:
+    def __init__(self):
+        self.process_started = time.monotonic() - _process_age_seconds()
+        self.app_loaded_seconds: Optional[float] = None
+        self.warm_up_seconds: Optional[float] = None
+        self.ready_seconds: Optional[float] = None
+        self.first_request_seconds: Optional[float] = None
+        self.warm_up_steps: Dict[str, Dict[str, Any]] = {}
+        self.ready = False
+
+    def since_process_start(self) -> float:
+        return time.monotonic() - self.process_started
+
+    def mark_app_loaded(self) -> None:
+        self.app_loaded_seconds = self.since_process_start()
+
+    def mark_ready(self) -> None:
+        self.ready_seconds = self.since_process_start()
+        self.ready = True
+        logger.info(
+            "Worker ready.",
+            extra={"app_loaded_seconds": _rounded(self.app_loaded_seconds), "warm_up_seconds": _rounded(self.warm_up_seconds), "ready_seconds": _rounded(self.ready_seconds)}
+        )
+
+    def mark_first_request(self) -> None:
+        self.first_request_seconds = self.since_process_start()
+        logger.info("First request served.", extra={"time_to_first_request_seconds": _rounded(self.first_request_seconds)})
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "app_loaded_seconds": _rounded(self.app_loaded_seconds),
+            "warm_up_seconds": _rounded(self.warm_up_seconds),
+            "ready_seconds": _rounded(self.ready_seconds),
+            "time_to_first_request_seconds": _rounded(self.first_request_seconds),
+            "warm_up_steps": self.warm_up_steps,
+        }
+
+
+def _rounded(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds, 3) if seconds is not None else None
+
+
+startup_state = StartupState()
+
+
+# --- Warm-up steps (blocking; run on the GCP executor) ---
+
+def _compile_keyword_matchers() -> None:
+    from backend.app.services import early_warning_service, text_misinfo_analyzer
+    text_misinfo_analyzer.get_keyword_matcher() # Loads the lexicon file and builds the first snapshot
+    early_warning_service.warm_up_keyword_matchers()
+
+
+def _init_nlp_backend() -> None:
+    from backend.app.core import nlp_utils
+    backend = nlp_utils.get_nlp_backend()
+    if backend.name == nlp_utils.NLP_BACKEND_GCP:
+        nlp_utils.init_gcp_clients()
+        language_client = nlp_utils.get_language_client()
+        if language_client is not None:
+            language_client.prime_channels(settings.WARM_UP_CHANNEL_TIMEOUT_SECONDS)
+
+
+def _init_speech_client() -> None:
+    from backend.app.core import stt_client
+    speech_client = stt_client.get_speech_client()
+    if speech_client is not None:
+        speech_client.prime_channels(settings.WARM_UP_CHANNEL_TIMEOUT_SECONDS)
+
+
+def _import_audio_resampler() -> None:
+    import scipy.signal # Imported lazily by audio_normalization.resample; load it before the first upload
+
+
+WARM_UP_STEPS: Dict[str, Callable[[], None]] = {
+    "keyword_matchers": _compile_keyword_matchers,
+    "nlp_backend": _init_nlp_backend,
+    "speech_client": _init_speech_client,
+    "audio_resampler": _import_audio_resampler,
+}
+
+
+async def _run_warm_up_step(step_name: str, step: Callable[[], None]) -> None:
+    step_started = time.monotonic()
+    try:
+        await run_in_gcp_executor(step)
+        outcome = "ok"
+    except Exception as e:
+        outcome = "error"
+        logger.warning("Warm-up step failed.", extra={"step": step_name, "error": str(e)})
+    startup_state.warm_up_steps[step_name] = {"outcome": outcome, "seconds": round(time.monotonic() - step_started, 3)}
+
+
+async def warm_up() -> None:
+    # The steps are independent; run them side by side
+    started = time.monotonic()
+    await asyncio.gather(*(_run_warm_up_step(step_name, step) for step_name, step in WARM_UP_STEPS.items()))
+    startup_state.warm_up_seconds = time.monotonic() - started
+    startup_state.mark_ready()
+
+
+class FirstRequestTimerMiddleware:
+    """
+    ASGI middleware recording when this worker finished its first HTTP request (time-to-first-request).
+    Probe and scrape paths (`ignored_paths`) do not count.
+    """
+
+    def __init__(self, app, ignored_paths=()):
+        self.app = app
+        self.ignored_paths = frozenset(ignored_paths)
+
+    async def __call__(self, scope, receive, send):
+        if startup_state.first_request_seconds is not None or scope["type"] != "http" or scope["path"] in self.ignored_paths:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if startup_state.first_request_seconds is None:
+                startup_state.mark_first_request()
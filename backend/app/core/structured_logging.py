@@ -0,0 +1,220 @@
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from backend.app.config import settings
+from backend.app.core import metrics
+
+# --- Queue-backed structured logging ---
+# Application loggers (everything under the "backend" package) hand records to a bounded in-memory
+# queue; a single listener thread formats them and writes to stdout. Request coroutines and the GCP
+# executor threads never block on I/O to log: when the queue is full the record is dropped and
+# counted instead.
+# Each record carries the request's correlation id (X-Request-ID, set by CorrelationIdMiddleware) and
+# any `extra=` fields. INFO/DEBUG records logged with `extra={"sampled": True}` are high-volume
+# per-request events and are kept with probability LOG_INFO_SAMPLE_RATE.
+# Importing a module only attaches a placeholder handler; the queue and listener thread are set up
+# by the first record that is actually emitted (or by configure_logging()).
+
+APP_LOGGER_NAME = "backend"
+CORRELATION_ID_HEADER = b"x-request-id"
+MAX_CORRELATION_ID_LENGTH = 128
+
+_correlation_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("correlation_id", default=None)
+
+# Attributes every LogRecord has; anything else on a record came from `extra=`
+_STANDARD_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "correlation_id", "sampled"}
+
+_configure_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["NonBlockingQueueHandler"] = None
+_bootstrap_handler: Optional[logging.Handler] = None
+
+
+def get_correlation_id() -> Optional[str]:
+    return _correlation_id.get()
+
+
+def set_correlation_id(correlation_id: Optional[str]) -> contextvars.Token:
+    return _correlation_id.set(correlation_id)
+
+
+def reset_correlation_id(token: contextvars.Token) -> None:
+    _correlation_id.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Runs in the caller's thread, before queueing: stamps the correlation id and applies INFO sampling."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "sampled", False) and record.levelno <= logging.INFO:
+            if random.random() >= settings.LOG_INFO_SAMPLE_RATE:
+                return False
+        record.correlation_id = _correlation_id.get()
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback now (args may be mutated later), but leave the
+        # structured formatting to the listener thread
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.LOG_RECORDS_DROPPED.labels(record.levelname).inc()
+
+
+class JSONLogFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "correlation_id", None):
+            entry["correlation_id"] = record.correlation_id
+        for key, value in vars(record).items():
+            if key not in _STANDARD_RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextLogFormatter(logging.Formatter):
+    # Same look as uvicorn's own lines, for local development (LOG_FORMAT=text)
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"{record.levelname + ':':<10}{record.name}: {record.getMessage()}"
+        fields = {key: value for key, value in vars(record).items() if key not in _STANDARD_RECORD_ATTRIBUTES}
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if getattr(record, "correlation_id", None):
+            line += f" [{record.correlation_id}]"
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class _StartListenerOnFirstRecord(logging.Handler):
+    def emit(self, record: logging.LogRecord) -> None:
+        configure_logging() # Swaps this handler for the queue handler
+        _queue_handler.handle(record)
+
+
+def _start_listener() -> None:
+    global _listener, _queue_handler
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=settings.LOG_QUEUE_MAXSIZE)
+    output_handler = logging.StreamHandler(sys.stdout)
+    output_handler.setFormatter(TextLogFormatter() if settings.LOG_FORMAT == "text" else JSONLogFormatter())
+
+    app_logger = logging.getLogger(APP_LOGGER_NAME)
+    if _queue_handler is not None:
+        app_logger.removeHandler(_queue_handler)
+    if _bootstrap_handler is not None:
+        app_logger.removeHandler(_bootstrap_handler)
+    _queue_handler = NonBlockingQueueHandler(log_queue)
+    _queue_handler.addFilter(ContextFilter())
+    app_logger.addHandler(_queue_handler)
+    app_logger.setLevel(settings.LOG_LEVEL.upper())
+    app_logger.propagate = False
+
+    _listener = QueueListener(log_queue, output_handler, respect_handler_level=False)
+    _listener.start()
+
+
+def _restart_listener_after_fork() -> None:
+    # The listener thread does not survive fork (gunicorn --preload); give each worker its own
+    if _listener is not None:
+        _start_listener()
+
+
+def configure_logging() -> None:
+    if _listener is not None:
+        return
+    with _configure_lock:
+        if _listener is not None:
+            return
+        _start_listener()
+        os.register_at_fork(after_in_child=_restart_listener_after_fork)
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    # Writes out whatever is still queued
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _install_bootstrap_handler() -> None:
+    global _bootstrap_handler
+    if _bootstrap_handler is not None or _listener is not None:
+        return
+    with _configure_lock:
+        if _bootstrap_handler is not None or _listener is not None:
+            return
+        app_logger = logging.getLogger(APP_LOGGER_NAME)
+        _bootstrap_handler = _StartListenerOnFirstRecord()
+        app_logger.addHandler(_bootstrap_handler)
+        app_logger.setLevel(settings.LOG_LEVEL.upper()) # Records below it never start the listener
+        app_logger.propagate = False
+
+
+def get_logger(name: str) -> logging.Logger:
+    _install_bootstrap_handler()
+    return logging.getLogger(name)
+
+
+class CorrelationIdMiddleware:
+    """
+    ASGI middleware binding each HTTP request to a correlation id: the client's X-Request-ID when
+    sent, otherwise a new one. The id is echoed back in the X-Request-ID response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        correlation_id = None
+        for name, value in scope.get("headers", ()):
+            if name == CORRELATION_ID_HEADER:
+                correlation_id = value.decode("latin-1")[:MAX_CORRELATION_ID_LENGTH]
+                break
+        correlation_id = correlation_id or uuid.uuid4().hex
+        encoded_id = correlation_id.encode("latin-1")
+
+        async def send_with_correlation_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", ()), (CORRELATION_ID_HEADER, encoded_id)]}
+            await send(message)
+
+        token = set_correlation_id(correlation_id)
+        try:
+            await self.app(scope, receive, send_with_correlation_id)
+        finally:
+            reset_correlation_id(token)
@@ -1,32 +1,70 @@
 from google.cloud import speech
-from typing import Optional, List
+from typing import Iterable, Iterator, Optional, List
 import time # Kept if any timing/polling logic remains, but not essential for current sync version
 import os # For os.getenv
 import json # For parsing JSON string
+import threading
 from google.oauth2 import service_account # Added for loading creds from env var
+from backend.app.core.gcp_executor import run_in_stt_executor
+from backend.app.core.deadline import rpc_timeout
+from backend.app.core.circuit_breaker import speech_breaker
+from backend.app.core.gcp_call_policy import call_with_policy
+from backend.app.core.gcp_channels import create_grpc_client_pool, speech_bulkhead
+from backend.app.config import settings
+from backend.app.core import metrics
+from backend.app.core.structured_logging import get_logger
+from google.cloud.speech_v1.services.speech.transports import SpeechGrpcTransport
 
-# --- Modified Google Cloud Client Initialization ---
-gcp_sa_key_content_stt = os.getenv("GCP_SA_KEY_JSON_CONTENT")
-gcp_credentials_stt = None
+logger = get_logger(__name__)
 
-if gcp_sa_key_content_stt:
-    try:
-        credentials_info_stt = json.loads(gcp_sa_key_content_stt)
-        gcp_credentials_stt = service_account.Credentials.from_service_account_info(credentials_info_stt)
-        print("INFO:     STT Client: Loaded GCP credentials from GCP_SA_KEY_JSON_CONTENT env var.")
-    except Exception as e:
-        print(f"ERROR:    STT Client: Failed to load GCP credentials from ENV content: {e}. Falling back to default.")
+# --- Lazy Google Cloud Client Initialization ---
+# Built on first use or by the startup warm-up (see core/startup.py), not at import.
+_speech_client_lock = threading.Lock()
+_speech_client_initialized = False
+_speech_client = None
+
+def _load_gcp_credentials_stt():
+    gcp_sa_key_content_stt = os.getenv("GCP_SA_KEY_JSON_CONTENT")
+    if gcp_sa_key_content_stt:
+        try:
+            credentials_info_stt = json.loads(gcp_sa_key_content_stt)
+            credentials = service_account.Credentials.from_service_account_info(credentials_info_stt)
+            logger.info("Loaded GCP credentials from GCP_SA_KEY_JSON_CONTENT env var.")
+            return credentials
+        except Exception as e:
+            logger.error("Failed to load GCP credentials from ENV content; falling back to default.", extra={"error": str(e)})
+    return None
 
-try:
-    speech_client = speech.SpeechClient(credentials=gcp_credentials_stt) if gcp_credentials_stt else speech.SpeechClient()
-    if not gcp_credentials_stt and not os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
-        print("WARNING:  STT Client: Neither GCP_SA_KEY_JSON_CONTENT nor GOOGLE_APPLICATION_CREDENTIALS seem to be set for default client init.")
-    print("INFO:     STT Client: Google Cloud Speech client initialized.")
-except Exception as e:
-    print(f"ERROR:    STT Client: Failed to initialize Google Cloud Speech client: {e}.")
-    speech_client = None
-# --- End of Modified Initialization ---
+def init_speech_client() -> None:
+    global _speech_client_initialized, _speech_client
+    if _speech_client_initialized:
+        return
+    with _speech_client_lock:
+        if _speech_client_initialized:
+            return
+        gcp_credentials_stt = _load_gcp_credentials_stt()
+        try:
+            # Pool of Speech clients on keepalive-configured channels (see gcp_channels); used like one client
+            _speech_client = create_grpc_client_pool(
+                "gcp_speech", speech.SpeechClient, SpeechGrpcTransport, gcp_credentials_stt, settings.GCP_SPEECH_CHANNEL_POOL_SIZE
+            )
+            if not gcp_credentials_stt and not os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
+                logger.warning("Neither GCP_SA_KEY_JSON_CONTENT nor GOOGLE_APPLICATION_CREDENTIALS seem to be set for default client init.")
+            logger.info("Google Cloud Speech client initialized.")
+        except Exception as e:
+            logger.error("Failed to initialize Google Cloud Speech client.", extra={"error": str(e)})
+            _speech_client = None
+        _speech_client_initialized = True
 
+def get_speech_client():
+    init_speech_client()
+    return _speech_client
+# --- End of Lazy Initialization ---
+
+
+def _speech_unavailable_result(language_code: str) -> dict:
+    # Speech breaker open: fail fast instead of waiting out the outage (there is no transcript to degrade to)
+    return {"transcript": None, "confidence": 0.0, "error": "Speech-to-Text temporarily unavailable (circuit breaker open).", "detected_language_code": language_code}
 
 def transcribe_audio_gcp_long_running(
     audio_content: bytes, 
@@ -35,8 +73,9 @@ def transcribe_audio_gcp_long_running(
     audio_channel_count: int = 1,
     operation_timeout_seconds: int = 360
 ) -> dict:
+    speech_client = get_speech_client()
     if not speech_client:
-        print("ERROR:    STT Client: Speech client not initialized for long_running.")
+        logger.error("Speech client not initialized.", extra={"mode": "long_running"})
         return {"transcript": None, "confidence": 0.0, "error": "Speech client not initialized."}
     if not audio_content:
         return {"transcript": None, "confidence": 0.0, "error": "Audio content is empty."}
@@ -48,15 +87,22 @@ def transcribe_audio_gcp_long_running(
         "audio_channel_count": audio_channel_count,
     }
     if sample_rate_hertz: config_params["sample_rate_hertz"] = sample_rate_hertz
-    else: print("WARNING:  STT Client: sample_rate_hertz not provided for long_running STT.")
+    else: logger.debug("sample_rate_hertz not provided; GCP will infer it.", extra={"mode": "long_running"})
     config = speech.RecognitionConfig(**config_params)
 
+    if not speech_breaker.allow_request():
+        metrics.CIRCUIT_BREAKER_REJECTIONS.labels(speech_breaker.name).inc()
+        return _speech_unavailable_result(language_code)
     try:
-        print(f"INFO:     STT Client: Sending audio to GCP STT (long_running) with config: {config_params}")
-        operation = speech_client.long_running_recognize(config=config, audio=audio)
-        print(f"INFO:     STT Client: Waiting for STT operation (up to {operation_timeout_seconds}s): {operation.operation.name}")
-        response = operation.result(timeout=operation_timeout_seconds)
-        print("INFO:     STT Client: Long-running STT Operation completed.")
+        logger.debug("Sending audio to GCP STT.", extra={"mode": "long_running", "config": config_params})
+        operation = call_with_policy(
+            "long_running_recognize", lambda: speech_client.long_running_recognize(config=config, audio=audio, timeout=rpc_timeout(), retry=None),
+            bulkhead=speech_bulkhead
+        )
+        logger.info("Waiting for STT operation.", extra={"operation": operation.operation.name, "timeout_seconds": operation_timeout_seconds, "sampled": True})
+        response = operation.result(timeout=rpc_timeout(default=operation_timeout_seconds))
+        speech_breaker.record_success()
+        logger.info("Long-running STT operation completed.", extra={"sampled": True})
 
         all_transcripts: List[str] = []
         total_confidence = 0.0
@@ -81,15 +127,18 @@ def transcribe_audio_gcp_long_running(
         else:
             return {"transcript": None, "confidence": 0.0, "error": "No transcription results in long-running operation.", "detected_language_code": language_code}
     except TimeoutError:
-        print(f"ERROR:    STT Client: STT (long_running) timed out after {operation_timeout_seconds} seconds.")
+        speech_breaker.record_failure()
+        logger.error("STT timed out.", extra={"mode": "long_running", "timeout_seconds": operation_timeout_seconds})
         return {"transcript": None, "confidence": 0.0, "error": f"Transcription timed out after {operation_timeout_seconds}s."}
     except Exception as e:
-        print(f"ERROR:    STT Client: STT (long_running) error: {e}")
+        speech_breaker.record_result(e)
+        logger.error("STT failed.", extra={"mode": "long_running", "error": str(e)})
         return {"transcript": None, "confidence": 0.0, "error": str(e)}
 
 def transcribe_audio_gcp_sync(audio_content: bytes, language_code: str = "en-US", sample_rate_hertz: Optional[int] = None) -> dict:
+    speech_client = get_speech_client()
     if not speech_client:
-        print("ERROR:    STT Client: Speech client not initialized for sync.")
+        logger.error("Speech client not initialized.", extra={"mode": "sync"})
         return {"transcript": None, "confidence": 0.0, "error": "Speech client not initialized."}
     if not audio_content:
         return {"transcript": None, "confidence": 0.0, "error": "Audio content is empty."}
@@ -97,15 +146,21 @@ def transcribe_audio_gcp_sync(audio_content: bytes, language_code: str = "en-US"
     audio = speech.RecognitionAudio(content=audio_content)
     config_params = { "language_code": language_code, "enable_automatic_punctuation": True }
     if sample_rate_hertz: config_params["sample_rate_hertz"] = sample_rate_hertz
-    else: print("WARNING:  STT Client: sample_rate_hertz not provided for sync STT.")
+    else: logger.debug("sample_rate_hertz not provided; GCP will infer it.", extra={"mode": "sync"})
     config = speech.RecognitionConfig(**config_params)
 
+    if not speech_breaker.allow_request():
+        metrics.CIRCUIT_BREAKER_REJECTIONS.labels(speech_breaker.name).inc()
+        return _speech_unavailable_result(language_code)
     try:
-        print(f"INFO:     STT Client: Sending audio to GCP STT (sync) with config: {config_params}")
-        response = speech_client.recognize(config=config, audio=audio)
+        logger.debug("Sending audio to GCP STT.", extra={"mode": "sync", "config": config_params})
+        response = call_with_policy(
+            "recognize", lambda: speech_client.recognize(config=config, audio=audio, timeout=rpc_timeout(), retry=None),
+            bulkhead=speech_bulkhead
+        )
+        speech_breaker.record_success()
         result_language_code = language_code 
         if response.results and response.results[0].alternatives:
-            alt = response.results[0].alternatives[0]
             # For RecognizeResponse, language_code is not typically on results[0] but on RecognizeResponse if auto-detected
             # For simplicity, if language_code was passed, we assume it's that.
             # If auto-detection was forced by not passing language_code to config, then check response.results[0].language_code (if available)
@@ -114,9 +169,97 @@ def transcribe_audio_gcp_sync(audio_content: bytes, language_code: str = "en-US"
             if hasattr(response, 'results') and len(response.results) > 0 and hasattr(response.results[0], 'language_code') and response.results[0].language_code:
                  result_language_code = response.results[0].language_code # More robust if available
 
-            return {"transcript": alt.transcript, "confidence": round(alt.confidence, 4) if alt.confidence else 0.0, "detected_language_code": result_language_code, "error": None}
+            # Audio up to a minute long comes back as several consecutive results, one per stretch of speech
+            alternatives = [result.alternatives[0] for result in response.results if result.alternatives]
+            confidences = [alt.confidence for alt in alternatives if alt.confidence]
+            transcript = " ".join(alt.transcript.strip() for alt in alternatives).strip()
+            confidence = round(sum(confidences) / len(confidences), 4) if confidences else 0.0
+            return {"transcript": transcript or None, "confidence": confidence, "detected_language_code": result_language_code, "error": None}
         else:
             return {"transcript": None, "confidence": 0.0, "error": "No transcription result (sync).", "detected_language_code": language_code}
     except Exception as e:
-        print(f"ERROR:    STT Client: STT (sync) error: {e}")
-        return {"transcript": None, "confidence": 0.0, "error": str(e)}
\ No newline at end of file
+        speech_breaker.record_result(e)
+        logger.error("STT failed.", extra={"mode": "sync", "error": str(e)})
+        return {"transcript": None, "confidence": 0.0, "error": str(e)}
+
+# --- Async variants ---
+# speech_client is blocking; these run the sync functions on the bounded STT executor so a slow
+# recognition call does not stall the event loop.
+async def transcribe_audio_gcp(audio_content: bytes, language_code: str = "en-US", sample_rate_hertz: Optional[int] = None) -> dict:
+    with metrics.time_stage(metrics.STAGE_STT):
+        return await run_in_stt_executor(
+            transcribe_audio_gcp_sync, audio_content, language_code=language_code, sample_rate_hertz=sample_rate_hertz
+        )
+
+async def transcribe_audio_gcp_long_running_async(
+    audio_content: bytes, 
+    language_code: str = "en-US", 
+    sample_rate_hertz: Optional[int] = None,
+    audio_channel_count: int = 1,
+    operation_timeout_seconds: int = 360
+) -> dict:
+    with metrics.time_stage(metrics.STAGE_STT):
+        return await run_in_stt_executor(
+            transcribe_audio_gcp_long_running, audio_content, language_code=language_code,
+            sample_rate_hertz=sample_rate_hertz, audio_channel_count=audio_channel_count,
+            operation_timeout_seconds=operation_timeout_seconds
+        )
+
+# --- Streaming recognition (live audio) ---
+# One streaming_recognize call per live session: raw LINEAR16 mono PCM chunks go up as they arrive,
+# interim and final results come back on the same stream. The call blocks for its whole duration, so
+# it runs on the dedicated live-stream executor, never on the STT executor used by file uploads.
+# Audio content per streaming request is capped by the API; larger client frames are split here.
+STREAMING_MAX_REQUEST_BYTES = 25600
+
+def build_streaming_config(language_code: str, sample_rate_hertz: int) -> speech.StreamingRecognitionConfig:
+    config = speech.RecognitionConfig(
+        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+        sample_rate_hertz=sample_rate_hertz,
+        language_code=language_code,
+        audio_channel_count=1,
+        enable_automatic_punctuation=True,
+    )
+    return speech.StreamingRecognitionConfig(config=config, interim_results=True)
+
+def _streaming_requests(audio_chunks: Iterable[bytes]) -> Iterator[speech.StreamingRecognizeRequest]:
+    for chunk in audio_chunks:
+        for offset in range(0, len(chunk), STREAMING_MAX_REQUEST_BYTES):
+            yield speech.StreamingRecognizeRequest(audio_content=chunk[offset:offset + STREAMING_MAX_REQUEST_BYTES])
+
+def streaming_recognize_blocking(
+    audio_chunks: Iterable[bytes],
+    streaming_config: speech.StreamingRecognitionConfig,
+    timeout_seconds: float
+) -> Iterator[speech.StreamingRecognizeResponse]:
+    """
+    Opens one streaming recognition and yields its responses until `audio_chunks` is exhausted and the
+    API has returned the last final result. Raises if the Speech client is unavailable or the breaker is open.
+    """
+    speech_client = get_speech_client()
+    if not speech_client:
+        raise RuntimeError("Speech client not initialized.")
+    if not speech_breaker.allow_request():
+        metrics.CIRCUIT_BREAKER_REJECTIONS.labels(speech_breaker.name).inc()
+        raise RuntimeError("Speech-to-Text temporarily unavailable (circuit breaker open).")
+    # Not routed through call_with_policy: a stream cannot be retried or hedged once audio has been sent
+    responses = speech_client.streaming_recognize(
+        config=streaming_config, requests=_streaming_requests(audio_chunks), timeout=timeout_seconds, retry=None
+    )
+    answered = False
+    try:
+        for response in responses:
+            answered = True
+            yield response
+    except GeneratorExit: # Consumer stopped early (session aborted): end the RPC
+        if hasattr(responses, "cancel"):
+            responses.cancel()
+        if answered:
+            speech_breaker.record_success()
+        else:
+            speech_breaker.release_probe() # Nothing came back yet: no evidence either way
+        raise
+    except Exception as e:
+        speech_breaker.record_result(e)
+        raise
+    speech_breaker.record_success()
@@ -0,0 +1,185 @@
+import math
+from collections import deque
+from typing import Deque, List, Optional, Tuple, Union
+
+import numpy as np
+
+from backend.app.config import settings
+from backend.app.core import metrics
+
+# --- Voice activity detection before STT ---
+# Audio is cut into VAD_FRAME_MS frames. Each frame is classed as speech from its energy and zero-crossing rate:
+#   - voiced speech: energy more than VAD_ENERGY_MARGIN_DB above the tracked noise floor;
+#   - unvoiced speech (fricatives such as "s", "f"): a few dB quieter, but with a high zero-crossing rate.
+# The noise floor follows the quietest recent frames: it drops at once to a quieter frame and rises
+# slowly otherwise, so it adapts to a louder background without climbing into speech.
+# Frame decisions are smoothed: an utterance starts after VAD_MIN_SPEECH_MS of speech frames (a click
+# does not open one) and keeps VAD_PRE_ROLL_MS of audio from before the onset. It ends only after
+# VAD_HANGOVER_MS without speech, so short pauses stay inside it. Audio outside utterances is dropped
+# before STT. Each utterance end is a natural place to cut a segment.
+
+UNVOICED_RELAXATION_DB = 6.0
+UNVOICED_MIN_ZERO_CROSSING_RATE = 0.3 # Crossings per sample; voiced speech is well below this
+NOISE_FLOOR_RISE_DB_PER_SECOND = 2.0
+# A stream starts from an assumed quiet floor; it may rise faster for its first second so steady
+# background noise stops counting as speech almost at once
+NOISE_FLOOR_INITIAL_RISE_DB_PER_SECOND = 20.0
+NOISE_FLOOR_INITIAL_ADAPTATION_MS = 1000
+INITIAL_NOISE_FLOOR_PERCENTILE = 10 # Whole-file detection: start the floor at the quietest frames
+
+INT16_FULL_SCALE = 32768.0
+
+
+class UtteranceEnd:
+    def __repr__(self) -> str:
+        return "UTTERANCE_END"
+
+
+UTTERANCE_END = UtteranceEnd() # Marker in VoiceActivityDetector output between utterances
+
+VadOutput = List[Union[np.ndarray, UtteranceEnd]]
+
+
+def frame_features(frames: np.ndarray) -> "tuple[np.ndarray, np.ndarray]":
+    """Per-frame energy (dBFS) and zero-crossing rate for an int16 array shaped (frames, frame_length)."""
+    samples = frames.astype(np.float32) / INT16_FULL_SCALE
+    energy_dbfs = 10.0 * np.log10(np.mean(samples * samples, axis=1) + 1e-12)
+    signs = np.signbit(frames)
+    zero_crossing_rate = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / max(1, frames.shape[1] - 1)
+    return energy_dbfs, zero_crossing_rate
+
+
+class VoiceActivityDetector:
+    """
+    Streaming VAD over int16 mono PCM. `process()` takes samples of any length and returns the
+    speech audio found so far, with UTTERANCE_END markers where an utterance finished; `flush()`
+    ends the stream. With `track_spans`, `utterance_spans` lists each utterance's (start, end)
+    sample positions in the input. Not thread-safe: one detector per stream.
+    """
+
+    def __init__(self, sample_rate_hertz: int, initial_noise_floor_dbfs: Optional[float] = None, track_spans: bool = False):
+        self.sample_rate_hertz = sample_rate_hertz
+        self.frame_length = max(1, sample_rate_hertz * settings.VAD_FRAME_MS // 1000)
+        frame_ms = 1000.0 * self.frame_length / sample_rate_hertz
+        self.min_speech_frames = max(1, math.ceil(settings.VAD_MIN_SPEECH_MS / frame_ms))
+        self.hangover_frames = max(1, math.ceil(settings.VAD_HANGOVER_MS / frame_ms))
+        pre_roll_frames = max(self.min_speech_frames, math.ceil(settings.VAD_PRE_ROLL_MS / frame_ms))
+        self._floor_rise_per_frame = NOISE_FLOOR_RISE_DB_PER_SECOND * frame_ms / 1000.0
+        self._initial_floor_rise_per_frame = NOISE_FLOOR_INITIAL_RISE_DB_PER_SECOND * frame_ms / 1000.0
+        # Without a measured start, assume a quiet room and adapt quickly; noise is kept (not dropped)
+        # until the floor catches up
+        if initial_noise_floor_dbfs is None:
+            self._noise_floor_dbfs = settings.VAD_MIN_ENERGY_DBFS - settings.VAD_ENERGY_MARGIN_DB
+            self._adaptation_frames_left = math.ceil(NOISE_FLOOR_INITIAL_ADAPTATION_MS / frame_ms)
+        else:
+            self._noise_floor_dbfs = initial_noise_floor_dbfs
+            self._adaptation_frames_left = 0
+        self._pre_roll: Deque[np.ndarray] = deque(maxlen=pre_roll_frames)
+        self._remainder = np.zeros(0, dtype=np.int16)
+        self._in_utterance = False
+        self._speech_run = 0
+        self._silence_run = 0
+        self._frames_processed = 0
+        self._track_spans = track_spans
+        self.utterance_spans: List[Tuple[int, int]] = []
+        self._span_start = 0
+        self.samples_received = 0
+        self.samples_kept = 0
+        self.utterances = 0
+
+    def _is_speech(self, energy_dbfs: float, zero_crossing_rate: float) -> bool:
+        if energy_dbfs < self._noise_floor_dbfs:
+            self._noise_floor_dbfs = energy_dbfs
+        elif self._adaptation_frames_left:
+            self._noise_floor_dbfs += self._initial_floor_rise_per_frame
+        else:
+            self._noise_floor_dbfs += self._floor_rise_per_frame
+        if self._adaptation_frames_left:
+            self._adaptation_frames_left -= 1
+        threshold = max(self._noise_floor_dbfs + settings.VAD_ENERGY_MARGIN_DB, settings.VAD_MIN_ENERGY_DBFS)
+        if energy_dbfs > threshold:
+            return True
+        return energy_dbfs > threshold - UNVOICED_RELAXATION_DB and zero_crossing_rate > UNVOICED_MIN_ZERO_CROSSING_RATE
+
+    def process(self, samples: np.ndarray) -> VadOutput:
+        self.samples_received += len(samples)
+        samples = np.concatenate((self._remainder, samples)) if len(self._remainder) else samples
+        frame_count = len(samples) // self.frame_length
+        self._remainder = samples[frame_count * self.frame_length:].copy()
+        if frame_count == 0:
+            return []
+        frames = samples[:frame_count * self.frame_length].reshape(frame_count, self.frame_length)
+        energy_dbfs, zero_crossing_rate = frame_features(frames)
+
+        output: VadOutput = []
+        kept: List[np.ndarray] = []
+        for frame, frame_energy, frame_zcr in zip(frames, energy_dbfs.tolist(), zero_crossing_rate.tolist()):
+            frame_number = self._frames_processed
+            self._frames_processed += 1
+            speech = self._is_speech(frame_energy, frame_zcr)
+            if not self._in_utterance:
+                self._speech_run = self._speech_run + 1 if speech else 0
+                self._pre_roll.append(frame)
+                if self._speech_run >= self.min_speech_frames:
+                    self._in_utterance = True
+                    self._silence_run = 0
+                    self.utterances += 1
+                    self._span_start = (frame_number - len(self._pre_roll) + 1) * self.frame_length
+                    kept.extend(self._pre_roll)
+                    self._pre_roll.clear()
+                continue
+            kept.append(frame)
+            self._silence_run = 0 if speech else self._silence_run + 1
+            if self._silence_run >= self.hangover_frames:
+                self._in_utterance = False
+                self._speech_run = 0
+                self._end_span((frame_number + 1) * self.frame_length)
+                self._emit(kept, output)
+                kept = []
+                output.append(UTTERANCE_END)
+        self._emit(kept, output)
+        return output
+
+    def flush(self) -> VadOutput:
+        output: VadOutput = []
+        if self._in_utterance:
+            self._emit([self._remainder], output)
+            output.append(UTTERANCE_END)
+            self._end_span(self.samples_received)
+        self._remainder = np.zeros(0, dtype=np.int16)
+        self._in_utterance = False
+        self._pre_roll.clear()
+        return output
+
+    def _end_span(self, end_sample: int) -> None:
+        if self._track_spans:
+            self.utterance_spans.append((self._span_start, end_sample))
+
+    def _emit(self, frames: List[np.ndarray], output: VadOutput) -> None:
+        if frames:
+            audio = np.concatenate(frames)
+            if len(audio):
+                self.samples_kept += len(audio)
+                output.append(audio)
+
+    def kept_ratio(self) -> float:
+        return self.samples_kept / self.samples_received if self.samples_received else 1.0
+
+
+def detect_utterance_spans(samples: np.ndarray, sample_rate_hertz: int) -> List[Tuple[int, int]]:
+    """Whole-buffer VAD: (start, end) sample positions of the utterances in int16 mono `samples`."""
+    frame_length = max(1, sample_rate_hertz * settings.VAD_FRAME_MS // 1000)
+    frame_count = len(samples) // frame_length
+    initial_floor = None
+    if frame_count:
+        energy_dbfs, _ = frame_features(samples[:frame_count * frame_length].reshape(frame_count, frame_length))
+        initial_floor = float(np.percentile(energy_dbfs, INITIAL_NOISE_FLOOR_PERCENTILE))
+    detector = VoiceActivityDetector(sample_rate_hertz, initial_noise_floor_dbfs=initial_floor, track_spans=True)
+    detector.process(samples)
+    detector.flush()
+    return detector.utterance_spans
+
+
+def record_stt_audio(path: str, seconds_received: float, seconds_sent: float) -> None:
+    metrics.STT_AUDIO_SECONDS.labels(path, "received").inc(seconds_received)
+    metrics.STT_AUDIO_SECONDS.labels(path, "sent").inc(seconds_sent)
@@ -1,14 +1,45 @@
-from fastapi import FastAPI
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware # For enabling CORS
 from backend.app.api.v1 import endpoints_text_analysis
 from backend.app.api.v1 import endpoints_audio_stream   # For audio file uploads
+from backend.app.api.v1 import endpoints_audio_jobs     # Background jobs for long recordings
 from backend.app.api.v1 import endpoints_ews            # For Early Warning System utilities
+from backend.app.api.v1 import endpoints_live_stream    # WebSocket live audio (streaming recognition)
 # from backend.app.api.v1 import endpoints_live_analysis # Live analysis endpoint is excluded for this deployment
 from backend.app.config import settings
-from backend.app import schemas # Ensures schemas.__init__.py is run to rebuild Pydantic models
+from backend.app.core import circuit_breaker, gcp_channels, metrics, request_profiler
+from backend.app.core.server_timing import ServerTimingMiddleware
+from backend.app.core.structured_logging import CorrelationIdMiddleware, shutdown_logging
+from backend.app.core.startup import FirstRequestTimerMiddleware, startup_state, warm_up
+from backend.app.core.admission import AdmissionRejected, admission_controller
+from backend.app.core.lexicon_store import lexicon_store
+from backend.app.services.audio_job_service import audio_job_manager
+from backend.app import schemas # Ensures schemas.__init__.py is run to resolve forward references
+
+# GCP clients are built lazily; the lifespan warms them up in the background so the worker starts
+# listening at once and /ready flips to 200 when warm-up is done
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup_state.mark_app_loaded()
+    warm_up_task = asyncio.create_task(warm_up()) if settings.WARM_UP_ENABLED else None
+    if warm_up_task is None:
+        startup_state.mark_ready()
+    lexicon_store.start_watching()
+    await audio_job_manager.start() # Also resumes jobs a previous worker left unfinished
+    yield
+    await audio_job_manager.stop()
+    lexicon_store.stop_watching()
+    if warm_up_task is not None and not warm_up_task.done():
+        warm_up_task.cancel()
+    shutdown_logging()
 
 app = FastAPI(
     title=settings.APP_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json" # Path for OpenAPI schema (API docs)
 )
 
@@ -30,6 +61,32 @@ app.add_middleware(
 )
 # --- End of CORS Configuration ---
 
+# Server-Timing header (and opt-in X-Debug-Profile profiling) on the analysis routes
+app.add_middleware(
+    ServerTimingMiddleware,
+    paths=[
+        settings.API_V1_STR + "/misinformation/analyze-text",
+        settings.API_V1_STR + "/audio/analyze-audio",
+        settings.API_V1_STR + "/ews/check-content",
+    ],
+    enabled=settings.SERVER_TIMING_ENABLED,
+)
+
+# Time-to-first-request, reported once per worker (probes and scrapes excluded)
+app.add_middleware(FirstRequestTimerMiddleware, ignored_paths=["/health", "/ready", "/metrics"])
+
+# Correlation id (X-Request-ID) for every request's log records; added last so it wraps everything
+app.add_middleware(CorrelationIdMiddleware)
+
+# Admission control: a full priority lane answers 429 with a Retry-After estimate
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": f"Server busy ({exc.priority} lane: {exc.reason}). Retry later."},
+        headers={"Retry-After": str(exc.retry_after_seconds)}
+    )
+
 # Include routers for your different services
 app.include_router(
     endpoints_text_analysis.router,
@@ -43,22 +100,80 @@ app.include_router(
     tags=["Audio File Analysis"] # Covers STT and subsequent text analysis
 )
 
+app.include_router(
+    endpoints_audio_jobs.router,
+    prefix=settings.API_V1_STR + "/audio",
+    tags=["Audio Jobs"] # Background analysis of long recordings: /audio/jobs
+)
+
 app.include_router(
     endpoints_ews.router,
     prefix=settings.API_V1_STR + "/ews",
     tags=["Early Warning System Utilities"] # For mock SMS test, etc.
 )
 
+app.include_router(
+    endpoints_live_stream.router,
+    prefix=settings.API_V1_STR + "/live",
+    tags=["Live Audio Streaming"] # WebSocket /live/stream
+)
+
 # The /live/analyze-segment endpoint and its router (endpoints_live_analysis) 
-# are intentionally excluded for this deployment to focus on stable services.
+# are intentionally excluded for this deployment to focus on stable services;
+# live audio goes through the /live/stream WebSocket instead.
 
 # Root endpoint
 @app.get("/", tags=["Root"])
 async def read_root():
     return {"message": f"Welcome to {settings.APP_NAME} API. Visit /docs for API documentation."}
 
+# Health endpoint: "degraded" while any GCP backend's circuit breaker is not closed
+@app.get("/health", tags=["Root"])
+async def health():
+    breakers = [breaker.stats() for breaker in circuit_breaker.ALL_BREAKERS]
+    degraded = any(breaker["state"] != circuit_breaker.STATE_CLOSED for breaker in breakers)
+    return {"status": "degraded" if degraded else "ok", "circuit_breakers": breakers}
+
+# Readiness endpoint: 503 until startup warm-up has finished; reports cold-start timings
+@app.get("/ready", tags=["Root"])
+async def ready():
+    return JSONResponse(status_code=200 if startup_state.ready else 503, content=startup_state.stats())
+
+# Prometheus scrape endpoint (aggregated across workers when PROMETHEUS_MULTIPROC_DIR is set)
+@app.get("/metrics", tags=["Root"], include_in_schema=False)
+async def prometheus_metrics():
+    payload, content_type = metrics.render_latest()
+    return Response(content=payload, media_type=content_type)
+
+# Per-priority admission queues, in-flight counts and rejections
+@app.get("/admission/stats", tags=["Root"])
+async def admission_stats():
+    return admission_controller.stats()
+
+# Channel pool sizes and per-backend bulkhead utilization / queue wait
+@app.get("/gcp-pools/stats", tags=["Root"])
+async def gcp_pool_stats():
+    return gcp_channels.pool_stats()
+
+# Stored request profiles (X-Debug-Profile); only exposed when PROFILING_ENABLED
+@app.get("/debug/profiles", tags=["Root"], include_in_schema=False)
+async def list_request_profiles():
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return request_profiler.list_profiles()
+
+@app.get("/debug/profiles/{profile_id}", tags=["Root"], include_in_schema=False)
+async def download_request_profile(profile_id: str, format: str = "raw"):
+    path = request_profiler.profile_path(profile_id) if settings.PROFILING_ENABLED else None
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    if format == "text" and path.endswith(".prof"):
+        return PlainTextResponse(request_profiler.pstats_summary(path))
+    return FileResponse(path, filename=os.path.basename(path))
+
 # To run this application locally (from the `peaceguard_ai` directory, with venv active):
 # uvicorn backend.app.main:app --reload --host 0.0.0.0 --port 8000
 #
 # For production deployment (example using Gunicorn, often handled by PaaS like Render):
-# gunicorn -w 4 -k uvicorn.workers.UvicornWorker backend.app.main:app --host 0.0.0.0 --port $PORT
\ No newline at end of file
+# gunicorn -c backend/gunicorn.conf.py -w 4 -k uvicorn.workers.UvicornWorker backend.app.main:app --host 0.0.0.0 --port $PORT
+# (the config file sets up multi-worker Prometheus metrics for /metrics)
\ No newline at end of file
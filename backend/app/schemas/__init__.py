@@ -2,9 +2,10 @@
 
 # Import all your Pydantic models from their respective files
 # This order can matter if models depend on others already being defined before rebuild
-from .text_analysis_schemas import TextAnalysisRequest, KeywordMatch, GCPSentimentOutput, GCPCategoryMatch, GCPRiskAssessmentOutput, PeaceGuardRiskOutput, TextAnalysisResponse
+from .text_analysis_schemas import TextAnalysisRequest, KeywordMatch, GCPSentimentOutput, GCPCategoryMatch, GCPRiskAssessmentOutput, PeaceGuardRiskOutput, TextAnalysisResponse, BatchTextAnalysisRequest, BatchTextAnalysisItemResult
 from .ews_schemas import EWSInput, EWSAlert, EWSCheckResponse # EWSAlert defined here
-from .audio_analysis_schemas import EmbeddedTextAnalysisResult, AudioAnalysisResponse
+from .audio_analysis_schemas import EmbeddedTextAnalysisResult, TranscriptSegment, RiskTimelineEntry, AudioAnalysisResponse
+from .audio_job_schemas import AudioJobProgress, AudioJobState, AudioJobAccepted
 
 
 # List of all models that use forward references OR ARE REFERENCED by forward references.
@@ -12,9 +13,12 @@ from .audio_analysis_schemas import EmbeddedTextAnalysisResult, AudioAnalysisRes
 # Pydantic V2 uses model_rebuild()
 models_to_rebuild = [
     TextAnalysisResponse,       # Uses 'EWSAlert'
+    BatchTextAnalysisItemResult, # Contains TextAnalysisResponse
     EWSInput,                   # Uses 'PeaceGuardRiskOutput', 'GCPSentimentOutput', etc.
     EmbeddedTextAnalysisResult, # Uses 'EWSAlert'
+    RiskTimelineEntry,          # Uses 'EWSAlert'
     AudioAnalysisResponse,      # Contains EmbeddedTextAnalysisResult
+    AudioJobState,              # Contains AudioAnalysisResponse
     
     # Also good to rebuild the models that were referenced by strings,
     # although it's mainly the models *containing* the string hints that need it.
@@ -25,14 +29,12 @@ models_to_rebuild = [
     KeywordMatch,
     EWSAlert,
     EWSCheckResponse,
-    TextAnalysisRequest
+    TextAnalysisRequest,
+    BatchTextAnalysisRequest
 ]
 
+# Only models left incomplete by a string forward reference (e.g. 'EWSAlert') are rebuilt; a forced
+# rebuild of every model on each import added noticeably to worker cold starts.
 for model_cls in models_to_rebuild:
-    if hasattr(model_cls, 'model_rebuild'): # Check if it's a Pydantic model (Pydantic V2+)
-        model_cls.model_rebuild(force=True) # Rebuild to resolve forward references
-    elif hasattr(model_cls, 'update_forward_refs'): # For older Pydantic V1
-        model_cls.update_forward_refs()
-
-
-print("INFO:     Pydantic schemas processed and forward references updated.")
\ No newline at end of file
+    if not getattr(model_cls, "__pydantic_complete__", True):
+        model_cls.model_rebuild() # Resolves forward references against the names imported above
@@ -21,6 +21,22 @@ class EmbeddedTextAnalysisResult(BaseModel):
     peaceguard_risk: Optional[PeaceGuardRiskOutput] = None
     ews_alerts: Optional[List['EWSAlert']] = None # MODIFIED: Use string literal 'EWSAlert'
     overall_explanation: Optional[str] = None
+    lexicon_version: Optional[str] = None
+
+class TranscriptSegment(BaseModel):
+    start_seconds: float = Field(..., description="Start of the chunk in the uploaded audio.")
+    end_seconds: Optional[float] = None
+    transcript: Optional[str] = None
+    confidence: Optional[float] = None
+    stt_error: Optional[str] = None
+
+class RiskTimelineEntry(BaseModel):
+    start_seconds: float
+    end_seconds: Optional[float] = None
+    peaceguard_risk: Optional[PeaceGuardRiskOutput] = None
+    flagged_keywords: List[KeywordMatch] = Field(default_factory=list)
+    ews_alerts: Optional[List['EWSAlert']] = None
+    error: Optional[str] = None
 
 class AudioAnalysisResponse(BaseModel):
     original_transcript: Optional[str] = None
@@ -28,4 +44,10 @@ class AudioAnalysisResponse(BaseModel):
     stt_error: Optional[str] = None
     stt_detected_language_code: Optional[str] = None
     text_analysis_results: Optional[EmbeddedTextAnalysisResult] = None
-    overall_process_error: Optional[str] = None
\ No newline at end of file
+    overall_process_error: Optional[str] = None
+    audio_seconds_received: Optional[float] = Field(None, description="Duration of the uploaded audio (when it could be decoded for voice activity detection).")
+    audio_seconds_sent_to_stt: Optional[float] = Field(None, description="Speech kept by voice activity detection and sent to STT.")
+    stt_audio_sent_ratio: Optional[float] = Field(None, description="audio_seconds_sent_to_stt / audio_seconds_received.")
+    stt_chunks: Optional[int] = Field(None, description="Recognize calls the audio was split into.")
+    transcript_segments: Optional[List[TranscriptSegment]] = Field(None, description="Per-chunk transcripts with their position in the audio, in time order.")
+    risk_timeline: Optional[List[RiskTimelineEntry]] = Field(None, description="Risk per AUDIO_RISK_WINDOW_SECONDS window of the audio.")
@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from .audio_analysis_schemas import AudioAnalysisResponse, TranscriptSegment
+
+JOB_STATUS_QUEUED = "queued"
+JOB_STATUS_RUNNING = "running"
+JOB_STATUS_COMPLETED = "completed"
+JOB_STATUS_FAILED = "failed"
+JOB_STATUS_CANCELLED = "cancelled"
+JOB_TERMINAL_STATUSES = (JOB_STATUS_COMPLETED, JOB_STATUS_FAILED, JOB_STATUS_CANCELLED)
+
+class AudioJobProgress(BaseModel):
+    stage: Optional[str] = Field(None, description="preprocessing, transcribing or analyzing.")
+    chunks_total: Optional[int] = None
+    chunks_done: int = 0
+    audio_seconds_received: Optional[float] = None
+
+class AudioJobState(BaseModel):
+    job_id: str
+    status: str = JOB_STATUS_QUEUED
+    filename: Optional[str] = None
+    language_code: str = "en-US"
+    audio_bytes: int = 0
+    created_at: float
+    updated_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    attempts: int = Field(0, description="Times a worker started the job; above 1 after it was resumed.")
+    cancel_requested: bool = False
+    progress: AudioJobProgress = Field(default_factory=AudioJobProgress)
+    transcript_segments: List[Optional[TranscriptSegment]] = Field(default_factory=list, description="Partial results: one entry per chunk, null until that chunk is transcribed.")
+    result: Optional[AudioAnalysisResponse] = None
+    error: Optional[str] = None
+
+class AudioJobAccepted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+    events_url: str
@@ -31,5 +31,6 @@ class EWSCheckResponse(BaseModel):
     input_text_snippet: str
     triggered_alerts: List[EWSAlert] = Field(default_factory=list)
     status_message: str
+    lexicon_version: Optional[str] = Field(None, description="Version of the keyword lexicon the patterns were evaluated with.")
 
 # update_forward_refs() or model_rebuild() will be called later
\ No newline at end of file
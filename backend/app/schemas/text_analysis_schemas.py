@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, TYPE_CHECKING # Import TYPE_CHECKING
+from typing import Dict, List, Optional, TYPE_CHECKING # Import TYPE_CHECKING
 
 # Use TYPE_CHECKING to allow type hints for linters/IDEs without runtime import errors
 if TYPE_CHECKING:
@@ -8,6 +8,7 @@ if TYPE_CHECKING:
 class TextAnalysisRequest(BaseModel):
     text: str
     language_hint: Optional[str] = Field(None, alias="language")
+    deadline_ms: Optional[int] = Field(None, gt=0, description="Latency budget in milliseconds. GCP stages still running when it runs out are dropped and the risk is computed from the stages that finished.")
 
 class KeywordMatch(BaseModel):
     keyword: str
@@ -33,6 +34,8 @@ class PeaceGuardRiskOutput(BaseModel):
     label: str = Field(..., description="Qualitative risk label (Low, Medium, High, Critical).")
     contributing_factors: List[str] = Field(default_factory=list, description="List of factors that contributed to the score.")
     detected_framings: List[str] = Field(default_factory=list, description="Detected manipulative framing techniques.")
+    partial: bool = Field(False, description="True when some inputs were dropped (latency budget ran out or a backend's circuit breaker is open).")
+    missing_inputs: List[str] = Field(default_factory=list, description="Analysis stages whose results were not available for this score.")
 
 class TextAnalysisResponse(BaseModel):
     original_text: str
@@ -44,5 +47,18 @@ class TextAnalysisResponse(BaseModel):
     peaceguard_risk: Optional[PeaceGuardRiskOutput] = None
     ews_alerts: Optional[List['EWSAlert']] = None # MODIFIED: Use string literal 'EWSAlert'
     overall_explanation: Optional[str] = "Analysis completed."
+    skipped_stages: List[str] = Field(default_factory=list, description="Analysis stages skipped because their result could not change the risk label or EWS trigger.")
+    degraded: bool = Field(False, description="True when a GCP stage was unavailable because its backend's circuit breaker is open; the risk then rests on keywords and framing.")
+    circuit_breakers: Dict[str, str] = Field(default_factory=dict, description="Circuit breaker state per backend at response time (closed, open, half_open).")
+    lexicon_version: Optional[str] = Field(None, description="Version of the keyword lexicon this text was scored with.")
+
+class BatchTextAnalysisRequest(BaseModel):
+    items: List[TextAnalysisRequest] = Field(..., description="Texts to analyze. Limited to TEXT_ANALYSIS_BATCH_MAX_ITEMS per call.")
+
+class BatchTextAnalysisItemResult(BaseModel):
+    # One NDJSON line of the /analyze-text/batch stream. Lines arrive in completion order, not input order.
+    index: int = Field(..., description="Position of the item in the request's 'items' list.")
+    result: Optional[TextAnalysisResponse] = None
+    error: Optional[str] = None
 
 # update_forward_refs() or model_rebuild() will be called later, typically in __init__.py or main.py
\ No newline at end of file
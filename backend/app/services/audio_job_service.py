@@ -0,0 +1,380 @@
+import asyncio
+import fcntl
+import os
+import tempfile
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from fastapi import UploadFile
+
+from backend.app.config import settings
+from backend.app.core import metrics
+from backend.app.core.admission import AdmissionRejected, QueueReservation, admission_controller, PRIORITY_BULK
+from backend.app.core.audio_normalization import PreparedAudio, ensure_transcribable
+from backend.app.core.structured_logging import get_logger
+from backend.app.schemas.audio_analysis_schemas import TranscriptSegment
+from backend.app.schemas.audio_job_schemas import (
+    AudioJobState, JOB_STATUS_CANCELLED, JOB_STATUS_COMPLETED, JOB_STATUS_FAILED, JOB_STATUS_RUNNING,
+    JOB_TERMINAL_STATUSES
+)
+from backend.app.services import audio_stream_analyzer
+
+logger = get_logger(__name__)
+
+# --- Background audio analysis jobs ---
+# Recordings too long to analyze within one HTTP request (hour-long broadcasts) go through
+# /audio/jobs: the upload is written to AUDIO_JOBS_DIR and the job ID returned at once. A pool of
+# AUDIO_JOB_WORKERS workers per process runs analyze_audio_content on it (bulk admission lane), and
+# writes the job state to <job_id>.json as it goes: stage, chunks transcribed so far and their
+# transcripts, then the full result. Any worker process can serve status polls and event streams
+# from that file.
+# A job is run by whichever process holds an flock on its <job_id>.lock; the OS drops the lock when
+# the process dies. Every process rescans the directory on start and every AUDIO_JOB_RESCAN_SECONDS
+# and picks up unfinished jobs nobody holds, so a job interrupted by a restart resumes, reusing the
+# chunks already transcribed. Only the lock holder writes a job's state file; a cancel request
+# for a running job leaves a <job_id>.cancel marker that the holder picks up.
+
+JOB_FILE_SUFFIXES = (".json", ".audio", ".lock", ".cancel")
+UPLOAD_READ_BLOCK_BYTES = 1024 * 1024
+CANCEL_POLL_SECONDS = 1.0
+
+
+class AudioJobTooLarge(ValueError):
+    pass
+
+
+class AudioJobEmpty(ValueError):
+    pass
+
+
+class AudioJobStore:
+    """Job files in one directory; state is replaced atomically so readers never see a partial file."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def ensure_directory(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, job_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, job_id + suffix)
+
+    def save(self, state: AudioJobState) -> None:
+        state.updated_at = time.time()
+        temporary_path = self.path(state.job_id, f".json.{os.getpid()}.tmp")
+        with open(temporary_path, "w") as f:
+            f.write(state.model_dump_json())
+        os.replace(temporary_path, self.path(state.job_id, ".json"))
+
+    def load(self, job_id: str) -> Optional[AudioJobState]:
+        try:
+            with open(self.path(job_id, ".json")) as f:
+                return AudioJobState.model_validate_json(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def signature(self, job_id: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path(job_id, ".json"))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def job_ids(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return [name[:-len(".json")] for name in names if name.endswith(".json")]
+
+    def try_claim(self, job_id: str) -> Optional[int]:
+        """Takes the job's lock without waiting; returns the lock's file descriptor, or None if another worker holds it."""
+        fd = os.open(self.path(job_id, ".lock"), os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return None
+        return fd
+
+    @staticmethod
+    def release(fd: int) -> None:
+        os.close(fd) # Closing drops the flock
+
+    def cancel_requested(self, job_id: str) -> bool:
+        return os.path.exists(self.path(job_id, ".cancel"))
+
+    def request_cancel(self, job_id: str) -> None:
+        with open(self.path(job_id, ".cancel"), "w"):
+            pass
+
+    def remove(self, job_id: str, suffixes=JOB_FILE_SUFFIXES) -> None:
+        for suffix in suffixes:
+            try:
+                os.remove(self.path(job_id, suffix))
+            except FileNotFoundError:
+                pass
+
+
+class _JobObserver(audio_stream_analyzer.AudioAnalysisObserver):
+    # Mirrors the analysis into the job state file; runs on the event loop, so saves are sequential
+    def __init__(self, store: AudioJobStore, state: AudioJobState):
+        self.store = store
+        self.state = state
+
+    def on_stage(self, stage: str) -> None:
+        self.state.progress.stage = stage
+        self.store.save(self.state)
+
+    def on_prepared(self, prepared_audio: PreparedAudio) -> Dict[int, TranscriptSegment]:
+        # Chunks are cut deterministically, so a resumed job keeps segments whose chunk is unchanged
+        previous_segments = self.state.transcript_segments
+        completed: Dict[int, TranscriptSegment] = {}
+        for chunk_index, chunk in enumerate(prepared_audio.chunks):
+            segment = previous_segments[chunk_index] if chunk_index < len(previous_segments) else None
+            if segment is not None and (segment.start_seconds, segment.end_seconds) == (chunk.start_seconds, chunk.end_seconds):
+                completed[chunk_index] = segment
+        self.state.transcript_segments = [completed.get(chunk_index) for chunk_index in range(len(prepared_audio.chunks))]
+        self.state.progress.chunks_total = len(prepared_audio.chunks)
+        self.state.progress.chunks_done = len(completed)
+        self.state.progress.audio_seconds_received = prepared_audio.seconds_received
+        self.store.save(self.state)
+        return completed
+
+    def on_segment(self, chunk_index: int, segment: TranscriptSegment) -> None:
+        self.state.transcript_segments[chunk_index] = segment
+        self.state.progress.chunks_done += 1
+        self.store.save(self.state)
+
+
+class AudioJobManager:
+    def __init__(self, store: AudioJobStore, workers: int):
+        self.store = store
+        self.workers = max(1, workers)
+        self._queue: Optional["asyncio.Queue[str]"] = None
+        self._queued_ids: Set[str] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._running_ids: Set[str] = set()
+        self.jobs_submitted = 0
+        self.jobs_resumed = 0
+
+    # --- Lifecycle ---
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self.store.ensure_directory()
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker(), name=f"audio-job-worker-{i}") for i in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._rescan_loop(), name="audio-job-rescan"))
+
+    async def stop(self) -> None:
+        # Running jobs are interrupted, not cancelled: their state stays "running" and the next
+        # process to rescan resumes them
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._queued_ids.clear()
+
+    def _enqueue(self, job_id: str) -> None:
+        if self._queue is None or job_id in self._queued_ids or job_id in self._running_ids:
+            return
+        self._queued_ids.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    async def _rescan_loop(self) -> None:
+        while True:
+            try:
+                self._rescan()
+            except Exception as e: # Never let the rescan loop die
+                logger.error("Audio job rescan failed.", extra={"error": str(e)})
+            await asyncio.sleep(settings.AUDIO_JOB_RESCAN_SECONDS)
+
+    def _rescan(self) -> None:
+        now = time.time()
+        for job_id in self.store.job_ids():
+            state = self.store.load(job_id)
+            if state is None:
+                continue
+            if state.status in JOB_TERMINAL_STATUSES:
+                if state.finished_at and now - state.finished_at > settings.AUDIO_JOB_RETENTION_SECONDS:
+                    self.store.remove(job_id)
+                continue
+            self._enqueue(job_id) # Queued here or elsewhere, or orphaned by a dead worker: the lock decides who runs it
+
+    # --- Submission and control ---
+
+    async def submit(self, audio_file: UploadFile, language_code: str) -> AudioJobState:
+        self.store.ensure_directory()
+        job_id = uuid.uuid4().hex
+        audio_path = self.store.path(job_id, ".audio")
+        audio_bytes = 0
+        try:
+            with open(audio_path, "wb") as f: # Streamed to disk: an hour of WAV is hundreds of MB
+                while block := await audio_file.read(UPLOAD_READ_BLOCK_BYTES):
+                    audio_bytes += len(block)
+                    if audio_bytes > settings.AUDIO_JOB_MAX_UPLOAD_BYTES:
+                        raise AudioJobTooLarge(f"Audio file exceeds {settings.AUDIO_JOB_MAX_UPLOAD_BYTES} bytes.")
+                    f.write(block)
+            if not audio_bytes:
+                raise AudioJobEmpty("Audio file is empty.")
+            ensure_transcribable(audio_path) # Reject now what STT could never accept (AudioNotTranscribable)
+        except BaseException:
+            self.store.remove(job_id)
+            raise
+        now = time.time()
+        state = AudioJobState(
+            job_id=job_id, filename=audio_file.filename, language_code=language_code, audio_bytes=audio_bytes,
+            created_at=now, updated_at=now,
+        )
+        self.store.save(state)
+        self.jobs_submitted += 1
+        metrics.AUDIO_JOBS.labels("submitted").inc()
+        logger.info("Audio job submitted.", extra={"job_id": job_id, "audio_bytes": audio_bytes, "language_code": language_code})
+        self._enqueue(job_id)
+        return state
+
+    def get(self, job_id: str) -> Optional[AudioJobState]:
+        return self.store.load(job_id)
+
+    def cancel(self, job_id: str) -> Optional[AudioJobState]:
+        state = self.store.load(job_id)
+        if state is None or state.status in JOB_TERMINAL_STATUSES:
+            return state
+        fd = self.store.try_claim(job_id)
+        if fd is None: # Running somewhere: its worker sees the marker and stops
+            self.store.request_cancel(job_id)
+            state.cancel_requested = True
+            return state
+        try:
+            state = self.store.load(job_id) # Re-read under the lock
+            if state is not None and state.status not in JOB_TERMINAL_STATUSES:
+                self._finish(state, JOB_STATUS_CANCELLED)
+        finally:
+            self.store.release(fd)
+        return state
+
+    async def events(self, job_id: str) -> AsyncIterator[AudioJobState]:
+        """Yields the job state each time it changes, until the job ends. Works from any worker process."""
+        last_signature = None
+        while True:
+            signature = self.store.signature(job_id)
+            if signature != last_signature:
+                last_signature = signature
+                state = self.store.load(job_id)
+                if state is None:
+                    return
+                yield state
+                if state.status in JOB_TERMINAL_STATUSES:
+                    return
+            await asyncio.sleep(settings.AUDIO_JOB_EVENTS_POLL_SECONDS)
+
+    # --- Running jobs ---
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self._queued_ids.discard(job_id)
+            fd = self.store.try_claim(job_id)
+            if fd is None:
+                continue # Another worker (maybe in another process) has it
+            self._running_ids.add(job_id)
+            try:
+                state = self.store.load(job_id)
+                if state is not None and state.status not in JOB_TERMINAL_STATUSES:
+                    await self._run(state)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Audio job failed unexpectedly.", extra={"job_id": job_id})
+                state = self.store.load(job_id)
+                if state is not None and state.status not in JOB_TERMINAL_STATUSES:
+                    self._finish(state, JOB_STATUS_FAILED, error=str(e))
+            finally:
+                self._running_ids.discard(job_id)
+                self.store.release(fd)
+
+    async def _run(self, state: AudioJobState) -> None:
+        if self.store.cancel_requested(state.job_id):
+            self._finish(state, JOB_STATUS_CANCELLED)
+            return
+        if state.status == JOB_STATUS_RUNNING:
+            self.jobs_resumed += 1
+            metrics.AUDIO_JOBS.labels("resumed").inc()
+            logger.info("Resuming audio job.", extra={"job_id": state.job_id, "chunks_done": state.progress.chunks_done})
+        state.status = JOB_STATUS_RUNNING
+        state.attempts += 1
+        state.started_at = state.started_at or time.time()
+        self.store.save(state)
+
+        analysis = asyncio.create_task(self._analyze(state))
+        try:
+            while not analysis.done():
+                await asyncio.wait({analysis}, timeout=CANCEL_POLL_SECONDS)
+                if not analysis.done() and self.store.cancel_requested(state.job_id):
+                    analysis.cancel()
+                    await asyncio.gather(analysis, return_exceptions=True)
+                    self._finish(state, JOB_STATUS_CANCELLED)
+                    return
+        except asyncio.CancelledError: # Worker shutting down: stop the analysis, the job resumes later
+            analysis.cancel()
+            raise
+        response = analysis.result()
+        if response.overall_process_error:
+            self._finish(state, JOB_STATUS_FAILED, error=response.overall_process_error, result=response)
+        else:
+            self._finish(state, JOB_STATUS_COMPLETED, result=response)
+
+    async def _analyze(self, state: AudioJobState):
+        reservation = await self._reserve_bulk_entry(state)
+        try:
+            async with reservation.admit():
+                return await audio_stream_analyzer.analyze_audio_content(
+                    self.store.path(state.job_id, ".audio"), language_code_stt_hint=state.language_code, observer=_JobObserver(self.store, state)
+                )
+        finally:
+            reservation.release()
+
+    async def _reserve_bulk_entry(self, state: AudioJobState) -> QueueReservation:
+        # The job is already accepted, so a full bulk queue delays it instead of failing it
+        while True:
+            try:
+                return admission_controller.reserve(PRIORITY_BULK, 1)
+            except AdmissionRejected as e:
+                logger.info("Bulk queue full; audio job waits.", extra={"job_id": state.job_id, "retry_after_seconds": e.retry_after_seconds})
+                await asyncio.sleep(e.retry_after_seconds)
+
+    def _finish(self, state: AudioJobState, status: str, error: Optional[str] = None, result=None) -> None:
+        state.status = status
+        state.error = error
+        state.result = result
+        state.finished_at = time.time()
+        state.progress.stage = None
+        self.store.save(state)
+        self.store.remove(state.job_id, (".audio", ".cancel")) # The state file is kept for AUDIO_JOB_RETENTION_SECONDS
+        metrics.AUDIO_JOBS.labels(status).inc()
+        logger.info(
+            "Audio job finished.",
+            extra={"job_id": state.job_id, "status": status, "attempts": state.attempts, "seconds": round(state.finished_at - state.created_at, 3), "error": error}
+        )
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "directory": self.store.directory,
+            "workers": self.workers,
+            "queued": len(self._queued_ids),
+            "running": len(self._running_ids),
+            "jobs_submitted": self.jobs_submitted,
+            "jobs_resumed": self.jobs_resumed,
+        }
+
+
+
+def default_jobs_directory() -> str:
+    return os.path.join(tempfile.gettempdir(), "peaceguard-audio-jobs")
+
+
+audio_job_manager = AudioJobManager(AudioJobStore(settings.AUDIO_JOBS_DIR or default_jobs_directory()), settings.AUDIO_JOB_WORKERS)
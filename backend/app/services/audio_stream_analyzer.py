@@ -1,52 +1,231 @@
-from backend.app.core import stt_client
-from backend.app.services.text_misinfo_analyzer import analyze_text_content as analyze_text_for_misinfo
-from backend.app.schemas.text_analysis_schemas import TextAnalysisRequest
-from backend.app.schemas.audio_analysis_schemas import AudioAnalysisResponse, EmbeddedTextAnalysisResult # Ensure this schema is up-to-date
-from typing import Optional
+import asyncio
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backend.app.config import settings
+from backend.app.core import metrics, stt_client
+from backend.app.core.audio_normalization import STT_SYNC_MAX_SECONDS, AudioChunk, AudioSource, PreparedAudio, prepare_audio_for_stt
+from backend.app.core.gcp_executor import run_in_stt_executor
+from backend.app.services.text_misinfo_analyzer import analyze_text_content_async as analyze_text_for_misinfo
+from backend.app.schemas.text_analysis_schemas import TextAnalysisRequest, TextAnalysisResponse
+from backend.app.schemas.audio_analysis_schemas import AudioAnalysisResponse, EmbeddedTextAnalysisResult, RiskTimelineEntry, TranscriptSegment # Ensure this schema is up-to-date
+from backend.app.core.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+# --- Chunked transcription ---
+# prepare_audio_for_stt cuts long audio at utterance boundaries into chunks synchronous recognize
+# accepts. The chunks of one upload are transcribed side by side, at most AUDIO_CHUNK_MAX_CONCURRENCY
+# at a time, so a clip of N chunks takes about N / AUDIO_CHUNK_MAX_CONCURRENCY recognize calls of
+# wall-clock time instead of one long-running operation. Segments are stitched back in time order.
+# A chunk whose recognition fails leaves a gap (reported on its segment); the upload fails only when
+# no chunk produced a transcript.
+# Audio that could not be normalized is one chunk of the original bytes. Unless it is known to fit
+# synchronous recognize, it goes to long-running recognize instead; live segments (`short_audio`)
+# use recognize when their length is unknown.
+
+STAGE_PREPROCESSING = "preprocessing"
+STAGE_TRANSCRIBING = "transcribing"
+STAGE_ANALYZING = "analyzing"
+
+
+class AudioAnalysisObserver:
+    """
+    Follows one analyze_audio_content run; background audio jobs use it to report progress and
+    partial transcripts, and to resume. The defaults do nothing.
+    """
+
+    def on_stage(self, stage: str) -> None:
+        pass
+
+    def on_prepared(self, prepared_audio: PreparedAudio) -> Dict[int, TranscriptSegment]:
+        """Called once the chunks are known; returns segments (by chunk index) transcribed by an earlier attempt."""
+        return {}
+
+    def on_segment(self, chunk_index: int, segment: TranscriptSegment) -> None:
+        pass
+
+
+def _needs_long_running(chunk: AudioChunk, short_audio: bool) -> bool:
+    if not chunk.passthrough:
+        return False # At most STT_CHUNK_MAX_SECONDS of speech
+    if chunk.end_seconds is None:
+        return not short_audio
+    return chunk.end_seconds - chunk.start_seconds > STT_SYNC_MAX_SECONDS
+
+
+async def transcribe_prepared_audio(
+    prepared_audio: PreparedAudio,
+    language_code: str,
+    sample_rate_hertz: Optional[int] = None,
+    completed_segments: Optional[Dict[int, TranscriptSegment]] = None,
+    on_segment: Optional[Callable[[int, TranscriptSegment], None]] = None,
+    short_audio: bool = False,
+) -> Tuple[List[TranscriptSegment], Optional[str]]:
+    """
+    Transcribes every chunk of `prepared_audio`, except those in `completed_segments`; returns the
+    segments in time order and the detected language. `on_segment` sees each segment as it finishes.
+    """
+    concurrency = asyncio.Semaphore(max(1, settings.AUDIO_CHUNK_MAX_CONCURRENCY))
+    chunk_sample_rate_hertz = prepared_audio.sample_rate_hertz or sample_rate_hertz
+    completed_segments = completed_segments or {}
+
+    async def transcribe_chunk(chunk_index: int, chunk: AudioChunk) -> Tuple[TranscriptSegment, Optional[str]]:
+        if chunk_index in completed_segments:
+            return completed_segments[chunk_index], None
+        transcribe = stt_client.transcribe_audio_gcp_long_running_async if _needs_long_running(chunk, short_audio) else stt_client.transcribe_audio_gcp
+        async with concurrency:
+            stt_result = await transcribe(audio_content=chunk.audio_bytes, language_code=language_code, sample_rate_hertz=chunk_sample_rate_hertz)
+        segment = TranscriptSegment(
+            start_seconds=chunk.start_seconds,
+            end_seconds=chunk.end_seconds,
+            transcript=stt_result.get("transcript"),
+            confidence=stt_result.get("confidence"),
+            stt_error=stt_result.get("error"),
+        )
+        if on_segment is not None:
+            on_segment(chunk_index, segment)
+        return segment, stt_result.get("detected_language_code") if segment.transcript else None
+
+    results = await asyncio.gather(*(transcribe_chunk(chunk_index, chunk) for chunk_index, chunk in enumerate(prepared_audio.chunks)))
+    segments = [segment for segment, _ in results]
+    detected_language = next((language for _, language in results if language), None)
+    failed_chunks = sum(1 for segment in segments if segment.stt_error)
+    if failed_chunks and len(segments) > 1:
+        logger.warning("STT failed for some audio chunks.", extra={"chunks": len(segments), "failed_chunks": failed_chunks})
+    return segments, detected_language
+
+
+def stitch_transcript(segments: List[TranscriptSegment], chunks: List[AudioChunk]) -> Tuple[Optional[str], Optional[float]]:
+    """Joined transcript of the segments and their confidence, weighted by the speech in each chunk."""
+    transcribed = [(segment, chunk) for segment, chunk in zip(segments, chunks) if segment.transcript]
+    if not transcribed:
+        return None, None
+    transcript = " ".join(segment.transcript.strip() for segment, _ in transcribed).strip()
+    weights = [chunk.speech_seconds or 1.0 for _, chunk in transcribed]
+    confidence = sum((segment.confidence or 0.0) * weight for (segment, _), weight in zip(transcribed, weights)) / sum(weights)
+    return transcript or None, round(confidence, 4)
+
+
+def _first_stt_error(segments: List[TranscriptSegment]) -> Optional[str]:
+    return next((segment.stt_error for segment in segments if segment.stt_error), None)
+
+
+def _text_analysis_language(stt_detected_lang: Optional[str], language_code_stt_hint: str) -> Optional[str]:
+    lang_hint_for_text_analysis = stt_detected_lang if stt_detected_lang and "error" not in stt_detected_lang else None
+    if not lang_hint_for_text_analysis and "error" not in language_code_stt_hint: # Fallback to original hint if STT didn't return one
+        lang_hint_for_text_analysis = language_code_stt_hint
+    return lang_hint_for_text_analysis
+
+
+def _timeline_entry(chunks: List[AudioChunk], analysis: Optional[TextAnalysisResponse], error: Optional[str] = None) -> RiskTimelineEntry:
+    return RiskTimelineEntry(
+        start_seconds=chunks[0].start_seconds,
+        end_seconds=chunks[-1].end_seconds,
+        peaceguard_risk=analysis.peaceguard_risk if analysis else None,
+        flagged_keywords=analysis.flagged_keywords if analysis else [],
+        ews_alerts=analysis.ews_alerts if analysis else None,
+        error=error,
+    )
+
+
+async def analyze_transcript_windows(
+    transcript: str, segments: List[TranscriptSegment], chunks: List[AudioChunk], language: Optional[str]
+) -> Tuple[TextAnalysisResponse, List[RiskTimelineEntry]]:
+    """
+    Analyzes the whole transcript, and each risk window's part of it for the timeline. Windows are
+    analyzed side by side under the same bound as the chunks; a clip of one window reuses the
+    whole-transcript analysis.
+    """
+    windows: Dict[int, List[Tuple[TranscriptSegment, AudioChunk]]] = {}
+    for segment, chunk in zip(segments, chunks):
+        windows.setdefault(chunk.window_index, []).append((segment, chunk))
+    if len(windows) <= 1:
+        overall = await analyze_text_for_misinfo(TextAnalysisRequest(text=transcript, language=language))
+        return overall, [_timeline_entry(chunks, overall)]
+
+    concurrency = asyncio.Semaphore(max(1, settings.AUDIO_CHUNK_MAX_CONCURRENCY))
+
+    async def analyze(text: str) -> TextAnalysisResponse:
+        async with concurrency:
+            return await analyze_text_for_misinfo(TextAnalysisRequest(text=text, language=language))
+
+    window_parts = [list(zip(*window)) for _, window in sorted(windows.items())]
+    window_texts = [stitch_transcript(list(window_segments), list(window_chunks))[0] for window_segments, window_chunks in window_parts]
+    overall, *window_analyses = await asyncio.gather(
+        analyze(transcript), *(analyze(text) for text in window_texts if text)
+    )
+    analyses = iter(window_analyses)
+    timeline = []
+    for (window_segments, window_chunks), text in zip(window_parts, window_texts):
+        if text:
+            timeline.append(_timeline_entry(list(window_chunks), next(analyses)))
+        else:
+            timeline.append(_timeline_entry(list(window_chunks), None, error=f"STT Error: {_first_stt_error(list(window_segments)) or 'No transcript returned.'}"))
+    return overall, timeline
+
 
 async def analyze_audio_content(
-    audio_bytes: bytes, 
+    audio: AudioSource,
     language_code_stt_hint: str = "en-US",
-    sample_rate_hertz: Optional[int] = None
+    sample_rate_hertz: Optional[int] = None,
+    observer: Optional[AudioAnalysisObserver] = None
 ) -> AudioAnalysisResponse:
-    if not audio_bytes:
+    if not audio: # Encoded bytes, or the path of the file (background jobs: never read whole)
         return AudioAnalysisResponse(overall_process_error="No audio content provided.")
+    observer = observer or AudioAnalysisObserver()
+
+    # 16 kHz mono FLAC chunks of the utterances only; formats that cannot be decoded here are sent as they are
+    observer.on_stage(STAGE_PREPROCESSING)
+    with metrics.time_stage(metrics.STAGE_AUDIO_PREPROCESSING):
+        prepared_audio = await run_in_stt_executor(prepare_audio_for_stt, audio, "upload")
+    audio_report = {
+        "audio_seconds_received": prepared_audio.seconds_received,
+        "audio_seconds_sent_to_stt": prepared_audio.seconds_sent,
+        "stt_audio_sent_ratio": prepared_audio.sent_ratio,
+        "stt_chunks": len(prepared_audio.chunks),
+    }
+    if not prepared_audio.chunks:
+        return AudioAnalysisResponse(
+            stt_error="STT Error: No speech detected in audio.",
+            stt_detected_language_code=language_code_stt_hint,
+            overall_process_error="Failed to obtain a usable transcript from STT.",
+            **audio_report
+        )
 
-    print(f"Initiating STT (synchronous) for audio. Language hint for STT: {language_code_stt_hint}, Sample rate hint: {sample_rate_hertz}")
-    stt_result = stt_client.transcribe_audio_gcp_sync(
-        audio_content=audio_bytes, 
-        language_code=language_code_stt_hint,
-        sample_rate_hertz=sample_rate_hertz
+    logger.info(
+        "Starting STT.",
+        extra={"audio_bytes": prepared_audio.bytes_sent, "language_hint": language_code_stt_hint, "utterances": prepared_audio.utterances, **audio_report, "sampled": True}
+    )
+    completed_segments = observer.on_prepared(prepared_audio)
+    observer.on_stage(STAGE_TRANSCRIBING)
+    segments, stt_detected_lang = await transcribe_prepared_audio(
+        prepared_audio, language_code_stt_hint, sample_rate_hertz, completed_segments=completed_segments, on_segment=observer.on_segment
     )
-    
-    transcript = stt_result.get("transcript")
-    stt_confidence = stt_result.get("confidence")
-    stt_error_message = stt_result.get("error")
-    stt_detected_lang = stt_result.get("detected_language_code", language_code_stt_hint)
+    transcript, stt_confidence = stitch_transcript(segments, prepared_audio.chunks)
+    stt_detected_lang = stt_detected_lang or language_code_stt_hint
+    first_stt_error = _first_stt_error(segments)
 
-    if stt_error_message or not transcript:
+    if not transcript:
         return AudioAnalysisResponse(
             original_transcript=transcript,
             stt_confidence=stt_confidence,
-            stt_error=f"STT Error: {stt_error_message or 'No transcript returned.'}",
+            stt_error=f"STT Error: {first_stt_error or 'No transcript returned.'}",
             stt_detected_language_code=stt_detected_lang,
-            overall_process_error="Failed to obtain a usable transcript from STT."
+            overall_process_error="Failed to obtain a usable transcript from STT.",
+            transcript_segments=segments,
+            **audio_report
         )
 
-    print(f"STT (synchronous) successful. Transcript: '{transcript[:100]}...'")
-    
-    lang_hint_for_text_analysis = stt_detected_lang if stt_detected_lang and "error" not in stt_detected_lang else None
-    if not lang_hint_for_text_analysis and "error" not in language_code_stt_hint: # Fallback to original hint if STT didn't return one
-        lang_hint_for_text_analysis = language_code_stt_hint
+    logger.info("STT successful.", extra={"transcript_chars": len(transcript), "stt_confidence": stt_confidence, "sampled": True})
+
+    lang_hint_for_text_analysis = _text_analysis_language(stt_detected_lang, language_code_stt_hint)
+    logger.debug("Analyzing transcript.", extra={"language_hint": lang_hint_for_text_analysis})
 
-    print(f"Initiating text analysis on transcript. Language hint for text analysis: {lang_hint_for_text_analysis}")
-    text_analysis_request = TextAnalysisRequest(
-        text=transcript, 
-        language=lang_hint_for_text_analysis
+    # The whole-transcript analysis includes ews_alerts; the timeline repeats it per window
+    observer.on_stage(STAGE_ANALYZING)
+    text_analysis_output_obj, risk_timeline = await analyze_transcript_windows(
+        transcript, segments, prepared_audio.chunks, lang_hint_for_text_analysis
     )
-    
-    # This call now returns a TextAnalysisResponse object which includes ews_alerts
-    text_analysis_output_obj = analyze_text_for_misinfo(text_analysis_request)
 
     # Populate EmbeddedTextAnalysisResult from the TextAnalysisResponse object
     embedded_text_results = EmbeddedTextAnalysisResult(
@@ -57,12 +236,17 @@ async def analyze_audio_content(
         flagged_keywords=text_analysis_output_obj.flagged_keywords,
         peaceguard_risk=text_analysis_output_obj.peaceguard_risk,
         ews_alerts=text_analysis_output_obj.ews_alerts, # PASS THROUGH EWS ALERTS
-        overall_explanation=text_analysis_output_obj.overall_explanation
+        overall_explanation=text_analysis_output_obj.overall_explanation,
+        lexicon_version=text_analysis_output_obj.lexicon_version
     )
-    
+
     return AudioAnalysisResponse(
         original_transcript=transcript,
         stt_confidence=stt_confidence,
+        stt_error=f"STT Error (some chunks): {first_stt_error}" if first_stt_error else None, # Partial: the transcript has gaps
         stt_detected_language_code=stt_detected_lang,
-        text_analysis_results=embedded_text_results
-    )
\ No newline at end of file
+        text_analysis_results=embedded_text_results,
+        transcript_segments=segments,
+        risk_timeline=risk_timeline,
+        **audio_report
+    )
@@ -2,25 +2,57 @@ from typing import List, Dict, Any, Optional
 from backend.app.schemas.ews_schemas import EWSAlert, EWSInput
 from backend.app.schemas.text_analysis_schemas import PeaceGuardRiskOutput # For type hinting
 from backend.app.core.notification_client import notification_client # Import the instance
+from backend.app.core import metrics
+from backend.app.core.structured_logging import get_logger
+from backend.app.core.keyword_matcher import KeywordMatcher, KeywordScan
+from backend.app.core.lexicon_store import lexicon_store
+from functools import lru_cache
+
+logger = get_logger(__name__)
 
 # --- Define Historical Conflict Precursor Patterns ---
 # These patterns would ideally be more complex and potentially loaded from a config/database
 # For MVP, we define them here. Each pattern needs:
 # - id: A unique identifier
 # - name: Human-readable name
-# - conditions_to_check: A function that takes EWSInput and returns True if pattern matches
+# - conditions_to_check: A function that takes EWSInput and its KeywordScan and returns True if pattern matches
 # - severity: e.g., "Medium", "High", "Critical"
 # - description_template: A template for the alert description
 # - recommended_action_template: Template for actions
 # - sms_template: Template for the SMS message
 
-# Helper to check for keywords (case-insensitive)
+# --- EWS keyword lexicons ---
+# Built-in defaults, registered with the lexicon store and compiled into the shared keyword matcher so
+# the auto-trigger path reuses the single scan already done for risk scoring. The lexicon file may
+# override them.
+EWS_LEXICON_ELECTION_INTEGRITY = "ews_election_integrity"
+EWS_LEXICON_UNREST_RUMOR = "ews_unrest_rumor"
+EWS_KEYWORD_LEXICONS: Dict[str, List[str]] = {
+    EWS_LEXICON_ELECTION_INTEGRITY: [
+        "rigged election", "stolen mandate", "election violence", "inec corrupt", "no election",
+        "stolen mandate 2027", # Example contextual
+    ],
+    EWS_LEXICON_UNREST_RUMOR: [
+        "uprising", "riot imminent", "total shutdown", "youth restiveness propaganda", "nationwide strike"
+    ],
+}
+lexicon_store.register_builtin_lexicons(EWS_KEYWORD_LEXICONS)
+
+@lru_cache(maxsize=64)
+def _matcher_for_keywords(keywords: tuple) -> KeywordMatcher:
+    return KeywordMatcher({"keywords": keywords})
+
+# Helper to check for keywords (case-insensitive, whole words)
 def check_keywords_in_text(text_lower: str, keywords: List[str]) -> List[str]:
-    found = []
-    for kw in keywords:
-        if kw.lower() in text_lower:
-            found.append(kw)
-    return found
+    found_terms = set(_matcher_for_keywords(tuple(keywords)).find_terms(text_lower))
+    return [kw for kw in keywords if " ".join(kw.lower().split()) in found_terms]
+
+def warm_up_keyword_matchers() -> None:
+    # Compiles each pattern's own keyword matcher ahead of the first request (the lexicon snapshot
+    # is built by text_misinfo_analyzer's warm-up)
+    for pattern in EWS_PATTERNS:
+        if "keywords" in pattern:
+            _matcher_for_keywords(tuple(pattern["keywords"]))
 
 # --- PATTERN DEFINITIONS ---
 # These would be more sophisticated, possibly involving combinations of framings, categories, sentiment thresholds, etc.
@@ -34,7 +66,7 @@ EWS_PATTERNS = [
         "recommended_action_template": "Monitor related online/offline conversations closely. Engage community leaders for de-escalation. Prepare counter-narratives focused on unity and verified facts.",
         "target_audience_suggestion": "CSOs, Peace Committees, Security Agencies, Community Leaders",
         "sms_template": "EWS Critical: Divisive rhetoric pattern detected targeting groups. Potential incitement. Monitor closely. #PeaceGuardAI",
-        "conditions_to_check": lambda data: (
+        "conditions_to_check": lambda data, scan: (
             data.peaceguard_risk.score >= 0.7 and # High or Critical PeaceGuard score
             "Us vs. Them Divisive Framing" in data.peaceguard_risk.detected_framings and
             data.gcp_sentiment is not None and data.gcp_sentiment.sentiment_score < -0.6 # Strongly negative
@@ -49,11 +81,8 @@ EWS_PATTERNS = [
         "recommended_action_template": "Amplify verified information from electoral bodies. Promote civic education on identifying election misinformation. Alert election monitors.",
         "target_audience_suggestion": "Electoral Bodies, CSOs, Media, Fact-Checkers",
         "sms_template": "EWS High: Election integrity narratives with alarmist framing detected. Potential for unrest. Promote verified info. #PeaceGuardAI",
-        "conditions_to_check": lambda data: (
-            (
-                len(check_keywords_in_text(data.original_text.lower(), ["rigged election", "stolen mandate", "election violence", "inec corrupt", "no election"])) > 0 or
-                len(check_keywords_in_text(data.original_text.lower(), ["stolen mandate 2027"])) > 0 # Example contextual
-            ) and
+        "conditions_to_check": lambda data, scan: (
+            scan.has_any(EWS_LEXICON_ELECTION_INTEGRITY) and
             "Alarmist Claim Framing" in data.peaceguard_risk.detected_framings and
             data.gcp_sentiment is not None and data.gcp_sentiment.sentiment_score < -0.5
         ),
@@ -67,8 +96,8 @@ EWS_PATTERNS = [
         "recommended_action_template": "Urgently verify circulating rumors. Disseminate factual information through trusted channels. Prepare contingency plans with local authorities.",
         "target_audience_suggestion": "Security Agencies, Local Government, Community Leaders, Media",
         "sms_template": "EWS High: Rumors of escalating unrest with alarmist framing. Verify all info. Potential for disturbances. #PeaceGuardAI",
-        "conditions_to_check": lambda data: (
-            len(check_keywords_in_text(data.original_text.lower(), ["uprising", "riot imminent", "total shutdown", "youth restiveness propaganda", "nationwide strike"])) > 0 and
+        "conditions_to_check": lambda data, scan: (
+            scan.has_any(EWS_LEXICON_UNREST_RUMOR) and
             "Alarmist Claim Framing" in data.peaceguard_risk.detected_framings and
             data.peaceguard_risk.score >= 0.6 # High PeaceGuard score
         ),
@@ -77,22 +106,31 @@ EWS_PATTERNS = [
     # Add more patterns here based on research (e.g., related to specific Nigerian conflicts, Gaddafi, DRC examples)
 ]
 
-def evaluate_content_for_ews(ews_input: EWSInput) -> List[EWSAlert]:
+def evaluate_content_for_ews(ews_input: EWSInput, keyword_scan: Optional[KeywordScan] = None) -> List[EWSAlert]:
     """
     Evaluates a given EWSInput (derived from TextAnalysisResponse) against predefined EWS patterns.
+    `keyword_scan` is the scan already done by text analysis (it must include the EWS lexicons);
+    when omitted, the text is scanned here with the current lexicon snapshot.
     """
     triggered_alerts: List[EWSAlert] = []
     text_lower = ews_input.original_text.lower() # For keyword checks within patterns
+    if keyword_scan is None:
+        keyword_scan = lexicon_store.current().matcher.scan(text_lower)
 
-    print(f"EWS Input PeaceGuard Risk Score: {ews_input.peaceguard_risk.score}, Label: {ews_input.peaceguard_risk.label}")
-    print(f"EWS Input Detected Framings: {ews_input.peaceguard_risk.detected_framings}")
-    print(f"EWS Input Sentiment Score: {ews_input.gcp_sentiment.sentiment_score if ews_input.gcp_sentiment else 'N/A'}")
-
+    logger.debug(
+        "Evaluating EWS patterns.",
+        extra={
+            "risk_score": ews_input.peaceguard_risk.score,
+            "risk_label": ews_input.peaceguard_risk.label,
+            "detected_framings": ews_input.peaceguard_risk.detected_framings,
+            "sentiment_score": ews_input.gcp_sentiment.sentiment_score if ews_input.gcp_sentiment else None,
+        }
+    )
 
     for pattern in EWS_PATTERNS:
         try:
             # Pass the full ews_input to the condition checker
-            if pattern["conditions_to_check"](ews_input):
+            if pattern["conditions_to_check"](ews_input, keyword_scan):
                 # Extract implicated keywords and framings for this specific alert
                 implicated_kws = []
                 if "keywords" in pattern: # If pattern definition has specific keywords
@@ -119,8 +157,9 @@ def evaluate_content_for_ews(ews_input: EWSInput) -> List[EWSAlert]:
                     generated_sms_message=sms_message
                 )
                 triggered_alerts.append(alert)
+                metrics.EWS_PATTERN_TRIGGERS.labels(pattern["id"], pattern["severity"]).inc()
         except Exception as e:
-            print(f"Error checking EWS pattern {pattern['id']}: {e}")
+            logger.error("Error checking EWS pattern.", extra={"pattern_id": pattern["id"], "error": str(e)})
             # Optionally add a system error alert or log this more formally
             
     return triggered_alerts
@@ -128,13 +167,13 @@ def evaluate_content_for_ews(ews_input: EWSInput) -> List[EWSAlert]:
 # Example of how to use the notification client (can be called from an endpoint)
 def disseminate_ews_alert_sms(alert: EWSAlert, phone_numbers: List[str]):
     if not alert.generated_sms_message:
-        print(f"No SMS message generated for alert {alert.alert_id}. Skipping dissemination.")
+        logger.warning("No SMS message generated for alert; skipping dissemination.", extra={"alert_id": alert.alert_id})
         return {"status": "skipped", "reason": "No SMS message in alert."}
         
-    print(f"Attempting to disseminate EWS Alert '{alert.pattern_name}' via SMS.")
+    logger.info("Disseminating EWS alert via SMS.", extra={"alert_id": alert.alert_id, "pattern_name": alert.pattern_name})
     # In a real app, phone_numbers would come from a subscriber list or be determined by alert context
     if not phone_numbers:
-        print("No phone numbers provided for SMS dissemination.")
+        logger.warning("No phone numbers provided for SMS dissemination.", extra={"alert_id": alert.alert_id})
         return {"status": "skipped", "reason": "No phone numbers provided."}
         
     return notification_client.send_bulk_sms_alerts(phone_numbers, alert.generated_sms_message)
\ No newline at end of file
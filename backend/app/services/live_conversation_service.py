@@ -1,5 +1,8 @@
-from backend.app.core import stt_client
-from backend.app.services.text_misinfo_analyzer import analyze_text_content as analyze_text_for_misinfo
+from backend.app.core import metrics
+from backend.app.core.audio_normalization import prepare_audio_for_stt
+from backend.app.core.gcp_executor import run_in_stt_executor
+from backend.app.services.audio_stream_analyzer import stitch_transcript, transcribe_prepared_audio
+from backend.app.services.text_misinfo_analyzer import analyze_text_content_async as analyze_text_for_misinfo
 from backend.app.schemas.text_analysis_schemas import TextAnalysisRequest
 from backend.app.schemas.audio_analysis_schemas import AudioAnalysisResponse, EmbeddedTextAnalysisResult
 from typing import Optional
@@ -17,17 +20,28 @@ async def analyze_audio_segment(
     if not audio_bytes:
         return AudioAnalysisResponse(overall_process_error="No audio content provided for segment analysis.")
 
-    # Using synchronous STT is more efficient for short, frequent chunks
-    stt_result = stt_client.transcribe_audio_gcp_sync(
-        audio_content=audio_bytes, 
-        language_code=language_code_stt_hint,
-        sample_rate_hertz=sample_rate_hertz
-    )
+    # A segment that is all silence never reaches STT
+    with metrics.time_stage(metrics.STAGE_AUDIO_PREPROCESSING):
+        prepared_audio = await run_in_stt_executor(prepare_audio_for_stt, audio_bytes, "segment")
+    audio_report = {
+        "audio_seconds_received": prepared_audio.seconds_received,
+        "audio_seconds_sent_to_stt": prepared_audio.seconds_sent,
+        "stt_audio_sent_ratio": prepared_audio.sent_ratio,
+        "stt_chunks": len(prepared_audio.chunks),
+    }
+    if not prepared_audio.chunks:
+        return AudioAnalysisResponse(
+            stt_error="STT Error: No speech detected in segment.",
+            stt_detected_language_code=language_code_stt_hint,
+            overall_process_error="Failed to obtain a usable transcript from STT for the audio segment.",
+            **audio_report
+        )
 
-    transcript = stt_result.get("transcript")
-    stt_confidence = stt_result.get("confidence")
-    stt_error_message = stt_result.get("error")
-    stt_detected_lang = stt_result.get("detected_language_code", language_code_stt_hint)
+    # Using synchronous STT is more efficient for short, frequent chunks (a segment is normally one chunk)
+    segments, stt_detected_lang = await transcribe_prepared_audio(prepared_audio, language_code_stt_hint, sample_rate_hertz, short_audio=True)
+    transcript, stt_confidence = stitch_transcript(segments, prepared_audio.chunks)
+    stt_error_message = next((segment.stt_error for segment in segments if segment.stt_error), None)
+    stt_detected_lang = stt_detected_lang or language_code_stt_hint
 
     if stt_error_message or not transcript:
         return AudioAnalysisResponse(
@@ -35,7 +49,8 @@ async def analyze_audio_segment(
             stt_confidence=stt_confidence,
             stt_error=f"STT Error: {stt_error_message or 'No transcript returned for segment.'}",
             stt_detected_language_code=stt_detected_lang,
-            overall_process_error="Failed to obtain a usable transcript from STT for the audio segment."
+            overall_process_error="Failed to obtain a usable transcript from STT for the audio segment.",
+            **audio_report
         )
     
     # Determine language hint for text analysis
@@ -49,7 +64,7 @@ async def analyze_audio_segment(
     )
     
     # This call includes the auto-EWS trigger
-    text_analysis_output_obj = analyze_text_for_misinfo(text_analysis_request)
+    text_analysis_output_obj = await analyze_text_for_misinfo(text_analysis_request)
 
     embedded_text_results = EmbeddedTextAnalysisResult(
         text_detected_language=text_analysis_output_obj.detected_language_by_translate_api,
@@ -59,12 +74,14 @@ async def analyze_audio_segment(
         flagged_keywords=text_analysis_output_obj.flagged_keywords,
         peaceguard_risk=text_analysis_output_obj.peaceguard_risk,
         ews_alerts=text_analysis_output_obj.ews_alerts,
-        overall_explanation=text_analysis_output_obj.overall_explanation
+        overall_explanation=text_analysis_output_obj.overall_explanation,
+        lexicon_version=text_analysis_output_obj.lexicon_version
     )
     
     return AudioAnalysisResponse(
         original_transcript=transcript,
         stt_confidence=stt_confidence,
         stt_detected_language_code=stt_detected_lang,
-        text_analysis_results=embedded_text_results
+        text_analysis_results=embedded_text_results,
+        **audio_report
     )
\ No newline at end of file
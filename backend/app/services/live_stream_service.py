@@ -0,0 +1,329 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+from google.api_core import exceptions as gcp_exceptions
+
+from backend.app.config import settings
+from backend.app.core import metrics, stt_client, vad
+from backend.app.core.admission import AdmissionRejected, admission_controller, PRIORITY_LIVE
+from backend.app.core.gcp_executor import run_in_live_stream_executor
+from backend.app.core.structured_logging import get_logger
+from backend.app.schemas.audio_analysis_schemas import EmbeddedTextAnalysisResult
+from backend.app.schemas.text_analysis_schemas import TextAnalysisRequest, TextAnalysisResponse
+from backend.app.services.text_misinfo_analyzer import analyze_text_content_async as analyze_text_for_misinfo
+
+logger = get_logger(__name__)
+
+# --- Live audio sessions (WebSocket /live/stream) ---
+# A client streams raw LINEAR16 mono PCM frames; the session feeds them to one streaming recognition
+# and sends back, as JSON messages:
+#   {"type": "transcript", "is_final": false, "text": ..., "stability": ...}   interim hypothesis
+#   {"type": "transcript", "is_final": true, "text": ..., "confidence": ...}   final segment
+#   {"type": "risk", "final_segments": n, "analyzed_chars": n, "text_analysis_results": {...}}
+#   {"type": "backpressure", "queued_frames": n}   the server has stopped reading audio for now
+#   {"type": "error", "message": ...} and, last, {"type": "end", "transcript": ..., ...}
+# Voice activity detection (core/vad.py) runs on the incoming frames: silence is never sent to STT,
+# and each utterance end closes the current recognition so its final result arrives at once instead
+# of after the API's own endpointing; the next utterance opens a new one.
+# Backpressure: audio frames wait in a bounded queue (LIVE_STREAM_AUDIO_QUEUE_FRAMES). When it is
+# full the receive loop stops reading the socket until recognition catches up, so TCP flow control
+# pushes back on a client sending faster than real time; nothing is dropped. Interim transcripts are
+# the only outbound messages that may be dropped (a newer one supersedes them) when the client reads slowly.
+# Risk updates run after final segments, on the last LIVE_STREAM_RISK_WINDOW_CHARS of transcript,
+# in the live admission lane. A final arriving while an update is running just marks the transcript
+# dirty; the next update covers all of them.
+
+MIN_SAMPLE_RATE_HERTZ = 8000
+MAX_SAMPLE_RATE_HERTZ = 48000
+PCM_BYTES_PER_SAMPLE = 2
+MAX_QUEUED_INTERIM_MESSAGES = 32
+AUDIO_WAIT_POLL_SECONDS = 1.0
+RECOGNITION_TIMEOUT_MARGIN_SECONDS = 30.0
+
+_active_sessions = 0
+_sessions_started = 0
+
+
+class LiveStreamEnded(Exception):
+    pass
+
+
+def embedded_text_analysis_result(response: TextAnalysisResponse) -> EmbeddedTextAnalysisResult:
+    return EmbeddedTextAnalysisResult(
+        text_detected_language=response.detected_language_by_translate_api,
+        gcp_sentiment=response.gcp_sentiment,
+        gcp_risk_assessment=response.gcp_risk_assessment,
+        keyword_analysis_score=response.keyword_analysis_score,
+        flagged_keywords=response.flagged_keywords,
+        peaceguard_risk=response.peaceguard_risk,
+        ews_alerts=response.ews_alerts,
+        overall_explanation=response.overall_explanation,
+        lexicon_version=response.lexicon_version
+    )
+
+
+def has_session_capacity() -> bool:
+    return _active_sessions < settings.LIVE_STREAM_MAX_SESSIONS
+
+
+class LiveStreamSession:
+    def __init__(self, language_code: str, sample_rate_hertz: int):
+        self.session_id = uuid.uuid4().hex[:12]
+        self.language_code = language_code
+        self.sample_rate_hertz = sample_rate_hertz
+        # Items: PCM bytes, vad.UTTERANCE_END, or None at end of audio
+        self._audio_queue: "asyncio.Queue[Optional[Union[bytes, vad.UtteranceEnd]]]" = asyncio.Queue(maxsize=max(1, settings.LIVE_STREAM_AUDIO_QUEUE_FRAMES))
+        self._outbound: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue() # None = no more messages
+        self._closed = False
+        self._queued_interim = 0
+        self._final_segments: List[str] = []
+        self._pending_finals = 0
+        self._transcript_changed = asyncio.Event()
+        self._closing = False
+        self._aborted = threading.Event()
+        self._recognizer: Optional["asyncio.Task[None]"] = None
+        self._risk_worker: Optional["asyncio.Task[None]"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._started = time.monotonic()
+        self._vad = vad.VoiceActivityDetector(sample_rate_hertz) if settings.VAD_ENABLED else None
+        self._odd_byte = b"" # Half a sample left over from a frame of odd length
+        self.audio_bytes_received = 0
+        self.audio_bytes_sent = 0
+        self.recognitions = 0
+        self.backpressure_pauses = 0
+        self.risk_updates = 0
+        self.failed = False
+
+    # --- Lifecycle (event loop) ---
+
+    def start(self) -> None:
+        global _active_sessions, _sessions_started
+        _active_sessions += 1
+        _sessions_started += 1
+        self._loop = asyncio.get_running_loop()
+        self._recognizer = asyncio.create_task(self._run_recognition())
+        self._risk_worker = asyncio.create_task(self._run_risk_updates())
+        logger.info("Live stream session started.", extra={"session_id": self.session_id, "language_code": self.language_code, "sample_rate_hertz": self.sample_rate_hertz})
+
+    async def push_audio(self, frame: bytes) -> None:
+        if self.failed:
+            raise LiveStreamEnded("Speech recognition for this session has stopped.")
+        self.audio_bytes_received += len(frame)
+        if self._vad is None:
+            await self._queue_audio(frame)
+            return
+        frame = self._odd_byte + frame
+        usable = len(frame) - len(frame) % PCM_BYTES_PER_SAMPLE
+        self._odd_byte = frame[usable:]
+        await self._queue_vad_output(self._vad.process(np.frombuffer(frame[:usable], dtype="<i2")))
+
+    async def _queue_vad_output(self, output: vad.VadOutput) -> None:
+        for item in output:
+            await self._queue_audio(item if item is vad.UTTERANCE_END else item.astype("<i2").tobytes())
+
+    async def _queue_audio(self, item: Union[bytes, vad.UtteranceEnd]) -> None:
+        if isinstance(item, bytes):
+            self.audio_bytes_sent += len(item)
+        if self._audio_queue.full():
+            self.backpressure_pauses += 1
+            metrics.LIVE_STREAM_BACKPRESSURE.inc()
+            self._emit({"type": "backpressure", "queued_frames": self._audio_queue.qsize()})
+        await self._audio_queue.put(item)
+
+    async def finish(self) -> None:
+        """End of audio: waits for the last final results and risk update, then emits the "end" message."""
+        if self._vad is not None and not self.failed:
+            await self._queue_vad_output(self._vad.flush())
+        await self._audio_queue.put(None)
+        await self._recognizer
+        self._closing = True
+        self._transcript_changed.set()
+        await self._risk_worker
+        self._emit({
+            "type": "end",
+            "transcript": self.transcript(),
+            "audio_seconds": round(self.audio_seconds(), 2),
+            "audio_seconds_sent_to_stt": round(self.audio_seconds(self.audio_bytes_sent), 2),
+            "stt_audio_sent_ratio": self.sent_ratio(),
+            "recognitions": self.recognitions,
+            "risk_updates": self.risk_updates,
+            "backpressure_pauses": self.backpressure_pauses,
+        })
+        self._close(outcome="error" if self.failed else "completed")
+
+    def abort(self) -> None:
+        # Client went away: stop recognition (the thread notices within AUDIO_WAIT_POLL_SECONDS) and risk updates
+        self._aborted.set()
+        if self._risk_worker is not None:
+            self._risk_worker.cancel()
+        self._close(outcome="error" if self.failed else "aborted")
+
+    def _close(self, outcome: str) -> None:
+        global _active_sessions
+        if self._closed:
+            return
+        self._closed = True
+        self._outbound.put_nowait(None)
+        _active_sessions -= 1
+        metrics.LIVE_STREAM_SESSIONS.labels(outcome).inc()
+        vad.record_stt_audio("live_stream", self.audio_seconds(), self.audio_seconds(self.audio_bytes_sent))
+        logger.info(
+            "Live stream session ended.",
+            extra={"session_id": self.session_id, "outcome": outcome, "audio_seconds": round(self.audio_seconds(), 2), "stt_audio_sent_ratio": self.sent_ratio(), "recognitions": self.recognitions, "backpressure_pauses": self.backpressure_pauses, "duration_seconds": round(time.monotonic() - self._started, 2)}
+        )
+
+    async def next_message(self) -> Optional[Dict[str, Any]]:
+        """Next message to send to the client; None once the session has closed."""
+        message = await self._outbound.get()
+        if message is not None and message["type"] == "transcript" and not message["is_final"]:
+            self._queued_interim -= 1
+        return message
+
+    def _emit(self, message: Dict[str, Any], droppable: bool = False) -> None:
+        if self._closed:
+            return
+        if droppable:
+            if self._queued_interim >= MAX_QUEUED_INTERIM_MESSAGES:
+                return # Client is reading slowly; a newer interim result will follow
+            self._queued_interim += 1
+        self._outbound.put_nowait(message)
+
+    def transcript(self) -> str:
+        return " ".join(self._final_segments)
+
+    def audio_seconds(self, audio_bytes: Optional[int] = None) -> float:
+        audio_bytes = self.audio_bytes_received if audio_bytes is None else audio_bytes
+        return audio_bytes / (self.sample_rate_hertz * PCM_BYTES_PER_SAMPLE)
+
+    def sent_ratio(self) -> float:
+        return round(self.audio_bytes_sent / self.audio_bytes_received, 4) if self.audio_bytes_received else 1.0
+
+    # --- Streaming recognition (live-stream executor thread) ---
+
+    async def _run_recognition(self) -> None:
+        try:
+            await run_in_live_stream_executor(self._recognize_blocking, self._loop)
+        except Exception as e:
+            self.failed = True
+            logger.error("Live stream recognition failed.", extra={"session_id": self.session_id, "error": str(e)})
+            self._emit({"type": "error", "message": f"Speech recognition failed: {e}"})
+            while not self._audio_queue.empty(): # Unblock a receive loop waiting on a full queue
+                self._audio_queue.get_nowait()
+
+    def _next_chunk(self, loop: asyncio.AbstractEventLoop) -> Optional[Union[bytes, vad.UtteranceEnd]]:
+        future = asyncio.run_coroutine_threadsafe(self._audio_queue.get(), loop)
+        while True:
+            try:
+                return future.result(timeout=AUDIO_WAIT_POLL_SECONDS)
+            except concurrent.futures.TimeoutError:
+                if self._aborted.is_set():
+                    future.cancel()
+                    return None
+
+    def _recognition_audio(self, loop: asyncio.AbstractEventLoop, first_chunk: bytes, end_of_audio: List[bool]) -> Iterator[bytes]:
+        # Audio for one streaming recognition; ends at an utterance end, at end of audio or after
+        # LIVE_STREAM_MAX_RECOGNITION_SECONDS
+        max_bytes = settings.LIVE_STREAM_MAX_RECOGNITION_SECONDS * self.sample_rate_hertz * PCM_BYTES_PER_SAMPLE
+        sent_bytes = len(first_chunk)
+        yield first_chunk
+        while sent_bytes < max_bytes:
+            chunk = self._next_chunk(loop)
+            if chunk is None:
+                end_of_audio[0] = True
+                return
+            if chunk is vad.UTTERANCE_END:
+                return
+            sent_bytes += len(chunk)
+            yield chunk
+
+    def _recognize_blocking(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Recognitions are opened on the first audio after the previous one ended, so a session that
+        # is silent for a long time (no frames) holds no stream open
+        streaming_config = stt_client.build_streaming_config(self.language_code, self.sample_rate_hertz)
+        timeout_seconds = settings.LIVE_STREAM_MAX_RECOGNITION_SECONDS + RECOGNITION_TIMEOUT_MARGIN_SECONDS
+        end_of_audio = [False]
+        while not end_of_audio[0]:
+            first_chunk = self._next_chunk(loop)
+            if first_chunk is None:
+                return
+            if first_chunk is vad.UTTERANCE_END:
+                continue
+            self.recognitions += 1
+            audio = self._recognition_audio(loop, first_chunk, end_of_audio)
+            try:
+                for response in stt_client.streaming_recognize_blocking(audio, streaming_config, timeout_seconds):
+                    for result in response.results:
+                        if result.alternatives:
+                            loop.call_soon_threadsafe(self._on_result, result.is_final, result.alternatives[0].transcript, result.alternatives[0].confidence, result.stability)
+            except gcp_exceptions.OutOfRange as e:
+                # The API ends a stream after a long gap without audio or at its duration cap; the
+                # next frame opens a new recognition
+                logger.info("Streaming recognition ended by the API; reopening on next audio.", extra={"session_id": self.session_id, "reason": str(e)})
+
+    def _on_result(self, is_final: bool, text: str, confidence: float, stability: float) -> None:
+        text = text.strip()
+        if not text:
+            return
+        if is_final:
+            self._final_segments.append(text)
+            self._pending_finals += 1
+            self._transcript_changed.set()
+            self._emit({"type": "transcript", "is_final": True, "text": text, "confidence": round(confidence, 4)})
+        else:
+            self._emit({"type": "transcript", "is_final": False, "text": text, "stability": round(stability, 3)}, droppable=True)
+
+    # --- Incremental risk updates (event loop) ---
+
+    def _risk_window(self) -> str:
+        window = self.transcript()
+        if len(window) > settings.LIVE_STREAM_RISK_WINDOW_CHARS:
+            window = window[-settings.LIVE_STREAM_RISK_WINDOW_CHARS:]
+            window = window.split(" ", 1)[-1] # Start on a word boundary
+        return window
+
+    async def _run_risk_updates(self) -> None:
+        while True:
+            await self._transcript_changed.wait()
+            self._transcript_changed.clear()
+            if not self._pending_finals:
+                if self._closing:
+                    return
+                continue
+            final_segments, self._pending_finals = self._pending_finals, 0
+            if final_segments > 1:
+                metrics.LIVE_STREAM_RISK_UPDATES_SKIPPED.inc(final_segments - 1)
+            await self._send_risk_update()
+
+    async def _send_risk_update(self) -> None:
+        window = self._risk_window()
+        try:
+            async with admission_controller.admit(PRIORITY_LIVE):
+                text_analysis_output_obj = await analyze_text_for_misinfo(TextAnalysisRequest(text=window, language=self.language_code))
+        except AdmissionRejected:
+            self._emit({"type": "error", "message": "Risk update skipped: server busy. The next final transcript will retry."})
+            return
+        except Exception as e:
+            logger.error("Live stream risk update failed.", extra={"session_id": self.session_id, "error": str(e)})
+            self._emit({"type": "error", "message": f"Risk update failed: {e}"})
+            return
+        self.risk_updates += 1
+        self._emit({
+            "type": "risk",
+            "final_segments": len(self._final_segments),
+            "analyzed_chars": len(window),
+            "text_analysis_results": embedded_text_analysis_result(text_analysis_output_obj).model_dump(mode="json", by_alias=True),
+        })
+
+
+def live_stream_stats() -> Dict[str, Any]:
+    return {
+        "active_sessions": _active_sessions,
+        "max_sessions": settings.LIVE_STREAM_MAX_SESSIONS,
+        "sessions_started": _sessions_started,
+        "audio_queue_frames": settings.LIVE_STREAM_AUDIO_QUEUE_FRAMES,
+    }
@@ -1,6 +1,7 @@
 from backend.app.schemas.text_analysis_schemas import (
     TextAnalysisRequest, 
     TextAnalysisResponse, 
+    BatchTextAnalysisItemResult,
     KeywordMatch,
     GCPSentimentOutput,
     GCPCategoryMatch,
@@ -9,8 +10,22 @@ from backend.app.schemas.text_analysis_schemas import (
 )
 from backend.app.schemas.ews_schemas import EWSInput, EWSAlert # NEW: Import EWS schemas
 from backend.app.core import nlp_utils
+from backend.app.core.keyword_matcher import KeywordMatcher, KeywordScan
+from backend.app.core.lexicon_store import lexicon_store
+from backend.app.core import nlp_cache
+from backend.app.core.single_flight import SingleFlight
+from backend.app.core.deadline import Deadline, get_current_deadline, set_current_deadline, reset_current_deadline
+from backend.app.core import circuit_breaker
+from backend.app.core.circuit_breaker import CircuitOpenError
+from backend.app.core import metrics
+from backend.app.core.structured_logging import get_logger
+from backend.app.config import settings
 from backend.app.services import early_warning_service # NEW: Import EWS service
-from typing import List, Tuple, Optional
+from typing import Any, AsyncContextManager, AsyncIterator, Awaitable, Callable, List, Tuple, Optional
+import asyncio
+import time
+
+logger = get_logger(__name__)
 
 # --- PeaceGuard AI Risk Scoring Parameters (Tuning Section) ---
 DANGEROUS_KEYWORD_MULTIPLIER = 0.3
@@ -58,8 +73,25 @@ FRAMING_PATTERN_MULTIPLIER = 0.25
 
 # NEW: Threshold for auto-triggering EWS check
 EWS_AUTO_TRIGGER_RISK_SCORE_THRESHOLD = RISK_LABEL_MEDIUM_THRESHOLD # e.g., 0.3
+
+# Largest amounts a GCP stage can add to the score, used by cascade mode (settings.ANALYSIS_CASCADE_ENABLED).
+# Sentiment adds at most one of the two sentiment increments. The category contribution is capped in
+# scoring (settings.CATEGORY_RISK_MAX_CONTRIBUTION); by default at one weighted category at full confidence.
+SENTIMENT_MAX_RISK_CONTRIBUTION = max(BASE_SENTIMENT_RISK_ADDITION, SENTIMENT_AMPLIFICATION_BOOST)
+DEFAULT_CATEGORY_MAX_RISK_CONTRIBUTION = max(CATEGORY_RISK_WEIGHTS.values())
+ANALYSIS_STAGE_SENTIMENT = "gcp_sentiment"
+ANALYSIS_STAGE_CLASSIFICATION = "gcp_classification"
+ANALYSIS_STAGE_LANGUAGE_DETECTION = "language_detection"
+# Backend behind each GCP stage, for reporting degraded mode
+STAGE_CIRCUIT_BREAKERS = {
+    ANALYSIS_STAGE_LANGUAGE_DETECTION: circuit_breaker.translate_breaker,
+    ANALYSIS_STAGE_SENTIMENT: circuit_breaker.language_breaker,
+    ANALYSIS_STAGE_CLASSIFICATION: circuit_breaker.language_breaker,
+}
 # --- End of Tuning Section ---
 
+# Built-in lexicons: the fallback for categories the lexicon file (core/lexicon_store.py) does not
+# define. Scoring reads the terms from the request's lexicon snapshot, not from these constants.
 DANGEROUS_KEYWORDS = ["kill", "attack", "bomb", "riot", "false flag", "massacre", "genocide", "execute", "executed", "assassinate"]
 SENSITIVE_KEYWORDS = [
     "protest", "election", "government", "crisis", "rumor", "unrest", "corruption", 
@@ -67,12 +99,49 @@ SENSITIVE_KEYWORDS = [
     "foreign interference", "uprising", "masters"
 ]
 
+# --- Compiled keyword matcher ---
+# Every lexicon used on the hot path (display keywords, contextual concerns, framing patterns and
+# the EWS pattern keywords) is compiled into a single whole-word automaton per lexicon version. The
+# current snapshot is taken once per analysis; its scan (and scan.version) is used for everything after.
+LEXICON_DANGEROUS = "dangerous"
+LEXICON_SENSITIVE = "sensitive"
+LEXICON_CONTEXTUAL_CONCERN = "contextual_concern"
+LEXICON_US_VS_THEM = "us_vs_them"
+LEXICON_ALARMIST = "alarmist"
+DISPLAY_KEYWORD_LEXICONS = (LEXICON_DANGEROUS, LEXICON_SENSITIVE, LEXICON_CONTEXTUAL_CONCERN)
+
+lexicon_store.register_builtin_lexicons({
+    LEXICON_DANGEROUS: DANGEROUS_KEYWORDS,
+    LEXICON_SENSITIVE: SENSITIVE_KEYWORDS,
+    LEXICON_CONTEXTUAL_CONCERN: CONTEXTUAL_CONCERN_KEYWORDS_LIST,
+    LEXICON_US_VS_THEM: US_VS_THEM_PATTERNS,
+    LEXICON_ALARMIST: ALARMIST_CLAIM_PATTERNS,
+})
+
+def get_keyword_matcher() -> KeywordMatcher:
+    return lexicon_store.current().matcher
+
+def risk_label_for_score(score: float) -> str:
+    if score >= RISK_LABEL_CRITICAL_THRESHOLD: return "Critical"
+    if score >= RISK_LABEL_HIGH_THRESHOLD: return "High"
+    if score >= RISK_LABEL_MEDIUM_THRESHOLD: return "Medium"
+    return "Low"
+
+def category_max_risk_contribution() -> float:
+    if settings.CATEGORY_RISK_MAX_CONTRIBUTION is not None:
+        return settings.CATEGORY_RISK_MAX_CONTRIBUTION
+    return DEFAULT_CATEGORY_MAX_RISK_CONTRIBUTION
+
 def calculate_peaceguard_risk(
     text_lower: str, 
     gcp_sentiment: Optional[GCPSentimentOutput],
     gcp_risk_assessment: Optional[GCPRiskAssessmentOutput],
-    flagged_keywords: List[KeywordMatch] 
+    flagged_keywords: List[KeywordMatch],
+    keyword_scan: Optional[KeywordScan] = None
 ) -> PeaceGuardRiskOutput:
+    if keyword_scan is None:
+        keyword_scan = get_keyword_matcher().scan(text_lower)
+
     current_risk_score = 0.0
     contributing_factors: List[str] = []
     detected_framings_list: List[str] = []
@@ -80,18 +149,19 @@ def calculate_peaceguard_risk(
     found_dangerous_keywords_actual: List[str] = []
     found_sensitive_keywords_actual: List[str] = []
 
-    # 1. GCP Content Categories
+    # 1. GCP Content Categories (capped, so cascade mode can bound them exactly)
+    category_score_contribution = 0.0
     if gcp_risk_assessment and gcp_risk_assessment.risk_categories:
         for cat_match in gcp_risk_assessment.risk_categories:
             if cat_match.confidence >= CATEGORY_CONFIDENCE_THRESHOLD:
                 for defined_risky_cat_keyword, weight in CATEGORY_RISK_WEIGHTS.items():
                     if defined_risky_cat_keyword.lower() in cat_match.category.lower():
-                        score_add = weight * cat_match.confidence
-                        current_risk_score += score_add
+                        category_score_contribution += weight * cat_match.confidence
                         contributing_factors.append(
                             f"Content classified by GCP as potentially related to '{cat_match.category}' (confidence: {cat_match.confidence*100:.1f}%)."
                         )
                         break 
+        current_risk_score += min(category_score_contribution, category_max_risk_contribution())
     
     # 2. Standard Keywords
     raw_keyword_score_contribution = 0.0
@@ -99,11 +169,11 @@ def calculate_peaceguard_risk(
     sensitive_hits_count = 0
     if flagged_keywords:
         for kw_match in flagged_keywords:
-            if kw_match.keyword in DANGEROUS_KEYWORDS:
+            if keyword_scan.in_category(kw_match.keyword, LEXICON_DANGEROUS):
                 raw_keyword_score_contribution += DANGEROUS_KEYWORD_MULTIPLIER * kw_match.count
                 if kw_match.keyword not in found_dangerous_keywords_actual: found_dangerous_keywords_actual.append(kw_match.keyword)
                 dangerous_hits_count += kw_match.count
-            elif kw_match.keyword in SENSITIVE_KEYWORDS:
+            elif keyword_scan.in_category(kw_match.keyword, LEXICON_SENSITIVE):
                 raw_keyword_score_contribution += SENSITIVE_KEYWORD_MULTIPLIER * kw_match.count
                 if kw_match.keyword not in found_sensitive_keywords_actual: found_sensitive_keywords_actual.append(kw_match.keyword)
                 sensitive_hits_count += kw_match.count
@@ -117,35 +187,22 @@ def calculate_peaceguard_risk(
     # 3. Contextual Concern Keywords
     found_contextual_concerns_actual = []
     contextual_concern_score_contribution = 0.0
-    for concern_keyword in CONTEXTUAL_CONCERN_KEYWORDS_LIST:
-        if concern_keyword in text_lower: # Assumes concern_keywords are lowercase
-            occurrences = text_lower.count(concern_keyword)
-            contextual_concern_score_contribution += (CONTEXTUAL_CONCERN_KEYWORD_MULTIPLIER * occurrences)
-            if concern_keyword not in found_contextual_concerns_actual:
-                 found_contextual_concerns_actual.append(concern_keyword)
+    for concern_keyword, occurrences in keyword_scan.counts(LEXICON_CONTEXTUAL_CONCERN).items():
+        contextual_concern_score_contribution += (CONTEXTUAL_CONCERN_KEYWORD_MULTIPLIER * occurrences)
+        found_contextual_concerns_actual.append(concern_keyword)
     if found_contextual_concerns_actual:
         current_risk_score += contextual_concern_score_contribution
         contributing_factors.append(
             f"Detected highly sensitive contextual terms: '{', '.join(sorted(found_contextual_concerns_actual))}'.")
 
     # 4. Manipulative Framing Detection
-    us_vs_them_detected = False
-    for pattern in US_VS_THEM_PATTERNS: # Assumes patterns are lowercase
-        if pattern in text_lower:
-            us_vs_them_detected = True
-            break
-    if us_vs_them_detected:
+    if keyword_scan.has_any(LEXICON_US_VS_THEM):
         current_risk_score += FRAMING_PATTERN_MULTIPLIER
         if FRAMING_TYPE_US_VS_THEM not in detected_framings_list:
              detected_framings_list.append(FRAMING_TYPE_US_VS_THEM)
         contributing_factors.append(f"Detected '{FRAMING_TYPE_US_VS_THEM}'.")
 
-    alarmist_claim_detected = False
-    for pattern in ALARMIST_CLAIM_PATTERNS: # Assumes patterns are lowercase
-        if pattern in text_lower:
-            alarmist_claim_detected = True
-            break
-    if alarmist_claim_detected:
+    if keyword_scan.has_any(LEXICON_ALARMIST):
         current_risk_score += FRAMING_PATTERN_MULTIPLIER
         if FRAMING_TYPE_ALARMIST not in detected_framings_list:
             detected_framings_list.append(FRAMING_TYPE_ALARMIST)
@@ -176,11 +233,7 @@ def calculate_peaceguard_risk(
             )
 
     final_score = round(max(0.0, current_risk_score), 3)
-
-    risk_label = "Low"
-    if final_score >= RISK_LABEL_CRITICAL_THRESHOLD: risk_label = "Critical"
-    elif final_score >= RISK_LABEL_HIGH_THRESHOLD: risk_label = "High"
-    elif final_score >= RISK_LABEL_MEDIUM_THRESHOLD: risk_label = "Medium"
+    risk_label = risk_label_for_score(final_score)
 
     if not contributing_factors and final_score < 0.1:
         contributing_factors.append("No significant risk indicators found based on current rules.")
@@ -192,19 +245,18 @@ def calculate_peaceguard_risk(
         detected_framings=sorted(list(set(detected_framings_list)))
     )
 
-def analyze_text_content(request: TextAnalysisRequest) -> TextAnalysisResponse:
-    text_to_analyze = request.text
-    user_language_hint = request.language_hint
-    text_lower = text_to_analyze.lower()
-
-    lang_detected_by_translate = nlp_utils.detect_language_gcp_sync(text_to_analyze)
-    
-    lang_for_nlu_api = None
+def _resolve_nlu_language(user_language_hint: Optional[str], lang_detected_by_translate: Optional[str]) -> Optional[str]:
     if user_language_hint and "error" not in str(user_language_hint):
-        lang_for_nlu_api = user_language_hint
-    elif lang_detected_by_translate and "error" not in str(lang_detected_by_translate):
-        lang_for_nlu_api = lang_detected_by_translate
+        return user_language_hint
+    if lang_detected_by_translate and "error" not in str(lang_detected_by_translate):
+        return lang_detected_by_translate
+    return None
 
+def _flag_keywords(
+    keyword_scan: KeywordScan,
+    lang_for_nlu_api: Optional[str],
+    lang_detected_by_translate: Optional[str]
+) -> Tuple[List[KeywordMatch], float]:
     found_keywords: List[KeywordMatch] = []
     keyword_score_contribution_for_display = 0.0
     
@@ -214,47 +266,357 @@ def analyze_text_content(request: TextAnalysisRequest) -> TextAnalysisResponse:
        (isinstance(current_lang_for_keywords_check, str) and "error" in current_lang_for_keywords_check) or \
        (isinstance(current_lang_for_keywords_check, str) and current_lang_for_keywords_check.startswith('en')):
         run_keyword_analysis = True
-        
+
     if run_keyword_analysis:
-        # Combine all keyword lists for comprehensive flagging for display
-        # Ensure all keywords in lists are lowercase for matching with text_lower
-        all_display_keywords = set(
-            [k.lower() for k in DANGEROUS_KEYWORDS] + 
-            [k.lower() for k in SENSITIVE_KEYWORDS] + 
-            [k.lower() for k in CONTEXTUAL_CONCERN_KEYWORDS_LIST]
-        )
-        for keyword in all_display_keywords:
-            count = text_lower.count(keyword)
-            if count > 0:
+        displayed_keywords = set()
+        for lexicon in DISPLAY_KEYWORD_LEXICONS:
+            for keyword, count in keyword_scan.counts(lexicon).items():
+                if keyword in displayed_keywords:
+                    continue # Term listed in more than one display lexicon
+                displayed_keywords.add(keyword)
                 found_keywords.append(KeywordMatch(keyword=keyword, count=count))
                 # This score is just for the keyword_analysis_score field (capped 0-1)
                 # The main PeaceGuard score calculates keyword impact differently
-                if keyword in DANGEROUS_KEYWORDS:
+                if keyword_scan.in_category(keyword, LEXICON_DANGEROUS):
                     keyword_score_contribution_for_display += (DANGEROUS_KEYWORD_MULTIPLIER * count)
-                elif keyword in SENSITIVE_KEYWORDS: # Contextual not added to this specific score
+                elif keyword_scan.in_category(keyword, LEXICON_SENSITIVE): # Contextual not added to this specific score
                     keyword_score_contribution_for_display += (SENSITIVE_KEYWORD_MULTIPLIER * count)
     
-    keyword_analysis_final_score = min(keyword_score_contribution_for_display, 1.0)
+    return found_keywords, min(keyword_score_contribution_for_display, 1.0)
 
-    gcp_sentiment_raw = nlp_utils.get_sentiment_gcp_sync(text_to_analyze, language_code=lang_for_nlu_api)
-    gcp_sentiment_data = GCPSentimentOutput(**gcp_sentiment_raw)
+def _has_usable_language_hint(request: TextAnalysisRequest) -> bool:
+    return bool(request.language_hint and "error" not in str(request.language_hint))
+
+def analyze_text_content(request: TextAnalysisRequest) -> TextAnalysisResponse:
+    """Blocking entry point for callers without an event loop (scripts, tests); runs analyze_text_content_async."""
+    return asyncio.run(analyze_text_content_async(request))
+
+# Identical texts analyzed concurrently (viral messages) share one GCP computation and EWS evaluation
+text_analysis_single_flight = SingleFlight("analyze_text")
+
+async def analyze_text_content_async(request: TextAnalysisRequest) -> TextAnalysisResponse:
+    """
+    Analyzes one text. The GCP calls run concurrently on the bounded GCP executor: sentiment and
+    classification always overlap, and language detection overlaps with both when the caller
+    supplied a usable language hint.
+    Concurrent requests for the same normalized text, language hint and latency budget are coalesced.
+    With `request.deadline_ms` (or a deadline already set by the caller, e.g. the audio endpoint),
+    GCP stages still running when the budget runs out are dropped and the risk is marked partial.
+    """
+    coalescing_key = nlp_cache.make_cache_key("analyze_text", request.text, f"{request.language_hint}|{request.deadline_ms}")
+    deadline_token = None
+    if request.deadline_ms is not None:
+        deadline_token = set_current_deadline(Deadline.from_budget_ms(request.deadline_ms))
+    try:
+        # The shared task copies the current context, so it runs under this request's deadline
+        with metrics.time_stage(metrics.STAGE_TEXT_ANALYSIS):
+            response = await text_analysis_single_flight.do(coalescing_key, lambda: _analyze_text_content_async(request))
+    finally:
+        if deadline_token is not None:
+            reset_current_deadline(deadline_token)
+    if response.original_text != request.text:
+        # Joined an analysis of a copy that differs only in whitespace/normalization
+        response = response.model_copy(update={"original_text": request.text})
+    return response
+
+async def _await_stage(stage_name: str, stage: Awaitable[Any], missing_inputs: List[str]) -> Optional[Any]:
+    """
+    Awaits one GCP stage within the current request deadline. A stage that does not finish in time
+    is cancelled, recorded in `missing_inputs` and yields None; without a deadline it is awaited fully.
+    A stage whose backend circuit breaker is open is recorded the same way (degraded mode).
+    """
+    deadline = get_current_deadline()
+    started = time.perf_counter()
+    try:
+        if deadline is None:
+            result = await stage
+        else:
+            result = await asyncio.wait_for(stage, timeout=deadline.remaining())
+        metrics.observe_stage(stage_name, time.perf_counter() - started)
+        return result
+    except CircuitOpenError:
+        metrics.STAGE_DROPPED.labels(stage_name, "circuit_open").inc()
+        missing_inputs.append(stage_name)
+        return None
+    except asyncio.TimeoutError:
+        metrics.STAGE_DROPPED.labels(stage_name, "deadline").inc()
+        logger.warning("Analysis stage dropped: latency budget exhausted", extra={"stage": stage_name, "budget_ms": round(deadline.budget_seconds * 1000)})
+        missing_inputs.append(stage_name)
+        return None
+
+async def _analyze_text_content_async(request: TextAnalysisRequest) -> TextAnalysisResponse:
+    text_to_analyze = request.text
+    user_language_hint = request.language_hint
+    missing_inputs: List[str] = []
+
+    if settings.ANALYSIS_CASCADE_ENABLED:
+        return await _analyze_text_cascade_async(
+            request, asyncio.ensure_future(nlp_utils.detect_language(text_to_analyze)), missing_inputs
+        )
+
+    if nlp_utils.use_annotate_mode():
+        if _has_usable_language_hint(request):
+            lang_detected_by_translate, annotated = await asyncio.gather(
+                _await_stage(ANALYSIS_STAGE_LANGUAGE_DETECTION, nlp_utils.detect_language(text_to_analyze), missing_inputs),
+                _await_annotate_stage(nlp_utils.annotate(text_to_analyze, language_code=user_language_hint), missing_inputs),
+            )
+        else:
+            # Language comes from the NL response; no Translate round-trip
+            annotated = await _await_annotate_stage(nlp_utils.annotate(text_to_analyze), missing_inputs)
+            lang_detected_by_translate = annotated["language_code"]
+        return _build_text_analysis_response(
+            text_to_analyze, lang_detected_by_translate, _resolve_nlu_language(user_language_hint, lang_detected_by_translate),
+            annotated["sentiment"], annotated["classification"], missing_inputs=missing_inputs
+        )
+
+    if _has_usable_language_hint(request):
+        lang_detected_by_translate, gcp_sentiment_raw, gcp_risk_assessment_raw = await asyncio.gather(
+            _await_stage(ANALYSIS_STAGE_LANGUAGE_DETECTION, nlp_utils.detect_language(text_to_analyze), missing_inputs),
+            _await_stage(ANALYSIS_STAGE_SENTIMENT, nlp_utils.get_sentiment(text_to_analyze, language_code=user_language_hint), missing_inputs),
+            _await_stage(ANALYSIS_STAGE_CLASSIFICATION, nlp_utils.classify(text_to_analyze, language_code=user_language_hint), missing_inputs),
+        )
+        lang_for_nlu_api = user_language_hint
+    else:
+        # The NL calls need the detected language, so detection has to finish first
+        lang_detected_by_translate = await _await_stage(
+            ANALYSIS_STAGE_LANGUAGE_DETECTION, nlp_utils.detect_language(text_to_analyze), missing_inputs
+        )
+        return await _analyze_with_detected_language_async(request, lang_detected_by_translate, missing_inputs)
+
+    return _build_text_analysis_response(
+        text_to_analyze, lang_detected_by_translate, lang_for_nlu_api, gcp_sentiment_raw, gcp_risk_assessment_raw,
+        missing_inputs=missing_inputs
+    )
 
-    gcp_risk_assessment_raw = nlp_utils.get_content_categories_gcp_sync(text_to_analyze, language_code=lang_for_nlu_api)
-    gcp_risk_data = GCPRiskAssessmentOutput(
+async def _await_annotate_stage(stage: Awaitable[dict], missing_inputs: List[str]) -> dict:
+    # annotate_text carries both NL results, so dropping it loses sentiment and classification together
+    annotated = await _await_stage(ANALYSIS_STAGE_CLASSIFICATION, stage, missing_inputs)
+    if annotated is None:
+        missing_inputs.append(ANALYSIS_STAGE_SENTIMENT)
+        return {"language_code": None, "sentiment": None, "classification": None}
+    return annotated
+
+async def _analyze_with_detected_language_async(
+    request: TextAnalysisRequest,
+    lang_detected_by_translate: Optional[str],
+    missing_inputs: Optional[List[str]] = None
+) -> TextAnalysisResponse:
+    text_to_analyze = request.text
+    missing_inputs = missing_inputs if missing_inputs is not None else []
+    if settings.ANALYSIS_CASCADE_ENABLED:
+        language_detection = asyncio.get_running_loop().create_future()
+        language_detection.set_result(lang_detected_by_translate)
+        return await _analyze_text_cascade_async(request, language_detection, missing_inputs)
+
+    lang_for_nlu_api = _resolve_nlu_language(request.language_hint, lang_detected_by_translate)
+    if nlp_utils.use_annotate_mode():
+        annotated = await _await_annotate_stage(nlp_utils.annotate(text_to_analyze, language_code=lang_for_nlu_api), missing_inputs)
+        gcp_sentiment_raw, gcp_risk_assessment_raw = annotated["sentiment"], annotated["classification"]
+    else:
+        gcp_sentiment_raw, gcp_risk_assessment_raw = await asyncio.gather(
+            _await_stage(ANALYSIS_STAGE_SENTIMENT, nlp_utils.get_sentiment(text_to_analyze, language_code=lang_for_nlu_api), missing_inputs),
+            _await_stage(ANALYSIS_STAGE_CLASSIFICATION, nlp_utils.classify(text_to_analyze, language_code=lang_for_nlu_api), missing_inputs),
+        )
+    return _build_text_analysis_response(
+        text_to_analyze, lang_detected_by_translate, lang_for_nlu_api, gcp_sentiment_raw, gcp_risk_assessment_raw,
+        missing_inputs=missing_inputs
+    )
+
+# --- Tiered cascade ---
+def _stage_can_change_outcome(lower_score: float, upper_score: float) -> bool:
+    # A stage matters if the best and worst case differ in risk label or in the EWS auto-trigger
+    if risk_label_for_score(lower_score) != risk_label_for_score(upper_score):
+        return True
+    return (lower_score >= EWS_AUTO_TRIGGER_RISK_SCORE_THRESHOLD) != (upper_score >= EWS_AUTO_TRIGGER_RISK_SCORE_THRESHOLD)
+
+def _classification_needed(score_without_gcp: float) -> bool:
+    # No EWS pattern reads the GCP categories, so only the label and the trigger decision count
+    upper = score_without_gcp + category_max_risk_contribution() + SENTIMENT_MAX_RISK_CONTRIBUTION
+    return _stage_can_change_outcome(score_without_gcp, upper)
+
+def _sentiment_needed(score_without_sentiment: float) -> bool:
+    upper = score_without_sentiment + SENTIMENT_MAX_RISK_CONTRIBUTION
+    if upper >= EWS_AUTO_TRIGGER_RISK_SCORE_THRESHOLD:
+        return True # EWS patterns read the sentiment score, so it is needed whenever EWS may run
+    return _stage_can_change_outcome(score_without_sentiment, upper)
+
+async def _analyze_text_cascade_async(
+    request: TextAnalysisRequest,
+    language_detection: "asyncio.Future[Optional[str]]",
+    missing_inputs: Optional[List[str]] = None
+) -> TextAnalysisResponse:
+    """
+    Scores keywords and framing locally first, then calls classification and sentiment only when
+    their worst-case contribution could change the risk label or the EWS auto-trigger. Skipped
+    stages are listed in the response's `skipped_stages`. With a language hint, Translate
+    detection runs alongside the stages; otherwise it has to finish first.
+    """
+    text_to_analyze = request.text
+    text_lower = text_to_analyze.lower()
+    missing_inputs = missing_inputs if missing_inputs is not None else []
+    lang_detected_by_translate: Optional[str] = None
+    if _has_usable_language_hint(request):
+        lang_for_nlu_api = request.language_hint
+    else:
+        lang_detected_by_translate = await _await_stage(ANALYSIS_STAGE_LANGUAGE_DETECTION, language_detection, missing_inputs)
+        lang_for_nlu_api = _resolve_nlu_language(None, lang_detected_by_translate)
+
+    with metrics.time_stage(metrics.STAGE_KEYWORD_SCAN):
+        keyword_scan = get_keyword_matcher().scan(text_lower)
+    found_keywords, _ = _flag_keywords(keyword_scan, lang_for_nlu_api, lang_for_nlu_api)
+    local_score = calculate_peaceguard_risk(text_lower, None, None, found_keywords, keyword_scan).score
+
+    skipped_stages: List[str] = []
+    gcp_sentiment_raw: Optional[dict] = None
+    gcp_risk_assessment_raw: Optional[dict] = None
+    if nlp_utils.use_annotate_mode():
+        # One RPC returns both results, so it is only worth skipping when neither stage matters
+        if _classification_needed(local_score) or _sentiment_needed(local_score + category_max_risk_contribution()):
+            annotated = await _await_annotate_stage(nlp_utils.annotate(text_to_analyze, language_code=lang_for_nlu_api), missing_inputs)
+            gcp_sentiment_raw, gcp_risk_assessment_raw = annotated["sentiment"], annotated["classification"]
+        else:
+            skipped_stages.extend([ANALYSIS_STAGE_CLASSIFICATION, ANALYSIS_STAGE_SENTIMENT])
+    else:
+        # Both decisions are made up front so the stages still needed run side by side. Sentiment
+        # is judged against the worst classification outcome: waiting for the real one could skip
+        # it more often, but would serialize the two RPCs on every request that needs both.
+        classification_needed = _classification_needed(local_score)
+        score_bound_without_sentiment = local_score + (category_max_risk_contribution() if classification_needed else 0.0)
+        sentiment_needed = _sentiment_needed(score_bound_without_sentiment)
+        stages = {}
+        if classification_needed:
+            stages[ANALYSIS_STAGE_CLASSIFICATION] = nlp_utils.classify(text_to_analyze, language_code=lang_for_nlu_api)
+        else:
+            skipped_stages.append(ANALYSIS_STAGE_CLASSIFICATION)
+        if sentiment_needed:
+            stages[ANALYSIS_STAGE_SENTIMENT] = nlp_utils.get_sentiment(text_to_analyze, language_code=lang_for_nlu_api)
+        else:
+            skipped_stages.append(ANALYSIS_STAGE_SENTIMENT)
+        results = dict(zip(stages, await asyncio.gather(
+            *(_await_stage(stage, stage_call, missing_inputs) for stage, stage_call in stages.items())
+        )))
+        gcp_risk_assessment_raw = results.get(ANALYSIS_STAGE_CLASSIFICATION)
+        gcp_sentiment_raw = results.get(ANALYSIS_STAGE_SENTIMENT)
+
+    if _has_usable_language_hint(request):
+        lang_detected_by_translate = await _await_stage(ANALYSIS_STAGE_LANGUAGE_DETECTION, language_detection, missing_inputs)
+    return _build_text_analysis_response(
+        text_to_analyze, lang_detected_by_translate, _resolve_nlu_language(request.language_hint, lang_detected_by_translate),
+        gcp_sentiment_raw, gcp_risk_assessment_raw, keyword_scan=keyword_scan, skipped_stages=skipped_stages,
+        missing_inputs=missing_inputs
+    )
+
+async def analyze_text_batch_async(
+    requests: List[TextAnalysisRequest],
+    item_slot: Optional[Callable[[], AsyncContextManager]] = None
+) -> AsyncIterator[BatchTextAnalysisItemResult]:
+    """
+    Analyzes many texts and yields one BatchTextAnalysisItemResult per text as soon as it finishes
+    (completion order). Language detection for the whole batch is shared: one Translate RPC per
+    TRANSLATE_DETECT_MAX_BATCH_SIZE texts (skipped in annotate mode, where the NL response carries
+    the language). A failing item is reported inline via `error`. Each item's `deadline_ms` applies
+    to its own GCP stages. With `item_slot`, each item is analyzed inside the context manager it
+    returns (e.g. an admission slot), so items are scheduled individually.
+    """
+    valid_indices = [idx for idx, req in enumerate(requests) if req.text and req.text.strip()]
+    detected_by_index = {}
+    batch_missing_inputs: List[str] = []
+    if not nlp_utils.use_annotate_mode():
+        try:
+            detected_languages = await nlp_utils.detect_languages([requests[idx].text for idx in valid_indices])
+            detected_by_index = dict(zip(valid_indices, detected_languages))
+        except CircuitOpenError:
+            # Translate is down: analyze without detected languages (degraded, keywords still scored)
+            detected_by_index = {idx: None for idx in valid_indices}
+            batch_missing_inputs = [ANALYSIS_STAGE_LANGUAGE_DETECTION]
+
+    async def analyze_item(idx: int) -> BatchTextAnalysisItemResult:
+        if not (requests[idx].text and requests[idx].text.strip()):
+            return BatchTextAnalysisItemResult(index=idx, error="Text content cannot be empty.")
+        if item_slot is None:
+            return await analyze_valid_item(idx)
+        async with item_slot():
+            return await analyze_valid_item(idx)
+
+    async def analyze_valid_item(idx: int) -> BatchTextAnalysisItemResult:
+        deadline_token = None
+        if requests[idx].deadline_ms is not None:
+            deadline_token = set_current_deadline(Deadline.from_budget_ms(requests[idx].deadline_ms))
+        try:
+            if idx in detected_by_index:
+                result = await _analyze_with_detected_language_async(requests[idx], detected_by_index[idx], list(batch_missing_inputs))
+            else:
+                result = await _analyze_text_content_async(requests[idx])
+            return BatchTextAnalysisItemResult(index=idx, result=result)
+        except Exception as e:
+            logger.error("Batch analysis item failed", extra={"item_index": idx, "error": str(e)})
+            return BatchTextAnalysisItemResult(index=idx, error="An error occurred during analysis.")
+        finally:
+            if deadline_token is not None:
+                reset_current_deadline(deadline_token)
+
+    # Tasks are cancelled if the consumer stops early (client disconnected, generator closed), so
+    # abandoned items release their admission slots and stop calling GCP
+    tasks = [asyncio.ensure_future(analyze_item(idx)) for idx in range(len(requests))]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+def _risk_assessment_output(gcp_risk_assessment_raw: dict) -> GCPRiskAssessmentOutput:
+    return GCPRiskAssessmentOutput(
         risk_categories=[GCPCategoryMatch(**cat) for cat in gcp_risk_assessment_raw.get("risk_categories", [])],
         explanation=gcp_risk_assessment_raw.get("explanation")
     )
 
-    peaceguard_risk_data = calculate_peaceguard_risk(
-        text_lower=text_lower,
-        gcp_sentiment=gcp_sentiment_data,
-        gcp_risk_assessment=gcp_risk_data,
-        flagged_keywords=found_keywords 
-    )
+def _build_text_analysis_response(
+    text_to_analyze: str,
+    lang_detected_by_translate: Optional[str],
+    lang_for_nlu_api: Optional[str],
+    gcp_sentiment_raw: Optional[dict],
+    gcp_risk_assessment_raw: Optional[dict],
+    keyword_scan: Optional[KeywordScan] = None,
+    skipped_stages: Optional[List[str]] = None,
+    missing_inputs: Optional[List[str]] = None
+) -> TextAnalysisResponse:
+    text_lower = text_to_analyze.lower()
+
+    # One pass over the text finds keyword, framing and EWS lexicon hits for every later stage
+    if keyword_scan is None:
+        with metrics.time_stage(metrics.STAGE_KEYWORD_SCAN):
+            keyword_scan = get_keyword_matcher().scan(text_lower)
+    found_keywords, keyword_analysis_final_score = _flag_keywords(keyword_scan, lang_for_nlu_api, lang_detected_by_translate)
+
+    gcp_sentiment_data = GCPSentimentOutput(**gcp_sentiment_raw) if gcp_sentiment_raw is not None else None
+    gcp_risk_data = _risk_assessment_output(gcp_risk_assessment_raw) if gcp_risk_assessment_raw is not None else None
+
+    with metrics.time_stage(metrics.STAGE_RISK_SCORING):
+        peaceguard_risk_data = calculate_peaceguard_risk(
+            text_lower=text_lower,
+            gcp_sentiment=gcp_sentiment_data,
+            gcp_risk_assessment=gcp_risk_data,
+            flagged_keywords=found_keywords,
+            keyword_scan=keyword_scan
+        )
+    degraded = False
+    if missing_inputs:
+        # Score is computed from the stages that finished (latency budget / open circuit breaker)
+        peaceguard_risk_data.partial = True
+        peaceguard_risk_data.missing_inputs = list(dict.fromkeys(missing_inputs))
+        degraded = any(
+            STAGE_CIRCUIT_BREAKERS[stage].state != circuit_breaker.STATE_CLOSED
+            for stage in peaceguard_risk_data.missing_inputs if stage in STAGE_CIRCUIT_BREAKERS
+        )
 
     triggered_ews_alerts: Optional[List[EWSAlert]] = None
     if peaceguard_risk_data and peaceguard_risk_data.score >= EWS_AUTO_TRIGGER_RISK_SCORE_THRESHOLD:
-        print(f"PeaceGuard AI risk score ({peaceguard_risk_data.score:.3f}) met threshold ({EWS_AUTO_TRIGGER_RISK_SCORE_THRESHOLD}). Auto-triggering EWS check.")
+        logger.info(
+            "Risk score met EWS threshold; auto-triggering EWS check",
+            extra={"risk_score": round(peaceguard_risk_data.score, 3), "threshold": EWS_AUTO_TRIGGER_RISK_SCORE_THRESHOLD, "sampled": True}
+        )
         ews_input_data = EWSInput(
             original_text=text_to_analyze,
             detected_language=lang_detected_by_translate,
@@ -263,11 +625,12 @@ def analyze_text_content(request: TextAnalysisRequest) -> TextAnalysisResponse:
             gcp_risk_assessment=gcp_risk_data,
             flagged_keywords=found_keywords
         )
-        triggered_ews_alerts = early_warning_service.evaluate_content_for_ews(ews_input_data)
+        with metrics.time_stage(metrics.STAGE_EWS_EVALUATION):
+            triggered_ews_alerts = early_warning_service.evaluate_content_for_ews(ews_input_data, keyword_scan=keyword_scan)
         if triggered_ews_alerts:
-            print(f"EWS triggered {len(triggered_ews_alerts)} alert(s).")
+            logger.warning("EWS alerts triggered", extra={"alert_ids": [alert.alert_id for alert in triggered_ews_alerts]})
         else:
-            print("EWS check completed, no specific EWS patterns matched by this input.")
+            logger.info("EWS check completed, no patterns matched", extra={"sampled": True})
     
     narrative_parts = []
     if peaceguard_risk_data:
@@ -298,6 +661,11 @@ def analyze_text_content(request: TextAnalysisRequest) -> TextAnalysisResponse:
         cat_names = [f"'{cat.category}' ({cat.confidence*100:.1f}%)" for cat in gcp_risk_data.risk_categories[:2]]
         narrative_parts.append(f"GCP noted sensitive categories: {', '.join(cat_names)}{'...' if len(gcp_risk_data.risk_categories) > 2 else '.'}")
     
+    if degraded:
+        narrative_parts.append(f"Degraded mode: {', '.join(peaceguard_risk_data.missing_inputs)} unavailable (backend circuit breaker open); risk is based on keywords and framing.")
+    elif peaceguard_risk_data and peaceguard_risk_data.partial:
+        narrative_parts.append(f"Partial assessment: {', '.join(peaceguard_risk_data.missing_inputs)} did not finish within the latency budget.")
+
     if triggered_ews_alerts:
         narrative_parts.append(f"EWS Analysis: {len(triggered_ews_alerts)} high-level warning pattern(s) matched. See 'ews_alerts' for details.")
     elif peaceguard_risk_data and peaceguard_risk_data.score >= EWS_AUTO_TRIGGER_RISK_SCORE_THRESHOLD:
@@ -315,5 +683,9 @@ def analyze_text_content(request: TextAnalysisRequest) -> TextAnalysisResponse:
         flagged_keywords=found_keywords,
         peaceguard_risk=peaceguard_risk_data,
         ews_alerts=triggered_ews_alerts,
-        overall_explanation=final_overall_explanation
+        overall_explanation=final_overall_explanation,
+        skipped_stages=skipped_stages or [],
+        degraded=degraded,
+        circuit_breakers=circuit_breaker.breaker_states(),
+        lexicon_version=keyword_scan.version
     )
\ No newline at end of file
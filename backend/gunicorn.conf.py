@@ -0,0 +1,20 @@
+import os
+import shutil
+
+# Gunicorn settings for multi-worker Prometheus metrics (prometheus_client multiprocess mode).
+# Each worker writes its metric values to PROMETHEUS_MULTIPROC_DIR and /metrics merges them, so
+# counters and histograms are reported for the whole server, not for whichever worker answered.
+# The directory must be set before the app is imported and emptied on every server start.
+
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/peaceguard_prometheus")
+
+
+def on_starting(server):
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True) # Stale files from a previous run would be merged in
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
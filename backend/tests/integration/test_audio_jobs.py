@@ -0,0 +1,178 @@
+import asyncio
+import io
+import os
+import time
+
+import numpy as np
+import pytest
+import soundfile as sf
+from fastapi import UploadFile
+
+from backend.app.schemas.audio_job_schemas import JOB_STATUS_CANCELLED, JOB_STATUS_COMPLETED, JOB_STATUS_RUNNING
+from backend.app.services import audio_job_service, audio_stream_analyzer
+from backend.app.services.audio_job_service import AudioJobManager, AudioJobStore
+
+RATE = 16000
+
+
+def _two_utterance_wav():
+    # Two 1 s tones separated by 1.5 s of near-silence: two chunks with STT_CHUNK_MAX_SECONDS = 2
+    rng = np.random.default_rng(0)
+    t = np.arange(RATE) / RATE
+    tone = 0.2 * np.sin(2 * np.pi * 220.0 * t)
+    quiet = lambda seconds: rng.standard_normal(int(seconds * RATE)) * 0.001
+    samples = np.concatenate([quiet(0.5), tone, quiet(1.5), tone, quiet(1.0)])
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, RATE, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+class FakeSTT:
+    """Stands in for stt_client.transcribe_audio_gcp; chunks listed in `hold` wait until released."""
+
+    def __init__(self, hold=()):
+        self.calls = []
+        self.hold = set(hold)
+        self.release = asyncio.Event()
+
+    async def __call__(self, audio_content, language_code, sample_rate_hertz=None):
+        call_index = len(self.calls)
+        self.calls.append(len(audio_content))
+        if call_index in self.hold:
+            await self.release.wait()
+        return {"transcript": f"peaceful market day {call_index}", "confidence": 0.9}
+
+
+@pytest.fixture
+def environment(monkeypatch, tmp_path):
+    monkeypatch.setattr(audio_job_service.settings, "NLP_BACKEND", "local")
+    monkeypatch.setattr(audio_job_service.settings, "STT_CHUNK_MAX_SECONDS", 2.0)
+    monkeypatch.setattr(audio_job_service.settings, "AUDIO_CHUNK_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr(audio_job_service.settings, "AUDIO_JOB_RESCAN_SECONDS", 0.05)
+    monkeypatch.setattr(audio_job_service, "CANCEL_POLL_SECONDS", 0.02)
+
+    def install_stt(fake):
+        monkeypatch.setattr(audio_stream_analyzer.stt_client, "transcribe_audio_gcp", fake)
+        return fake
+
+    return AudioJobStore(str(tmp_path)), install_stt
+
+
+async def _submit(manager):
+    upload = UploadFile(file=io.BytesIO(_two_utterance_wav()), filename="clip.wav")
+    return (await manager.submit(upload, "en-US")).job_id
+
+
+async def _wait_for(condition, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+def test_job_completes_and_cleans_up(environment, monkeypatch):
+    store, install_stt = environment
+    prepared_inputs = []
+    prepare = audio_stream_analyzer.prepare_audio_for_stt
+
+    def spy_prepare(audio, path):
+        prepared_inputs.append(audio)
+        return prepare(audio, path)
+
+    monkeypatch.setattr(audio_stream_analyzer, "prepare_audio_for_stt", spy_prepare)
+
+    async def scenario():
+        stt = install_stt(FakeSTT())
+        manager = AudioJobManager(store, workers=1)
+        await manager.start()
+        try:
+            job_id = await _submit(manager)
+            await _wait_for(lambda: manager.get(job_id).status == JOB_STATUS_COMPLETED)
+        finally:
+            await manager.stop()
+        return job_id, manager.get(job_id), stt
+
+    job_id, state, stt = asyncio.run(scenario())
+    assert prepared_inputs == [store.path(job_id, ".audio")] # Decoded from the file, never read whole
+    assert len(stt.calls) == 2
+    assert state.progress.chunks_total == state.progress.chunks_done == 2
+    assert "peaceful market day 1" in state.result.original_transcript
+    assert state.attempts == 1
+    assert store.job_ids() == [job_id]
+    assert not store.cancel_requested(job_id)
+    assert not os.path.exists(store.path(job_id, ".audio"))
+
+
+def test_interrupted_job_resumes_without_repeating_finished_chunks(environment):
+    store, install_stt = environment
+
+    async def first_process():
+        stt = install_stt(FakeSTT(hold={1}))
+        manager = AudioJobManager(store, workers=1)
+        await manager.start()
+        job_id = await _submit(manager)
+        await _wait_for(lambda: manager.get(job_id).progress.chunks_done == 1)
+        await manager.stop() # Shutdown mid-job: the state stays "running"
+        return job_id, stt
+
+    async def second_process(job_id):
+        stt = install_stt(FakeSTT())
+        manager = AudioJobManager(store, workers=1)
+        await manager.start() # The rescan finds the orphaned job
+        try:
+            await _wait_for(lambda: manager.get(job_id).status == JOB_STATUS_COMPLETED)
+        finally:
+            await manager.stop()
+        return stt, manager
+
+    job_id, first_stt = asyncio.run(first_process())
+    assert store.load(job_id).status == JOB_STATUS_RUNNING
+    second_stt, manager = asyncio.run(second_process(job_id))
+    state = store.load(job_id)
+    assert len(first_stt.calls) == 2 and len(second_stt.calls) == 1 # Only the unfinished chunk again
+    assert state.attempts == 2 and manager.jobs_resumed == 1
+    assert state.transcript_segments[0].transcript == "peaceful market day 0"
+
+
+def test_running_job_is_cancelled(environment):
+    store, install_stt = environment
+
+    async def scenario():
+        install_stt(FakeSTT(hold={0}))
+        manager = AudioJobManager(store, workers=1)
+        await manager.start()
+        try:
+            job_id = await _submit(manager)
+            await _wait_for(lambda: manager.get(job_id).progress.stage == audio_stream_analyzer.STAGE_TRANSCRIBING)
+            requested = manager.cancel(job_id)
+            await _wait_for(lambda: manager.get(job_id).status == JOB_STATUS_CANCELLED)
+        finally:
+            await manager.stop()
+        return job_id, requested
+
+    job_id, requested = asyncio.run(scenario())
+    assert requested.cancel_requested and requested.status == JOB_STATUS_RUNNING
+    assert not store.cancel_requested(job_id) # The marker is cleaned up with the audio
+
+
+def test_claimed_job_is_left_to_its_holder_and_queued_job_cancels_at_once(environment):
+    store, install_stt = environment
+
+    async def scenario():
+        stt = install_stt(FakeSTT())
+        manager = AudioJobManager(store, workers=1)
+        job_id = await _submit(manager) # Not started: the job only sits on disk
+        held = store.try_claim(job_id) # Another process holds it
+        await manager.start()
+        await asyncio.sleep(0.2)
+        untouched = manager.get(job_id).status
+        store.release(held)
+        await _wait_for(lambda: manager.get(job_id).status == JOB_STATUS_COMPLETED)
+        queued_id = await _submit(manager)
+        await manager.stop()
+        return untouched, stt, queued_id
+
+    untouched, stt, queued_id = asyncio.run(scenario())
+    assert untouched == "queued" and len(stt.calls) == 2
+    manager = AudioJobManager(store, workers=1)
+    assert manager.cancel(queued_id).status == JOB_STATUS_CANCELLED # Nobody runs it: cancelled under its lock
@@ -0,0 +1,62 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.app.api.v1 import endpoints_text_analysis
+from backend.app.core.admission import AdmissionController, PRIORITY_BULK, PRIORITY_INTERACTIVE, PRIORITY_LIVE
+from backend.app.main import app
+
+TEXT_URL = "/api/v1/misinformation/analyze-text"
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    controller = AdmissionController(
+        max_concurrent=4,
+        live_reserved_slots=1,
+        queue_limits={PRIORITY_LIVE: 4, PRIORITY_INTERACTIVE: 4, PRIORITY_BULK: 3},
+        max_queue_wait_seconds={PRIORITY_LIVE: 1.0, PRIORITY_INTERACTIVE: 1.0, PRIORITY_BULK: None},
+    )
+    monkeypatch.setattr(endpoints_text_analysis, "admission_controller", controller)
+    return controller
+
+
+@pytest.fixture
+def client(monkeypatch, controller):
+    async def fake_analyze(request):
+        return {"original_text": request.text}
+
+    async def fake_batch(items, item_slot=None):
+        for idx, _ in enumerate(items):
+            async with item_slot():
+                yield endpoints_text_analysis.text_misinfo_analyzer.BatchTextAnalysisItemResult(index=idx, error="skipped")
+
+    monkeypatch.setattr(endpoints_text_analysis.text_misinfo_analyzer, "analyze_text_content_async", fake_analyze)
+    monkeypatch.setattr(endpoints_text_analysis.text_misinfo_analyzer, "analyze_text_batch_async", fake_batch)
+    return TestClient(app)
+
+
+def test_clients_cannot_claim_the_live_lane(client, controller):
+    response = client.post(TEXT_URL, json={"text": "hello"}, headers={"X-Request-Priority": PRIORITY_LIVE})
+    assert response.status_code == 400
+    assert controller.admitted[PRIORITY_LIVE] == 0
+
+
+def test_bulk_priority_is_accepted(client, controller):
+    response = client.post(TEXT_URL, json={"text": "hello"}, headers={"X-Request-Priority": PRIORITY_BULK})
+    assert response.status_code != 400
+    assert controller.admitted[PRIORITY_BULK] == 1
+
+
+def test_batch_larger_than_the_bulk_queue_room_is_rejected(client, controller):
+    controller.reserve(PRIORITY_BULK, 2) # Another batch holds most of the queue
+    response = client.post(TEXT_URL + "/batch", json={"items": [{"text": "a"}, {"text": "b"}]})
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+
+def test_batch_reservation_is_released_when_the_stream_ends(client, controller):
+    response = client.post(TEXT_URL + "/batch", json={"items": [{"text": "a"}, {"text": "b"}, {"text": "c"}]})
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 3
+    stats = controller.stats()["classes"][PRIORITY_BULK]
+    assert (stats["admitted"], stats["reserved"], stats["in_flight"]) == (3, 0, 0)
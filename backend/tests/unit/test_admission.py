@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from backend.app.core.admission import (
+    AdmissionController, AdmissionRejected, PRIORITY_BULK, PRIORITY_INTERACTIVE, PRIORITY_LIVE
+)
+
+
+def _controller(max_concurrent=2, live_reserved_slots=1, bulk_queue_limit=3):
+    return AdmissionController(
+        max_concurrent=max_concurrent,
+        live_reserved_slots=live_reserved_slots,
+        queue_limits={PRIORITY_LIVE: 2, PRIORITY_INTERACTIVE: 2, PRIORITY_BULK: bulk_queue_limit},
+        max_queue_wait_seconds={PRIORITY_LIVE: 1.0, PRIORITY_INTERACTIVE: 1.0, PRIORITY_BULK: None},
+    )
+
+
+def test_live_keeps_reserved_headroom():
+    async def scenario():
+        controller = _controller()
+        await controller.acquire(PRIORITY_BULK)
+        bulk_waiter = asyncio.ensure_future(controller.acquire(PRIORITY_BULK))
+        await asyncio.sleep(0)
+        assert not bulk_waiter.done() # Only one non-live slot
+        await controller.acquire(PRIORITY_LIVE) # The reserved slot is still free
+        assert controller.stats()["in_flight"] == 2
+        controller.release(PRIORITY_BULK)
+        await asyncio.sleep(0)
+        assert not bulk_waiter.done() # Live still holds a slot, so bulk is at its limit
+        controller.release(PRIORITY_LIVE)
+        await asyncio.wait_for(bulk_waiter, timeout=1.0)
+        return controller.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["classes"][PRIORITY_BULK]["admitted"] == 2
+    assert stats["classes"][PRIORITY_LIVE]["admitted"] == 1
+
+
+def test_freed_slot_goes_to_the_highest_waiting_class():
+    async def scenario():
+        controller = _controller(max_concurrent=1, live_reserved_slots=0)
+        await controller.acquire(PRIORITY_BULK)
+        order = []
+
+        async def wait_for(priority):
+            await controller.acquire(priority)
+            order.append(priority)
+            controller.release(priority)
+
+        waiters = [asyncio.ensure_future(wait_for(p)) for p in (PRIORITY_BULK, PRIORITY_INTERACTIVE, PRIORITY_LIVE)]
+        await asyncio.sleep(0) # All three are queued behind the running bulk request
+        controller.release(PRIORITY_BULK)
+        await asyncio.wait_for(asyncio.gather(*waiters), timeout=1.0)
+        return order
+
+    assert asyncio.run(scenario()) == [PRIORITY_LIVE, PRIORITY_INTERACTIVE, PRIORITY_BULK]
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    async def scenario():
+        controller = _controller(bulk_queue_limit=1)
+        await controller.acquire(PRIORITY_BULK)
+        queued = asyncio.ensure_future(controller.acquire(PRIORITY_BULK))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire(PRIORITY_BULK)
+        queued.cancel()
+        return rejected.value, controller.stats()
+
+    rejection, stats = asyncio.run(scenario())
+    assert rejection.retry_after_seconds >= 1
+    assert stats["classes"][PRIORITY_BULK]["rejected"] == 1
+
+
+def test_reservation_must_fit_in_the_queue():
+    controller = _controller(bulk_queue_limit=3)
+    first = controller.reserve(PRIORITY_BULK, 2)
+    with pytest.raises(AdmissionRejected):
+        controller.reserve(PRIORITY_BULK, 2) # 2 reserved + 2 > 3, even though nothing is queued yet
+    first.release()
+    first.release() # Idempotent
+    controller.reserve(PRIORITY_BULK, 3)
+    assert controller.stats()["classes"][PRIORITY_BULK]["reserved"] == 3
+
+
+def test_reserved_entries_block_other_requests_and_turn_into_queue_entries():
+    async def scenario():
+        controller = _controller(max_concurrent=2, live_reserved_slots=1, bulk_queue_limit=2)
+        reservation = controller.reserve(PRIORITY_BULK, 2)
+        await controller.acquire(PRIORITY_BULK) # A free slot is still taken at once
+        with pytest.raises(AdmissionRejected):
+            await controller.acquire(PRIORITY_BULK) # Would have to queue, but the queue room is reserved
+        controller.release(PRIORITY_BULK)
+
+        async def item():
+            async with reservation.admit():
+                await asyncio.sleep(0.01)
+
+        items = [asyncio.ensure_future(item()) for _ in range(2)]
+        await asyncio.sleep(0)
+        during = controller.stats()["classes"][PRIORITY_BULK]
+        await asyncio.gather(*items)
+        with pytest.raises(RuntimeError):
+            reservation.admit()
+        return during, controller.stats()["classes"][PRIORITY_BULK]
+
+    during, after = asyncio.run(scenario())
+    assert (during["in_flight"], during["queued"], during["reserved"]) == (1, 1, 0)
+    assert (after["in_flight"], after["queued"], after["reserved"]) == (0, 0, 0)
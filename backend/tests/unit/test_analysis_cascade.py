@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from backend.app.schemas.text_analysis_schemas import TextAnalysisRequest
+from backend.app.services import text_misinfo_analyzer as analyzer
+
+
+def test_stage_decisions(monkeypatch):
+    monkeypatch.setattr(analyzer.settings, "CATEGORY_RISK_MAX_CONTRIBUTION", 0.05)
+    assert not analyzer._classification_needed(0.0) # 0.0 + 0.05 + 0.2 stays Low and below the trigger
+    assert analyzer._classification_needed(0.25) # may reach the EWS trigger
+    assert not analyzer._classification_needed(0.9) # already Critical
+    assert not analyzer._sentiment_needed(0.05)
+    assert analyzer._sentiment_needed(0.1) # EWS may run and reads the sentiment score
+
+
+def _run_cascade(monkeypatch, text, category_bound):
+    monkeypatch.setattr(analyzer.settings, "CATEGORY_RISK_MAX_CONTRIBUTION", category_bound)
+    monkeypatch.setattr(analyzer.nlp_utils, "use_annotate_mode", lambda: False)
+    events = []
+
+    async def fake_stage(name, result):
+        events.append(("start", name))
+        await asyncio.sleep(0.01)
+        events.append(("end", name))
+        return result
+
+    monkeypatch.setattr(analyzer.nlp_utils, "classify", lambda text, language_code=None: fake_stage("classification", {"risk_categories": []}))
+    monkeypatch.setattr(
+        analyzer.nlp_utils, "get_sentiment", lambda text, language_code=None: fake_stage("sentiment", {"sentiment_label": "NEUTRAL", "sentiment_score": 0.0, "magnitude": 0.0})
+    )
+
+    async def run():
+        detection = asyncio.get_running_loop().create_future()
+        detection.set_result("en")
+        return await analyzer._analyze_text_cascade_async(TextAnalysisRequest(text=text, language="en"), detection)
+
+    return asyncio.run(run()), events
+
+
+def test_needed_stages_run_concurrently(monkeypatch):
+    response, events = _run_cascade(monkeypatch, "a calm note about the weather", None)
+    assert [kind for kind, _ in events[:2]] == ["start", "start"]
+    assert not response.skipped_stages
+
+
+def test_unneeded_stages_are_skipped(monkeypatch):
+    response, events = _run_cascade(monkeypatch, "a calm note about the weather", 0.05)
+    assert events == []
+    assert sorted(response.skipped_stages) == [analyzer.ANALYSIS_STAGE_CLASSIFICATION, analyzer.ANALYSIS_STAGE_SENTIMENT]
+
+
+def _fake_gcp(monkeypatch, risk_categories, sentiment):
+    monkeypatch.setattr(analyzer.nlp_utils, "use_annotate_mode", lambda: False)
+    calls = []
+
+    async def classify(text, language_code=None):
+        calls.append("classification")
+        return {"risk_categories": risk_categories}
+
+    async def get_sentiment(text, language_code=None):
+        calls.append("sentiment")
+        return sentiment
+
+    monkeypatch.setattr(analyzer.nlp_utils, "classify", classify)
+    monkeypatch.setattr(analyzer.nlp_utils, "get_sentiment", get_sentiment)
+    return calls
+
+
+def _analyze(monkeypatch, text, cascade):
+    monkeypatch.setattr(analyzer.settings, "ANALYSIS_CASCADE_ENABLED", cascade)
+    request = TextAnalysisRequest(text=text, language="en")
+    return asyncio.run(analyzer._analyze_with_detected_language_async(request, "en"))
+
+
+TWO_CATEGORIES = [
+    {"category": "/Sensitive Subjects/Terrorism", "confidence": 0.9},
+    {"category": "Hate Speech", "confidence": 0.8},
+]
+NEGATIVE_SENTIMENT = {"sentiment_label": "NEGATIVE", "sentiment_score": -0.6, "magnitude": 0.5}
+NEUTRAL_SENTIMENT = {"sentiment_label": "NEUTRAL", "sentiment_score": 0.0, "magnitude": 0.0}
+
+
+@pytest.mark.parametrize("text", [
+    "a calm note about the weather",
+    "the government called the protest a crisis",
+    "they will attack and kill, a massacre, riot and bomb the town",
+])
+@pytest.mark.parametrize("risk_categories", [[], TWO_CATEGORIES])
+@pytest.mark.parametrize("sentiment", [NEUTRAL_SENTIMENT, NEGATIVE_SENTIMENT])
+@pytest.mark.parametrize("category_bound", [None, 0.05])
+def test_cascade_matches_full_analysis(monkeypatch, text, risk_categories, sentiment, category_bound):
+    monkeypatch.setattr(analyzer.settings, "CATEGORY_RISK_MAX_CONTRIBUTION", category_bound)
+    _fake_gcp(monkeypatch, risk_categories, sentiment)
+    full = _analyze(monkeypatch, text, cascade=False)
+    cascaded = _analyze(monkeypatch, text, cascade=True)
+    assert cascaded.peaceguard_risk.label == full.peaceguard_risk.label
+    assert (cascaded.ews_alerts is None) == (full.ews_alerts is None) # EWS auto-trigger decision
+    assert [a.alert_id for a in cascaded.ews_alerts or []] == [a.alert_id for a in full.ews_alerts or []]
+
+
+def test_matched_categories_are_capped_together(monkeypatch):
+    monkeypatch.setattr(analyzer.settings, "CATEGORY_RISK_MAX_CONTRIBUTION", None)
+    _fake_gcp(monkeypatch, TWO_CATEGORIES, NEUTRAL_SENTIMENT)
+    response = _analyze(monkeypatch, "a calm note about the weather", cascade=False)
+    assert response.peaceguard_risk.score == analyzer.DEFAULT_CATEGORY_MAX_RISK_CONTRIBUTION
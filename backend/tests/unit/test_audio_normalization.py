@@ -0,0 +1,94 @@
+import io
+
+import numpy as np
+import pytest
+import soundfile as sf
+from scipy.signal import resample_poly
+
+from backend.app.core import audio_normalization as normalization
+
+
+def _wav(samples, rate):
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, rate, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def _stereo_speech_wav(rate=44100):
+    t = np.arange(int(3.0 * rate)) / rate
+    rng = np.random.default_rng(0)
+    mono = rng.standard_normal(len(t)) * 0.001
+    speech = (t >= 1.0) & (t < 2.0)
+    mono[speech] += 0.2 * np.sin(2 * np.pi * 220.0 * t[speech])
+    return _wav(np.stack([mono, mono], axis=1), rate)
+
+
+def test_blockwise_resampling_matches_one_pass(monkeypatch):
+    monkeypatch.setattr(normalization, "RESAMPLE_BLOCK_SECONDS", 1) # Force several blocks
+    rng = np.random.default_rng(1)
+    samples = (rng.standard_normal(44100 * 5) * 0.1).astype(np.float32)
+    blockwise = normalization.resample(samples, 44100, 16000)
+    one_pass = resample_poly(samples, 160, 441).astype(np.float32)
+    assert blockwise.shape == one_pass.shape
+    assert np.max(np.abs(blockwise - one_pass)) < 1e-4
+
+
+def test_resample_is_a_no_op_at_the_target_rate():
+    samples = np.ones(100, dtype=np.float32)
+    assert normalization.resample(samples, 16000, 16000) is samples
+
+
+def test_stereo_wav_is_normalized_to_speech_only_mono_flac():
+    audio_bytes = _stereo_speech_wav()
+    prepared = normalization.prepare_audio_for_stt(audio_bytes, "upload")
+    assert prepared.normalized and prepared.sample_rate_hertz == normalization.STT_SAMPLE_RATE_HERTZ
+    assert prepared.header.channels == 2 and prepared.header.sample_rate_hertz == 44100
+    assert prepared.utterances == 1 and prepared.seconds_received == 3.0
+    assert 1.0 <= prepared.seconds_sent < 1.8
+    (chunk,) = prepared.chunks
+    decoded, rate = sf.read(io.BytesIO(chunk.audio_bytes), dtype="int16")
+    assert rate == 16000 and decoded.ndim == 1
+    assert len(decoded) / rate == chunk.speech_seconds
+    assert 0.7 <= chunk.start_seconds <= 1.0
+    assert prepared.bytes_sent < len(audio_bytes) / 5
+
+
+def test_file_path_input_matches_bytes_input(tmp_path):
+    audio_bytes = _stereo_speech_wav()
+    audio_path = tmp_path / "upload.wav"
+    audio_path.write_bytes(audio_bytes)
+    from_bytes = normalization.prepare_audio_for_stt(audio_bytes, "upload")
+    from_path = normalization.prepare_audio_for_stt(str(audio_path), "upload")
+    assert from_path.chunks == from_bytes.chunks
+    assert from_path.header == from_bytes.header
+
+
+def test_undecodable_file_is_read_for_pass_through(tmp_path):
+    webm = b"\x1a\x45\xdf\xa3" + b"\x00" * 64
+    audio_path = tmp_path / "upload.webm"
+    audio_path.write_bytes(webm)
+    prepared = normalization.prepare_audio_for_stt(str(audio_path), "upload")
+    assert prepared.header.container == "WEBM"
+    assert [chunk.audio_bytes for chunk in prepared.chunks] == [webm]
+
+
+def test_undecodable_audio_is_passed_through():
+    webm = b"\x1a\x45\xdf\xa3" + b"\x00" * 64
+    prepared = normalization.prepare_audio_for_stt(webm, "upload")
+    assert not prepared.normalized
+    assert prepared.header.container == "WEBM"
+    assert [chunk.audio_bytes for chunk in prepared.chunks] == [webm]
+    assert prepared.chunks[0].passthrough and prepared.chunks[0].end_seconds is None # Length unknown
+
+
+def test_undecodable_audio_too_large_for_stt_is_rejected(monkeypatch):
+    monkeypatch.setattr(normalization, "STT_INLINE_AUDIO_MAX_BYTES", 32)
+    webm = b"\x1a\x45\xdf\xa3" + b"\x00" * 64
+    with pytest.raises(normalization.AudioNotTranscribable):
+        normalization.prepare_audio_for_stt(webm, "upload")
+    normalization.ensure_transcribable(_stereo_speech_wav()) # Decodable: normalized into small chunks
+
+
+def test_silent_audio_has_no_chunks():
+    prepared = normalization.prepare_audio_for_stt(_wav(np.zeros(16000 * 2), 16000), "upload")
+    assert prepared.normalized and prepared.chunks == [] and prepared.seconds_sent == 0.0
@@ -0,0 +1,32 @@
+import asyncio
+
+from backend.app.core.audio_normalization import AudioChunk, AudioHeader, PreparedAudio
+from backend.app.services import audio_stream_analyzer
+
+
+def _transcribe(monkeypatch, chunks, short_audio=False):
+    calls = []
+
+    def fake(mode):
+        async def transcribe(audio_content, language_code="en-US", sample_rate_hertz=None):
+            calls.append(mode)
+            return {"transcript": "hello", "confidence": 0.9, "error": None}
+        return transcribe
+
+    monkeypatch.setattr(audio_stream_analyzer.stt_client, "transcribe_audio_gcp", fake("sync"))
+    monkeypatch.setattr(audio_stream_analyzer.stt_client, "transcribe_audio_gcp_long_running_async", fake("long_running"))
+    prepared = PreparedAudio(chunks=chunks, header=AudioHeader(container="WEBM"), sample_rate_hertz=None)
+    asyncio.run(audio_stream_analyzer.transcribe_prepared_audio(prepared, "en-US", short_audio=short_audio))
+    return calls
+
+
+def test_audio_of_unknown_or_excess_length_uses_long_running_recognize(monkeypatch):
+    unknown_length = AudioChunk(audio_bytes=b"webm", start_seconds=0.0, end_seconds=None, passthrough=True)
+    too_long = AudioChunk(audio_bytes=b"wav", start_seconds=0.0, end_seconds=300.0, passthrough=True)
+    short = AudioChunk(audio_bytes=b"wav", start_seconds=0.0, end_seconds=20.0, passthrough=True)
+    normalized = AudioChunk(audio_bytes=b"flac", start_seconds=0.0, end_seconds=90.0, speech_seconds=50.0)
+    assert _transcribe(monkeypatch, [unknown_length]) == ["long_running"]
+    assert _transcribe(monkeypatch, [too_long]) == ["long_running"]
+    assert _transcribe(monkeypatch, [short]) == ["sync"]
+    assert _transcribe(monkeypatch, [normalized]) == ["sync"]
+    assert _transcribe(monkeypatch, [unknown_length], short_audio=True) == ["sync"] # Live segment
@@ -0,0 +1,49 @@
+import asyncio
+
+from backend.app.schemas.text_analysis_schemas import TextAnalysisRequest
+from backend.app.services import text_misinfo_analyzer
+
+
+def test_closing_the_batch_stream_cancels_pending_items(monkeypatch):
+    started, cancelled = [], []
+
+    async def fake_analyze(request):
+        started.append(request.text)
+        try:
+            await asyncio.sleep(0 if request.text == "fast" else 10)
+        except asyncio.CancelledError:
+            cancelled.append(request.text)
+            raise
+        return None
+
+    monkeypatch.setattr(text_misinfo_analyzer.nlp_utils, "use_annotate_mode", lambda: True)
+    monkeypatch.setattr(text_misinfo_analyzer, "_analyze_text_content_async", fake_analyze)
+    monkeypatch.setattr(text_misinfo_analyzer, "BatchTextAnalysisItemResult", lambda **fields: fields)
+
+    async def consume_first():
+        stream = text_misinfo_analyzer.analyze_text_batch_async(
+            [TextAnalysisRequest(text=text) for text in ("slow-1", "fast", "slow-2")]
+        )
+        first = await stream.__anext__()
+        await stream.aclose() # The NDJSON consumer went away
+        await asyncio.sleep(0) # Let the cancellations run
+        return first, list(cancelled) # Before asyncio.run cancels whatever is left
+
+    first, cancelled_before_shutdown = asyncio.run(consume_first())
+    assert first["index"] == 1
+    assert sorted(started) == ["fast", "slow-1", "slow-2"]
+    assert sorted(cancelled_before_shutdown) == ["slow-1", "slow-2"]
+
+
+def test_empty_items_are_reported_inline(monkeypatch):
+    async def fake_analyze(request):
+        return None
+
+    monkeypatch.setattr(text_misinfo_analyzer.nlp_utils, "use_annotate_mode", lambda: True)
+    monkeypatch.setattr(text_misinfo_analyzer, "_analyze_text_content_async", fake_analyze)
+
+    async def collect():
+        return [item async for item in text_misinfo_analyzer.analyze_text_batch_async([TextAnalysisRequest(text="  ")])]
+
+    (item,) = asyncio.run(collect())
+    assert item.index == 0 and item.error == "Text content cannot be empty."
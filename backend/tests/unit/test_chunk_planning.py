@@ -0,0 +1,44 @@
+import numpy as np
+
+from backend.app.core import audio_normalization as normalization
+
+RATE = 16000
+
+
+def _settings(monkeypatch, chunk_seconds=10.0, window_seconds=60.0):
+    monkeypatch.setattr(normalization.settings, "STT_CHUNK_MAX_SECONDS", chunk_seconds)
+    monkeypatch.setattr(normalization.settings, "AUDIO_RISK_WINDOW_SECONDS", window_seconds)
+
+
+def _seconds(chunks):
+    return [[(start / RATE, end / RATE) for start, end in chunk] for chunk in chunks]
+
+
+def test_spans_are_grouped_up_to_the_chunk_limit(monkeypatch):
+    _settings(monkeypatch, chunk_seconds=10.0)
+    samples = np.zeros(30 * RATE, dtype=np.int16)
+    spans = [(0, 4 * RATE), (5 * RATE, 9 * RATE), (10 * RATE, 13 * RATE), (14 * RATE, 16 * RATE)]
+    assert _seconds(normalization.plan_chunks(samples, spans, RATE)) == [
+        [(0.0, 4.0), (5.0, 9.0)],
+        [(10.0, 13.0), (14.0, 16.0)],
+    ]
+
+
+def test_chunks_do_not_cross_risk_windows(monkeypatch):
+    _settings(monkeypatch, chunk_seconds=30.0, window_seconds=10.0)
+    samples = np.zeros(30 * RATE, dtype=np.int16)
+    spans = [(2 * RATE, 4 * RATE), (8 * RATE, 11 * RATE), (12 * RATE, 13 * RATE)]
+    chunks = normalization.plan_chunks(samples, spans, RATE)
+    assert _seconds(chunks) == [[(2.0, 4.0), (8.0, 11.0)], [(12.0, 13.0)]] # Grouped by utterance start
+
+
+def test_long_utterance_is_cut_at_its_quietest_frame(monkeypatch):
+    _settings(monkeypatch, chunk_seconds=10.0)
+    rng = np.random.default_rng(0)
+    samples = (rng.standard_normal(25 * RATE) * 3000).astype(np.int16)
+    samples[8 * RATE:8 * RATE + RATE // 10] = 0 # The one quiet gap inside the search window
+    chunks = normalization.plan_chunks(samples, [(0, 25 * RATE)], RATE)
+    assert all(sum(end - start for start, end in chunk) <= 10 * RATE for chunk in chunks)
+    first_cut = chunks[0][-1][1]
+    assert 8 * RATE <= first_cut < 8 * RATE + RATE // 10
+    assert chunks[-1][-1][1] == 25 * RATE # Nothing is lost
@@ -0,0 +1,165 @@
+import pytest
+import requests
+from google.api_core import exceptions as gcp_exceptions
+
+from backend.app.core import circuit_breaker, stt_client
+from backend.app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from backend.app.core.deadline import Deadline, reset_current_deadline, set_current_deadline
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+def _breaker(probes=1):
+    return CircuitBreaker("test", failure_threshold=3, reset_timeout_seconds=30.0, half_open_max_probes=probes)
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = _breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success() # Resets the count
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == circuit_breaker.STATE_CLOSED
+    breaker.record_failure()
+    assert breaker.state == circuit_breaker.STATE_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    assert breaker.stats()["times_opened"] == 1 and breaker.rejected_calls == 1
+
+
+def test_half_open_probe_success_closes(clock):
+    breaker = _breaker(probes=2)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30.0
+    assert breaker.state == circuit_breaker.STATE_HALF_OPEN
+    assert breaker.allow_request() and breaker.allow_request()
+    assert not breaker.allow_request() # Only two probes at a time
+    breaker.record_success()
+    assert breaker.state == circuit_breaker.STATE_HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == circuit_breaker.STATE_CLOSED
+
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30.0
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == circuit_breaker.STATE_OPEN
+    assert breaker.times_opened == 2
+    clock.now += 29.0
+    assert not breaker.allow_request()
+
+
+def test_only_backend_failures_count(clock):
+    breaker = _breaker()
+    for _ in range(5):
+        breaker.record_result(gcp_exceptions.InvalidArgument("unsupported language"))
+        breaker.record_result(ValueError("local bug"))
+    assert breaker.state == circuit_breaker.STATE_CLOSED
+    for _ in range(3):
+        breaker.record_result(gcp_exceptions.ServiceUnavailable("down"))
+    assert breaker.state == circuit_breaker.STATE_OPEN
+
+
+def test_non_backend_error_releases_the_probe(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30.0
+    assert breaker.allow_request()
+    breaker.record_result(ValueError("local capacity"))
+    assert breaker.state == circuit_breaker.STATE_HALF_OPEN
+    assert breaker.allow_request() # The probe slot was given back
+
+
+def test_timeouts_from_the_callers_own_deadline_do_not_count(clock):
+    breaker = _breaker()
+    token = set_current_deadline(Deadline(0.0)) # A client that sent a tiny deadline_ms
+    try:
+        for _ in range(10):
+            breaker.record_result(gcp_exceptions.DeadlineExceeded("deadline"))
+            breaker.record_result(requests.exceptions.ReadTimeout("read timed out"))
+    finally:
+        reset_current_deadline(token)
+    assert breaker.state == circuit_breaker.STATE_CLOSED
+    for _ in range(3): # Without a request deadline the RPC ran with its full default timeout
+        breaker.record_result(gcp_exceptions.DeadlineExceeded("deadline"))
+    assert breaker.state == circuit_breaker.STATE_OPEN
+
+
+def test_caller_timeout_releases_a_half_open_probe_without_closing(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30.0
+    assert breaker.allow_request()
+    token = set_current_deadline(Deadline(0.0))
+    try:
+        breaker.record_result(gcp_exceptions.DeadlineExceeded("deadline"))
+    finally:
+        reset_current_deadline(token)
+    assert breaker.state == circuit_breaker.STATE_HALF_OPEN
+    assert breaker.allow_request()
+
+
+class _FakeStream:
+    def __init__(self, responses):
+        self._responses = iter(responses)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._responses)
+
+    def cancel(self):
+        pass
+
+
+def _half_open_stream(monkeypatch, clock, responses):
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30.0
+    monkeypatch.setattr(stt_client, "speech_breaker", breaker)
+    monkeypatch.setattr(stt_client, "get_speech_client", lambda: type("Client", (), {
+        "streaming_recognize": lambda self, config, requests, timeout, retry: _FakeStream(responses)
+    })())
+    return breaker, stt_client.streaming_recognize_blocking(iter([]), None, timeout_seconds=5.0)
+
+
+def test_aborted_stream_counts_as_success_only_once_the_backend_answered(monkeypatch, clock):
+    breaker, stream = _half_open_stream(monkeypatch, clock, ["first result", "second result"])
+    assert next(stream) == "first result" # Takes the half-open probe
+    assert breaker.state == circuit_breaker.STATE_HALF_OPEN
+    stream.close() # Session aborted after an answer
+    assert breaker.state == circuit_breaker.STATE_CLOSED
+
+
+def test_stream_ending_in_an_error_reopens_the_breaker(monkeypatch, clock):
+    def failing():
+        raise gcp_exceptions.ServiceUnavailable("down")
+        yield
+
+    breaker, stream = _half_open_stream(monkeypatch, clock, failing())
+    with pytest.raises(gcp_exceptions.ServiceUnavailable):
+        next(stream)
+    assert breaker.state == circuit_breaker.STATE_OPEN
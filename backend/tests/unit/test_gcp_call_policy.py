@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+from google.api_core import exceptions as gcp_exceptions
+
+from backend.app.core import gcp_call_policy as policy_module
+from backend.app.core.deadline import Deadline, reset_current_deadline, set_current_deadline
+from backend.app.core.gcp_call_policy import GCPCallPolicy
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(policy_module.time, "sleep", slept.append)
+    monkeypatch.setattr(policy_module.settings, "GCP_RETRY_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(policy_module.settings, "GCP_RETRY_INITIAL_BACKOFF_MS", 50.0)
+    monkeypatch.setattr(policy_module.settings, "GCP_RETRY_MAX_BACKOFF_MS", 80.0)
+    monkeypatch.setattr(policy_module.settings, "GCP_HEDGING_ENABLED", False)
+    return slept
+
+
+def _failing(error, answer_after=None):
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        if answer_after is not None and len(attempts) > answer_after:
+            return "ok"
+        raise error
+
+    return call, attempts
+
+
+def test_retries_are_bounded_with_capped_backoff(sleeps):
+    policy = GCPCallPolicy()
+    call, attempts = _failing(gcp_exceptions.ServiceUnavailable("down"))
+    with pytest.raises(gcp_exceptions.ServiceUnavailable):
+        policy.call("analyze_sentiment", call)
+    assert len(attempts) == 3 and policy.retries == 2
+    assert len(sleeps) == 2 and sleeps[0] <= 0.05 and sleeps[1] <= 0.08
+
+
+def test_retry_succeeds_after_transient_error(sleeps):
+    call, attempts = _failing(gcp_exceptions.TooManyRequests("quota"), answer_after=1)
+    assert GCPCallPolicy().call("analyze_sentiment", call) == "ok"
+    assert len(attempts) == 2
+
+
+def test_client_errors_are_not_retried(sleeps):
+    call, attempts = _failing(gcp_exceptions.InvalidArgument("bad language"))
+    with pytest.raises(gcp_exceptions.InvalidArgument):
+        GCPCallPolicy().call("analyze_sentiment", call)
+    assert len(attempts) == 1 and sleeps == []
+
+
+def test_no_retry_past_the_deadline(sleeps):
+    call, attempts = _failing(gcp_exceptions.ServiceUnavailable("down"))
+    token = set_current_deadline(Deadline(0.0))
+    try:
+        with pytest.raises(gcp_exceptions.ServiceUnavailable):
+            GCPCallPolicy().call("analyze_sentiment", call)
+    finally:
+        reset_current_deadline(token)
+    assert len(attempts) == 1 and sleeps == []
+
+
+def _hedging_policy(monkeypatch, max_rate):
+    monkeypatch.setattr(policy_module.settings, "GCP_HEDGING_ENABLED", True)
+    monkeypatch.setattr(policy_module.settings, "GCP_HEDGED_OPERATIONS", ["analyze_sentiment"])
+    monkeypatch.setattr(policy_module.settings, "GCP_HEDGE_MIN_SAMPLES", 1)
+    monkeypatch.setattr(policy_module.settings, "GCP_HEDGE_MIN_DELAY_MS", 10.0)
+    monkeypatch.setattr(policy_module.settings, "GCP_HEDGE_MAX_DELAY_MS", 10.0)
+    monkeypatch.setattr(policy_module.settings, "GCP_HEDGE_MAX_RATE", max_rate)
+    monkeypatch.setattr(policy_module.settings, "GCP_HEDGE_MAX_WORKERS", 4)
+    policy = GCPCallPolicy()
+    policy._window("analyze_sentiment").add(0.001)
+    return policy
+
+
+def test_slow_first_attempt_is_hedged(monkeypatch):
+    policy = _hedging_policy(monkeypatch, max_rate=1.0)
+    release_first = threading.Event()
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            release_first.wait(2.0) # The first attempt hangs until the test ends
+            return "first"
+        return "hedge"
+
+    try:
+        assert policy.call("analyze_sentiment", call) == "hedge"
+    finally:
+        release_first.set()
+    assert policy.hedges_sent == 1 and policy.hedge_wins == 1
+
+
+def test_hedges_are_capped_and_unhedgeable_calls_stay_on_the_caller(monkeypatch):
+    policy = _hedging_policy(monkeypatch, max_rate=0.0)
+    threads = []
+
+    def call():
+        threads.append(threading.current_thread())
+        time.sleep(0.03) # Slower than the hedge delay
+        return "ok"
+
+    assert policy.call("analyze_sentiment", call) == "ok"
+    assert threads == [threading.current_thread()]
+    assert policy.hedges_sent == 0
+
+
+def test_default_hedge_pool_size_follows_the_gcp_executor(monkeypatch):
+    monkeypatch.setattr(policy_module.settings, "GCP_HEDGE_MAX_WORKERS", None)
+    monkeypatch.setattr(policy_module.settings, "GCP_EXECUTOR_MAX_WORKERS", 16)
+    assert policy_module.hedge_pool_size() == 32
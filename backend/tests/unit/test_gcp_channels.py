@@ -0,0 +1,30 @@
+import pytest
+
+from backend.app.core.deadline import Deadline, reset_current_deadline, set_current_deadline
+from backend.app.core.gcp_channels import bound_http_timeouts_by_deadline
+
+
+class _Session:
+    def __init__(self):
+        self.timeouts = []
+
+    def request(self, method, url, data=None, headers=None, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        return "response"
+
+
+def test_http_timeouts_are_bounded_by_the_request_deadline():
+    session = _Session()
+    bound_http_timeouts_by_deadline(session)
+    assert session.request("POST", "https://example.test/detect", timeout=60) == "response"
+    token = set_current_deadline(Deadline(0.5))
+    try:
+        session.request("POST", "https://example.test/detect", timeout=60)
+        session.request("POST", "https://example.test/detect")
+        session.request("POST", "https://example.test/detect", timeout=(3.0, 60)) # (connect, read) left alone
+    finally:
+        reset_current_deadline(token)
+    assert session.timeouts[0] == 60
+    assert session.timeouts[1] == pytest.approx(0.5, abs=0.1)
+    assert session.timeouts[2] == pytest.approx(0.5, abs=0.1)
+    assert session.timeouts[3] == (3.0, 60)
@@ -0,0 +1,26 @@
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+_PROBE = """
+import json, sys, threading
+import backend.app.main
+from backend.app.core import structured_logging
+before = {"threads": [t.name for t in threading.enumerate()], "scipy_signal": "scipy.signal" in sys.modules}
+structured_logging.get_logger("backend.probe").warning("first record") # Starts the listener
+structured_logging.shutdown_logging() # Flushes the record
+print(json.dumps(before))
+"""
+
+
+def test_importing_the_app_starts_no_threads_and_skips_heavy_audio_imports():
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE], cwd=REPO_ROOT, capture_output=True, text=True, timeout=120, check=True
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert result["threads"] == ["MainThread"]
+    assert result["scipy_signal"] is False
+    assert "first record" in completed.stdout
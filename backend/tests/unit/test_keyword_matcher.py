@@ -0,0 +1,58 @@
+from backend.app.core.keyword_matcher import KeywordMatcher
+
+
+def _matcher():
+    return KeywordMatcher({
+        "dangerous": ["kill", "us vs them"],
+        "sensitive": ["election", "kill"],
+        "framing": ["they are coming"],
+    }, version="test-1")
+
+
+def test_matches_whole_words_only():
+    scan = _matcher().scan("skill killer kill! _kill kill")
+    assert [(hit.term, hit.start, hit.end) for hit in scan.hits] == [("kill", 13, 17), ("kill", 25, 29)]
+
+
+def test_term_in_several_categories():
+    scan = _matcher().scan("they will kill")
+    assert scan.in_category("kill", "dangerous")
+    assert scan.in_category("kill", "sensitive")
+    assert scan.counts("dangerous") == {"kill": 1}
+    assert scan.version == "test-1"
+
+
+def test_overlapping_terms_are_all_reported():
+    matcher = KeywordMatcher({"a": ["rigged", "rigged election"], "b": ["election"]})
+    assert matcher.find_terms("the rigged election") == ["rigged", "rigged election", "election"]
+
+
+def test_multi_word_terms_match_across_whitespace_runs():
+    matcher = _matcher()
+    for text in ("it is us  vs them", "it is us\tvs\nthem", "it is us \r\n vs   them"):
+        assert matcher.find_terms(text, "dangerous") == ["us vs them"], text
+
+
+def test_offsets_point_into_the_original_text():
+    text = "now\n\nthey  are\tcoming to kill"
+    hits = {hit.term: hit for hit in _matcher().scan(text).hits}
+    framing = hits["they are coming"]
+    assert text[framing.start:framing.end] == "they  are\tcoming"
+    assert text[hits["kill"].start:hits["kill"].end] == "kill"
+
+
+def test_whitespace_does_not_join_words():
+    # Collapsing whitespace must not make "us vs them" match inside longer words
+    assert _matcher().find_terms("bus  vs them") == []
+    assert _matcher().find_terms("us vs\tthemselves") == []
+
+
+def test_lexicon_terms_are_normalized():
+    matcher = KeywordMatcher({"a": ["  Us   VS them ", ""]})
+    assert len(matcher) == 1
+    assert matcher.find_terms("us vs them") == ["us vs them"]
+
+
+def test_empty_inputs():
+    assert _matcher().scan("").hits == []
+    assert KeywordMatcher({}).scan("kill").hits == []
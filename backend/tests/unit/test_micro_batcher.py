@@ -0,0 +1,131 @@
+import asyncio
+import gc
+
+from backend.app.core.deadline import Deadline, get_current_deadline, set_current_deadline
+from backend.app.core.micro_batcher import AsyncMicroBatcher
+
+
+def _echo_batcher(calls, max_batch_size=3, max_wait_seconds=0.01):
+    async def batch_fn(items):
+        calls.append(list(items))
+        await asyncio.sleep(0)
+        return [item.upper() for item in items]
+    return AsyncMicroBatcher("test", batch_fn, max_batch_size=max_batch_size, max_wait_seconds=max_wait_seconds)
+
+
+def test_items_within_the_window_share_one_batch():
+    calls = []
+    batcher = _echo_batcher(calls, max_batch_size=10)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit(item) for item in ("a", "b", "c")))
+
+    assert asyncio.run(main()) == ["A", "B", "C"]
+    assert calls == [["a", "b", "c"]]
+
+
+def test_full_batch_is_sent_without_waiting():
+    calls = []
+    batcher = _echo_batcher(calls, max_batch_size=2, max_wait_seconds=60)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(batcher.submit("a"), batcher.submit("b")), timeout=1)
+
+    assert asyncio.run(main()) == ["A", "B"]
+    assert batcher.stats()["largest_batch"] == 2
+
+
+def test_batch_failure_reaches_every_caller():
+    async def batch_fn(items):
+        raise RuntimeError("translate down")
+
+    batcher = AsyncMicroBatcher("test", batch_fn, max_batch_size=5, max_wait_seconds=0.001)
+
+    async def main():
+        return await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+
+    assert [str(result) for result in asyncio.run(main())] == ["translate down"] * 2
+
+
+def test_short_result_list_fails_the_unmatched_callers():
+    async def batch_fn(items):
+        return ["only-one"]
+
+    batcher = AsyncMicroBatcher("test", batch_fn, max_batch_size=5, max_wait_seconds=0.001)
+
+    async def main():
+        return await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+
+    first, second = asyncio.run(main())
+    assert first == "only-one"
+    assert isinstance(second, RuntimeError)
+
+
+def test_running_batch_is_kept_alive_until_it_finishes():
+    release = None
+
+    async def batch_fn(items):
+        await release.wait()
+        return items
+
+    batcher = AsyncMicroBatcher("test", batch_fn, max_batch_size=1, max_wait_seconds=0)
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        caller = asyncio.ensure_future(batcher.submit("a"))
+        await asyncio.sleep(0)
+        assert len(batcher._batch_tasks) == 1
+        gc.collect()
+        release.set()
+        result = await asyncio.wait_for(caller, timeout=1)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(main()) == "a"
+    assert not batcher._batch_tasks
+
+
+def test_batch_runs_under_the_longest_deadline_and_callers_keep_their_own():
+    seen = []
+
+    async def batch_fn(items):
+        seen.append(get_current_deadline())
+        await asyncio.sleep(0.2)
+        return [item.upper() for item in items]
+
+    batcher = AsyncMicroBatcher("test", batch_fn, max_batch_size=2, max_wait_seconds=60)
+    short, long = Deadline(0.05), Deadline(5.0)
+
+    async def submit(item, deadline):
+        set_current_deadline(deadline) # Each gathered coroutine runs in its own task context
+        return await batcher.submit(item)
+
+    async def main():
+        # The short-deadline caller fills the batch, so the flush happens in its context
+        return await asyncio.gather(submit("a", long), submit("b", short), return_exceptions=True)
+
+    long_result, short_result = asyncio.run(main())
+    assert seen == [long]
+    assert long_result == "A"
+    assert isinstance(short_result, asyncio.TimeoutError)
+
+
+def test_batch_without_a_deadline_when_any_caller_has_none():
+    seen = []
+
+    async def batch_fn(items):
+        seen.append(get_current_deadline())
+        return items
+
+    batcher = AsyncMicroBatcher("test", batch_fn, max_batch_size=2, max_wait_seconds=60)
+
+    async def submit(item, deadline):
+        set_current_deadline(deadline)
+        return await batcher.submit(item)
+
+    async def main():
+        return await asyncio.gather(submit("a", None), submit("b", Deadline(5.0)))
+
+    assert asyncio.run(main()) == ["a", "b"]
+    assert seen == [None]
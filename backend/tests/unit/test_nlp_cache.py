@@ -0,0 +1,47 @@
+from backend.app.core import nlp_cache
+from backend.app.core.nlp_cache import TTLCache, make_cache_key
+
+
+def test_hit_returns_a_copy():
+    cache = TTLCache(max_entries=4, ttl_seconds=60)
+    cache.put("k", {"score": 0.5})
+    first = cache.get("k")
+    first["score"] = 1.0
+    assert cache.get("k") == {"score": 0.5}
+    assert (cache.hits, cache.misses) == (2, 0)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1 # "b" is now the least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.evictions == 1
+
+
+def test_expired_entry_is_a_miss(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(nlp_cache.time, "monotonic", lambda: now[0])
+    cache = TTLCache(max_entries=4, ttl_seconds=10)
+    cache.put("k", "v")
+    now[0] += 9
+    assert cache.get("k") == "v"
+    now[0] += 2
+    assert cache.get("k", "missing") == "missing"
+    assert cache.expirations == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_disabled_cache_stores_nothing():
+    cache = TTLCache(max_entries=0, ttl_seconds=60)
+    cache.put("k", "v")
+    assert cache.get("k") is None
+
+
+def test_key_ignores_trivial_text_differences():
+    assert make_cache_key("sentiment", "Vote  now\n", "en") == make_cache_key("sentiment", "Vote now", "en")
+    assert make_cache_key("sentiment", "Vote now", "en") != make_cache_key("sentiment", "Vote now", "fr")
+    assert make_cache_key("sentiment", "Vote now", "en") != make_cache_key("classify", "Vote now", "en")
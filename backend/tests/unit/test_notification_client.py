@@ -0,0 +1,31 @@
+import logging
+
+from backend.app.core import notification_client as notification_module
+
+
+def test_info_logs_mask_recipients_and_omit_the_body(monkeypatch):
+    records = []
+
+    class _Capture(logging.Handler):
+        def emit(self, record):
+            records.append(record)
+
+    handler = _Capture(level=logging.DEBUG)
+    monkeypatch.setattr(notification_module.logger, "level", logging.DEBUG)
+    notification_module.logger.addHandler(handler)
+    try:
+        notification_module.notification_client.send_sms_alert("+2348012345678", "Alert: unrest reported near the market")
+    finally:
+        notification_module.logger.removeHandler(handler)
+
+    info = [record for record in records if record.levelno >= logging.INFO]
+    assert len(info) == 1
+    assert info[0].recipient == "**********5678"
+    assert not hasattr(info[0], "sms_message")
+    assert all("+2348012345678" not in str(vars(record)) for record in records)
+
+
+def test_mask_short_recipients():
+    assert notification_module._mask_recipient("1234") == "1234"
+    assert notification_module._mask_recipient("") == ""
+    assert notification_module._mask_recipient(None) == ""
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from backend.app.core.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return {"label": "High"}
+
+    async def main():
+        return await asyncio.gather(*(flight.do("same-text", work) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert runs == [1]
+    assert all(result is results[0] for result in results)
+    assert (flight.executions, flight.coalesced) == (1, 4)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_different_keys_and_later_calls_run_again():
+    flight = SingleFlight("test")
+    runs = []
+
+    async def work():
+        runs.append(1)
+        return len(runs)
+
+    async def main():
+        together = await asyncio.gather(flight.do("a", work), flight.do("b", work))
+        later = await flight.do("a", work)
+        return together, later
+
+    assert asyncio.run(main()) == ([1, 2], 3)
+
+
+def test_exception_reaches_every_caller():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0)
+        raise RuntimeError("backend down")
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert [str(result) for result in results] == ["backend down"] * 3
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_work():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        leaver = asyncio.ensure_future(flight.do("k", work))
+        stayer = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        leaver.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaver
+        return await stayer
+
+    assert asyncio.run(main()) == "done"
@@ -0,0 +1,68 @@
+import numpy as np
+
+from backend.app.core import vad
+
+RATE = 16000
+
+
+def _noise(seconds, dbfs, seed=0):
+    rng = np.random.default_rng(seed)
+    amplitude = 10 ** (dbfs / 20) * vad.INT16_FULL_SCALE
+    return (rng.standard_normal(int(seconds * RATE)) * amplitude).astype(np.int16)
+
+
+def _tone(seconds, dbfs, hertz=220.0):
+    t = np.arange(int(seconds * RATE)) / RATE
+    amplitude = 10 ** (dbfs / 20) * vad.INT16_FULL_SCALE * np.sqrt(2)
+    return (np.sin(2 * np.pi * hertz * t) * amplitude).astype(np.int16)
+
+
+def _speech_between_silence():
+    # 1 s background, 1 s "speech", 1 s background
+    return np.concatenate([_noise(1.0, -60), _tone(1.0, -20) + _noise(1.0, -60, seed=1), _noise(1.0, -60, seed=2)])
+
+
+def test_detects_one_utterance_around_the_speech():
+    spans = vad.detect_utterance_spans(_speech_between_silence(), RATE)
+    assert len(spans) == 1
+    start, end = spans[0]
+    assert 0.75 * RATE <= start <= 1.0 * RATE # Pre-roll reaches a little before the onset
+    assert 2.0 * RATE <= end <= 2.6 * RATE # Hangover keeps a little after it
+
+
+def test_silence_and_clicks_are_dropped():
+    background = _noise(2.0, -60)
+    assert vad.detect_utterance_spans(background, RATE) == []
+    click = background.copy()
+    click[RATE:RATE + RATE // 100] = _tone(0.01, -10) # 10 ms, shorter than VAD_MIN_SPEECH_MS
+    assert vad.detect_utterance_spans(click, RATE) == []
+
+
+def test_short_pauses_stay_inside_an_utterance():
+    audio = np.concatenate([_noise(0.5, -60), _tone(0.5, -20), _noise(0.2, -60, seed=3), _tone(0.5, -20), _noise(1.0, -60, seed=4)])
+    assert len(vad.detect_utterance_spans(audio, RATE)) == 1
+
+
+def test_streaming_matches_whole_buffer_detection():
+    audio = _speech_between_silence()
+    whole = vad.detect_utterance_spans(audio, RATE)
+    frame_length = RATE * vad.settings.VAD_FRAME_MS // 1000
+    frames = audio[:len(audio) // frame_length * frame_length].reshape(-1, frame_length)
+    floor = float(np.percentile(vad.frame_features(frames)[0], vad.INITIAL_NOISE_FLOOR_PERCENTILE))
+    detector = vad.VoiceActivityDetector(RATE, initial_noise_floor_dbfs=floor, track_spans=True)
+    output = []
+    for start in range(0, len(audio), 1234): # Chunk sizes that do not line up with frames
+        output.extend(detector.process(audio[start:start + 1234]))
+    output.extend(detector.flush())
+    assert detector.utterance_spans == whole
+    assert output[-1] is vad.UTTERANCE_END
+    kept = sum(len(part) for part in output if part is not vad.UTTERANCE_END)
+    assert kept == sum(end - start for start, end in whole) == detector.samples_kept
+    assert detector.kept_ratio() < 0.6
+
+
+def test_stream_without_a_measured_floor_adapts_to_steady_noise():
+    detector = vad.VoiceActivityDetector(RATE)
+    detector.process(_noise(3.0, -45)) # Louder than the assumed quiet room
+    detector.flush()
+    assert detector.samples_kept < 1.5 * RATE # Noise stops counting as speech within the first second